@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Los modulos de eval/ se importan entre si por nombre (igual que los scripts)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cli import main  # noqa: E402
+
+main()
@@ -0,0 +1,93 @@
+import asyncio
+
+from metrics import label
+from parsing import indexed_answers
+
+# Empaquetado de varias preguntas independientes en una sola peticion: las
+# respuestas vuelven en <answer id="i"> y se reparten a cada pregunta. Divide
+# por K el numero de peticiones (y la presion sobre la cuota).
+
+BATCH_HEADER = (
+    "Below are {count} independent questions. Solve each one on its own and answer "
+    "each question separately between <answer id=\"N\"></answer> tags, where N is the "
+    "number of the question (from 1 to {count}).\n\n"
+)
+QUESTION_HEADER = "### Question {index}\n\n"
+# Tiempo que espera un lote incompleto a que lleguen mas preguntas
+DEFAULT_MAX_WAIT = 0.05
+
+
+def build_batch_prompt(prompts):
+    parts = [QUESTION_HEADER.format(index=i) + prompt.strip()
+             for i, prompt in enumerate(prompts, start=1)]
+    return BATCH_HEADER.format(count=len(prompts)) + "\n\n".join(parts)
+
+
+# Collects prompts submitted concurrently and sends them `size` at a time
+# through `send(prompt, answers)` (a coroutine returning the response text).
+# `submit` returns a response holding just that question's answer in plain
+# <answer></answer> tags, so the scorers work unchanged. Questions left
+# unanswered by a packed response are re-asked in halves, down to single
+# questions sent with their own prompt.
+class Batcher:
+    def __init__(self, send, size, max_wait=DEFAULT_MAX_WAIT):
+        self.send = send
+        self.size = size
+        self.max_wait = max_wait
+        self.requests = 0
+        self._pending = []
+        self._timer = None
+        self._tasks = set()
+
+    async def submit(self, prompt):
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((prompt, future))
+        if len(self._pending) >= self.size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        items, self._pending = self._pending[:self.size], self._pending[self.size:]
+        if self._pending:
+            self._timer = asyncio.get_running_loop().call_later(self.max_wait, self._flush)
+        if items:
+            task = asyncio.ensure_future(self._dispatch(items))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, items):
+        # la peticion es de todo el lote, no de la pregunta que lo cerro
+        label(question=None, batch=len(items))
+        try:
+            responses = await self._answer([prompt for prompt, _ in items])
+        except Exception as e:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), response in zip(items, responses):
+            if not future.done():
+                future.set_result(response)
+
+    async def _answer(self, prompts):
+        self.requests += 1
+        if len(prompts) == 1:
+            return [await self.send(prompts[0], 1)]
+        text = await self.send(build_batch_prompt(prompts), len(prompts))
+        answers = indexed_answers(text, len(prompts))
+        responses = [None if answer is None else f"<answer>{answer}</answer>" for answer in answers]
+        missing = [i for i, response in enumerate(responses) if response is None]
+        if missing:
+            half = (len(missing) + 1) // 2
+            groups = [missing[:half], missing[half:]] if len(missing) > 1 else [missing]
+            retried = await asyncio.gather(
+                *(self._answer([prompts[i] for i in group]) for group in groups if group))
+            for group, group_responses in zip(groups, retried):
+                for i, response in zip(group, group_responses):
+                    responses[i] = response
+        return responses
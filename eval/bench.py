@@ -0,0 +1,199 @@
+import asyncio
+import contextlib
+import gc
+import io
+import json
+import os
+import tempfile
+import time
+import timeit
+import tracemalloc
+
+from data import Dataset, drop_caches
+from engine import set_rate_limiter, set_response_cache
+from metrics import Metrics, get_metrics, set_metrics
+from prompts import build_prompt, load_text
+from ratelimit import RateLimiter
+from runner import load_config, prepare_config, run_job_async
+from scoring import SCORERS, TYPED_SCORERS
+
+# Benchmark del propio harness, sin red: carga de datos, construccion de
+# prompts, parseo y puntuacion, y el bucle de evaluacion contra el modelo
+# mock con distintas concurrencias. Compara contra una linea base guardada.
+
+DEFAULT_BASELINE = os.path.join("results", "bench_baseline.json")
+# Caida relativa de preguntas/s (o subida de memoria) que cuenta como regresion
+DEFAULT_TOLERANCE = 0.2
+CONCURRENCY_LEVELS = (1, 8, 32, 128)
+
+# Every corpus Dataset can read: (name, path, flat, template, scorer). The
+# math/extrapolate and math/interpolate .txt dumps have no loader.
+CORPORA = [
+    ("code_output", "dataset/code_output", False, "answer_integer", "list"),
+    ("code_output_flat", "dataset/code_output", True, "answer_integer", "int"),
+    ("code_output_train", "dataset/code_output/train", False, "answer_integer", "list"),
+    ("discrete", "dataset/discrete", False, "answer_integer", "list"),
+    ("logic", "dataset/logic", False, "logic", "list"),
+    ("math_test", "math/test.json", False, "answer_value", "typed"),
+    ("math_train", "math/train.json", False, "answer_value", "typed"),
+    ("ruletaker_train", "ruletaker_subset/train.parquet", False, "answer_bool", "bool"),
+    ("ruletaker_test", "ruletaker_subset/test.parquet", False, "answer_bool", "bool"),
+    ("ruletaker_test_ood", "ruletaker_subset/test_ood.parquet", False, "answer_bool", "bool"),
+]
+
+
+# Best time per call over `repeat` rounds; each round loops enough calls to
+# last 0.2 s, so the small corpora are not dominated by timer noise
+def _best_time(function, repeat):
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+
+# Best time of `repeat` cold calls, with `setup` run untimed before each one
+def _best_cold_time(function, setup, repeat):
+    times = []
+    for _ in range(repeat):
+        setup()
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def _peak_mb(function):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1] / 2 ** 20
+    finally:
+        tracemalloc.stop()
+
+
+def _correct_response(answer):
+    if isinstance(answer, bool):
+        answer = str(answer)
+    return f"<answer>{json.dumps(answer) if isinstance(answer, list) else answer}</answer>"
+
+
+# Load, prompt and score stages of one corpus
+def bench_corpus(name, path, flat, template, scorer, repeat=5):
+    load = lambda: list(Dataset(path, flat=flat))  # noqa: E731
+    records = load()
+    text = load_text(template)
+    score = SCORERS[scorer]
+    responses = [_correct_response(record.answer) for record in records]
+
+    def prompts():
+        for record in records:
+            build_prompt(text, record.question, record.options)
+
+    def scores():
+        for record, response in zip(records, responses):
+            if scorer in TYPED_SCORERS:
+                score(response, record.answer, answer_type=record.type)
+            else:
+                score(response, record.answer)
+
+    # the load stage starts cold: no parsed files in memory and no stored
+    # index, otherwise every round after the first only measures cache hits
+    cold = lambda: drop_caches(path, flat=flat)  # noqa: E731
+    rows = []
+    for stage, function in (("load", load), ("prompt", prompts), ("score", scores)):
+        if stage == "load":
+            seconds = _best_cold_time(function, cold, repeat)
+            cold()
+            peak = _peak_mb(function)
+        else:
+            seconds = _best_time(function, repeat)
+            peak = None
+        rows.append({"bench": f"{name}/{stage}", "items": len(records),
+                     "qps": len(records) / seconds if seconds else float("inf"),
+                     "seconds": seconds, "peak_mb": peak})
+    return rows
+
+
+# The evaluation loop (pool, limiter, scorer, checkpoint, metrics) against the
+# mock model. Scheduling overhead is the worker time not spent waiting for
+# the model: (wall * concurrency - model latency) per question.
+def bench_loop(concurrency, questions=256, latency=0.01, jitter=0.5, error_rate=0.0, seed=0):
+    config = load_config("algs_test")
+    config["model"] = {**config["model"], "provider": "mock", "mock": {
+        "responses": ["<answer>0</answer>"], "latency": latency, "jitter": jitter,
+        "error_rate": error_rate, "seed": seed}}
+    config["dataset"] = {**config["dataset"], "path": "dataset/code_output/train"}
+    config["retries"] = 3
+    config["name"] = f"bench-c{concurrency}"
+    job = prepare_config(config, limit=questions)
+    set_rate_limiter(RateLimiter(rpm=None, tpm=None))
+    set_response_cache(None)
+    metrics = Metrics()
+    set_metrics(metrics)
+
+    with tempfile.TemporaryDirectory() as checkpoint_dir, contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        asyncio.run(run_job_async(job, concurrency=concurrency, checkpoint_dir=checkpoint_dir))
+        wall = time.perf_counter() - start
+    model_time = sum(metrics.of("request", "latency"))
+    n = len(job["dataset"])
+    workers = min(concurrency, n)
+    return {"bench": f"loop/c{concurrency}", "items": n, "qps": n / wall, "seconds": wall,
+            "peak_mb": None,
+            "overhead_ms": 1000 * max(0.0, wall * workers - model_time) / n,
+            "errors": len(metrics.of("request", "error"))}
+
+
+def run_benchmarks(corpora=None, levels=CONCURRENCY_LEVELS, repeat=5, **loop_options):
+    rows = []
+    for name, path, flat, template, scorer in CORPORA:
+        if corpora and name not in corpora:
+            continue
+        rows.extend(bench_corpus(name, path, flat, template, scorer, repeat=repeat))
+    previous = get_metrics()
+    try:
+        for concurrency in levels:
+            rows.append(bench_loop(concurrency, **loop_options))
+    finally:
+        set_metrics(previous)
+        set_rate_limiter(None)
+    return rows
+
+
+# Rows slower (qps) or hungrier (peak_mb) than the baseline by more than
+# `tolerance`, as (bench, metric, baseline, current)
+def compare(rows, baseline, tolerance=DEFAULT_TOLERANCE):
+    stored = {row["bench"]: row for row in baseline["rows"]}
+    regressions = []
+    for row in rows:
+        before = stored.get(row["bench"])
+        if before is None:
+            continue
+        if row["qps"] < before["qps"] * (1 - tolerance):
+            regressions.append((row["bench"], "qps", before["qps"], row["qps"]))
+        if row.get("peak_mb") and before.get("peak_mb") and row["peak_mb"] > before["peak_mb"] * (1 + tolerance):
+            regressions.append((row["bench"], "peak_mb", before["peak_mb"], row["peak_mb"]))
+    return regressions
+
+
+def save_baseline(rows, path=DEFAULT_BASELINE):
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf8") as f:
+        json.dump({"created": time.strftime("%Y-%m-%d %H:%M:%S"), "rows": rows}, f, indent=2)
+
+
+def load_baseline(path=DEFAULT_BASELINE):
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf8") as f:
+        return json.load(f)
+
+
+def print_rows(rows):
+    print(f"{'bench':32} {'items':>7} {'q/s':>12} {'seconds':>9} {'peak MB':>8} {'overhead ms':>11}")
+    for row in rows:
+        peak = f"{row['peak_mb']:.1f}" if row.get("peak_mb") is not None else ""
+        overhead = f"{row['overhead_ms']:.3f}" if "overhead_ms" in row else ""
+        print(f"{row['bench']:32} {row['items']:>7} {row['qps']:>12.1f} {row['seconds']:>9.4f} "
+              f"{peak:>8} {overhead:>11}")
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+DEFAULT_CACHE_PATH = os.path.join(".eval_cache", "responses.sqlite")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_MAX_AGE = 30 * 24 * 3600
+# Expired entries are swept at most this often; get() never returns them anyway
+AGE_SWEEP_INTERVAL = 60
+
+
+def _model_fields(model):
+    # GenerativeModel guarda la configuracion en atributos privados
+    name = getattr(model, "model_name", None) or getattr(model, "name", None)
+    config = getattr(model, "_generation_config", None)
+    if config is None:
+        config = getattr(model, "generation_config", None)
+    instruction = getattr(model, "_system_instruction", None)
+    if instruction is None:
+        instruction = getattr(model, "system_instruction", None)
+    return name, config, instruction
+
+
+# Content address of a request: sha256 over (model, generation config,
+# system instruction, full prompt). Repeated samples of the same request
+# (self-consistency) are told apart by `sample`; sample 0 keeps the plain key.
+# Streamed responses are cut after the answer tag, so they get their own key.
+def cache_key(model, prompt, sample=0, stream=False):
+    name, config, instruction = _model_fields(model)
+    fields = [str(name), config or {}, str(instruction or ""), prompt]
+    if sample:
+        fields.append(sample)
+    if stream:
+        fields.append("stream")
+    payload = json.dumps(fields, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf8")).hexdigest()
+
+
+# On-disk response cache backed by SQLite, with age and size based eviction
+# (least recently used entries go first once max_bytes is exceeded). The total
+# size is kept as a running count so a put does not scan the whole table; it
+# is recounted on every age sweep, which also picks up other writers.
+class ResponseCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES,
+                 max_age=DEFAULT_MAX_AGE):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL
+            )""")
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self.conn.commit()
+        self._swept = 0.0
+        self._total = self._count_bytes()
+
+    def _count_bytes(self):
+        return self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    @classmethod
+    def from_env(cls):
+        path = os.environ.get("EVAL_CACHE", DEFAULT_CACHE_PATH)
+        if path.lower() in ("", "0", "off", "none"):
+            return None
+        return cls(path)
+
+    def get(self, key):
+        row = self.conn.execute(
+            "SELECT response, size, created FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        response, size, created = row
+        now = time.time()
+        if self.max_age and now - created > self.max_age:
+            self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.conn.commit()
+            self._total -= size
+            return None
+        self.conn.execute(
+            "UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+        self.conn.commit()
+        return response
+
+    def put(self, key, response, model=None):
+        now = time.time()
+        size = len(response.encode("utf8"))
+        replaced = self.conn.execute(
+            "SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+            (key, model, response, size, now, now))
+        self.conn.commit()
+        self._total += size - (replaced[0] if replaced else 0)
+        self.evict()
+
+    def evict(self):
+        now = time.time()
+        if self.max_age and now - self._swept >= AGE_SWEEP_INTERVAL:
+            self._swept = now
+            self.conn.execute("DELETE FROM responses WHERE created < ?", (now - self.max_age,))
+            self._total = self._count_bytes()
+        if self.max_bytes and self._total > self.max_bytes:
+            # recorre el indice de `accessed` solo hasta liberar lo necesario
+            stale = []
+            for key, size in self.conn.execute("SELECT key, size FROM responses ORDER BY accessed"):
+                if self._total <= self.max_bytes:
+                    break
+                stale.append((key,))
+                self._total -= size
+            self.conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+        self.conn.commit()
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,266 @@
+import itertools
+import json
+import math
+import re
+
+import numpy as np
+
+from parsing import BOOLEANS, clean, to_number
+
+# Comprobacion tipada de respuestas de math/*.json (t in int, float, bool,
+# string, tuple). Cada tipo tiene su normalizador y su regla de igualdad; el
+# modo por lotes compara columnas enteras con NumPy.
+
+TYPES = ("int", "float", "bool", "string", "tuple")
+REL_TOL = 1e-6
+ABS_TOL = 1e-9
+# Por encima de 2**53 un float64 ya no representa todos los enteros
+_EXACT_LIMIT = 2.0 ** 53
+
+_BOOLS = {key: int(value) for key, value in BOOLEANS.items()}
+_THOUSANDS = re.compile(r"^-?\d{1,3}(,\d{3})+(\.\d+)?$")
+
+
+def _clean(text):
+    text = clean(str(text))
+    if "=" in text:
+        text = text.rsplit("=", 1)[1].strip()
+    return text
+
+
+# Number from "12", "-3.5", "2/9", "\frac{2}{9}", "1,234"; NaN when it is not one
+def parse_number(text):
+    try:
+        return float(to_number(str(text)))
+    except (ValueError, OverflowError):
+        return float("nan")
+
+
+def normalize_string(text):
+    text = _clean(text).lower().strip("'\"")
+    match = re.fullmatch(r"\(([a-z])\)", text)
+    if match:
+        text = match.group(1)
+    return re.sub(r"\s+", "", text.replace("^", "**"))
+
+
+def _elements(text):
+    text = _clean(text).strip("[]()")
+    return [part.strip() for part in text.split(",")] if text else []
+
+
+# Apply `function` once per distinct value: stored results repeat the same
+# expected answers (and often the same received ones) many times
+def _map_unique(function, values, dtype=object):
+    codes = {}
+    inverse = np.fromiter((codes.setdefault(value, len(codes)) for value in values),
+                          dtype=np.intp, count=len(values))
+    mapped = np.empty(len(codes), dtype=dtype)
+    mapped[:] = [function(value) for value in codes]
+    return mapped[inverse]
+
+
+def _number(value):
+    try:
+        return float(value)
+    except ValueError:
+        return parse_number(value)
+
+
+def _numbers(values):
+    return _map_unique(_number, values, dtype=np.float64)
+
+
+def _batch_int(received, expected):
+    r, e = _numbers(received), _numbers(expected)
+    correct = np.isfinite(e) & (r == e) & (r == np.round(r))
+    # enteros grandes: comparacion exacta con int de Python
+    for i in np.flatnonzero(np.abs(e) >= _EXACT_LIMIT):
+        try:
+            correct[i] = int(_clean(received[i])) == int(_clean(expected[i]))
+        except ValueError:
+            correct[i] = False
+    return correct
+
+
+def _batch_float(received, expected):
+    r, e = _numbers(received), _numbers(expected)
+    return np.isfinite(r) & np.isclose(r, e, rtol=REL_TOL, atol=ABS_TOL)
+
+
+def _batch_bool(received, expected):
+    r = _map_unique(lambda value: _BOOLS.get(_clean(value).lower(), -1), received, dtype=int)
+    e = _map_unique(lambda value: _BOOLS.get(_clean(value).lower(), -2), expected, dtype=int)
+    return r == e
+
+
+def _batch_string(received, expected):
+    return _map_unique(normalize_string, received) == _map_unique(normalize_string, expected)
+
+
+# Tuples are flattened into one element array plus offsets, compared element
+# by element (numerically, or as strings when not numbers) and reduced per row
+def _batch_tuple(received, expected):
+    r_items = _map_unique(_elements, received)
+    e_items = _map_unique(_elements, expected)
+    lengths = np.array([len(items) for items in e_items])
+    same_length = lengths == np.array([len(items) for items in r_items])
+    rows = np.flatnonzero(same_length & (lengths > 0))
+    correct = same_length & (lengths == 0)
+    if len(rows) == 0:
+        return correct
+
+    r_flat = [item for i in rows for item in r_items[i]]
+    e_flat = [item for i in rows for item in e_items[i]]
+    r, e = _numbers(r_flat), _numbers(e_flat)
+    equal = np.isclose(r, e, rtol=REL_TOL, atol=ABS_TOL)
+    textual = np.flatnonzero(np.isnan(e))
+    if len(textual):
+        equal[textual] = [normalize_string(r_flat[i]) == normalize_string(e_flat[i]) for i in textual]
+    starts = np.concatenate(([0], np.cumsum(lengths[rows])[:-1]))
+    correct[rows] = np.logical_and.reduceat(equal, starts)
+    return correct
+
+
+_BATCH = {
+    "int": _batch_int,
+    "float": _batch_float,
+    "bool": _batch_bool,
+    "string": _batch_string,
+    "tuple": _batch_tuple,
+}
+
+
+# Guess the type of an expected answer when it was not stored
+def infer_type(expected):
+    text = _clean(expected)
+    if text.lower() in ("true", "false"):
+        return "bool"
+    if "," in text and not _THOUSANDS.match(text):
+        return "tuple"
+    value = parse_number(text)
+    if np.isnan(value):
+        return "string"
+    return "int" if re.fullmatch(r"-?\d+", text) else "float"
+
+
+# Lists and dicts (list answers of algs, combinatorics and logic) are not
+# hashable: they are keyed by their JSON text, tagged so "[1]" != [1]
+def _hashable(value):
+    if isinstance(value, (list, tuple, dict)):
+        return (type(value).__name__, json.dumps(value, sort_keys=True, default=str))
+    return value
+
+
+# 1-D object array; np.array would turn equal length lists into a 2-D one
+def _objects(values):
+    array = np.empty(len(values), dtype=object)
+    for i, value in enumerate(values):
+        array[i] = value
+    return array
+
+
+# Integer code of every value plus the distinct values, in one C-level pass
+def _factorize(values):
+    codes = {}
+    raw = np.fromiter(map(codes.setdefault, map(_hashable, values), itertools.count()),
+                      dtype=np.intp, count=len(values))
+    position = np.zeros(len(values), dtype=np.intp)
+    position[list(codes.values())] = np.arange(len(codes))
+    return position[raw], [values[first] for first in codes.values()]
+
+
+# Score whole columns at once. `types` may hold None to infer the type from
+# the expected answer. Each column is factorized, the distinct (received,
+# expected, type) triples are scored per type with NumPy and the verdicts are
+# broadcast back, so repeated answers cost one hash lookup. Returns a
+# boolean array.
+def score_batch(received, expected, types=None):
+    if len(expected) == 0:
+        return np.zeros(0, dtype=bool)
+    if types is None:
+        types = [None] * len(expected)
+    columns = [_factorize(column) for column in (received, expected, types)]
+    combined = np.zeros(len(expected), dtype=np.int64)
+    for codes, distinct in columns:
+        combined = combined * len(distinct) + codes
+    triples, inverse = np.unique(combined, return_inverse=True)
+    # decodificar cada triple distinto en sus tres valores
+    values = []
+    for codes, distinct in reversed(columns):
+        values.append(_objects(distinct)[triples % len(distinct)])
+        triples = triples // len(distinct)
+    types, expected, received = values
+
+    received = np.array(["" if value is None else str(value) for value in received], dtype=object)
+    expected = np.array(["" if value is None else str(value) for value in expected], dtype=object)
+    types = np.array([t if t in _BATCH else None for t in types], dtype=object)
+    unknown = np.flatnonzero(types == None)  # noqa: E711
+    if len(unknown):
+        types[unknown] = _map_unique(infer_type, expected[unknown])
+    correct = np.zeros(len(types), dtype=bool)
+    for kind in _BATCH:
+        rows = np.flatnonzero(types == kind)
+        if len(rows):
+            correct[rows] = _BATCH[kind](received[rows], expected[rows])
+    return correct[inverse]
+
+
+# Scalar versions of the batch rules, for scoring one live answer at a time
+# without building NumPy arrays (score_batch stays the path for columns)
+def _close(r, e):
+    return math.isfinite(e) and abs(r - e) <= ABS_TOL + REL_TOL * abs(e)
+
+
+def _check_int(received, expected):
+    r, e = _number(received), _number(expected)
+    if abs(e) >= _EXACT_LIMIT:
+        try:
+            return int(_clean(received)) == int(_clean(expected))
+        except ValueError:
+            return False
+    return math.isfinite(e) and r == e and r == round(r)
+
+
+def _check_float(received, expected):
+    r = _number(received)
+    return math.isfinite(r) and _close(r, _number(expected))
+
+
+def _check_bool(received, expected):
+    return _BOOLS.get(_clean(received).lower(), -1) == _BOOLS.get(_clean(expected).lower(), -2)
+
+
+def _check_string(received, expected):
+    return normalize_string(received) == normalize_string(expected)
+
+
+def _check_tuple(received, expected):
+    r_items, e_items = _elements(received), _elements(expected)
+    if len(r_items) != len(e_items):
+        return False
+    for r, e in zip(r_items, e_items):
+        e_number = parse_number(e)
+        if math.isnan(e_number):
+            if normalize_string(r) != normalize_string(e):
+                return False
+        elif not _close(parse_number(r), e_number):
+            return False
+    return True
+
+
+_CHECKS = {
+    "int": _check_int,
+    "float": _check_float,
+    "bool": _check_bool,
+    "string": _check_string,
+    "tuple": _check_tuple,
+}
+
+
+def check(received, expected, answer_type=None):
+    received = "" if received is None else str(received)
+    expected = "" if expected is None else str(expected)
+    if answer_type not in _CHECKS:
+        answer_type = infer_type(expected)
+    return bool(_CHECKS[answer_type](received, expected))
@@ -0,0 +1,59 @@
+import hashlib
+import json
+import os
+
+
+# Stable ID of a question: its position plus a short hash of its content, so
+# a resumed run never matches an answer against a different question
+def question_id(idx, question):
+    if not isinstance(question, str):
+        question = json.dumps(question, sort_keys=True, ensure_ascii=False)
+    digest = hashlib.sha1(question.encode("utf8")).hexdigest()[:10]
+    return f"{idx:05d}-{digest}"
+
+
+# Fingerprint of everything that shapes the answer to one question: the
+# question and its options plus the `shared` inputs of the job (system
+# instruction, template, model, generation config...). `shared` is hashed
+# once by job_fingerprint.
+def input_fingerprint(shared, question, options=None):
+    content = json.dumps([question, options], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(f"{shared}\n{content}".encode("utf8")).hexdigest()[:16]
+
+
+def job_fingerprint(*inputs):
+    content = json.dumps(inputs, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(content.encode("utf8")).hexdigest()
+
+
+# Append-only JSONL checkpoint: one {"id": ..., **result} line per finished question
+class Checkpoint:
+    def __init__(self, path):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    # Results already stored, by question ID. Errored entries are skipped so
+    # they are asked again, and a line cut by a crash is ignored.
+    def load(self):
+        done = {}
+        if not os.path.exists(self.path):
+            return done
+        with open(self.path, "r", encoding="utf8") as f:
+            for line in f:
+                try:
+                    result = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if "error" not in result:
+                    done[result["id"]] = result
+        return done
+
+    # Empty the checkpoint before a fresh (non resumed) run
+    def reset(self):
+        open(self.path, "w", encoding="utf8").close()
+
+    def append(self, qid, result):
+        with open(self.path, "a", encoding="utf8") as f:
+            f.write(json.dumps({"id": qid, **result}, ensure_ascii=False, default=str) + "\n")
+            f.flush()
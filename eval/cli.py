@@ -0,0 +1,422 @@
+import argparse
+import json
+import os
+import time
+
+from bench import (CONCURRENCY_LEVELS, DEFAULT_BASELINE, DEFAULT_TOLERANCE, compare,
+                   load_baseline, print_rows, run_benchmarks, save_baseline)
+from engine import DEFAULT_CONCURRENCY
+from runner import list_configs, load_config, run_config
+from sweep import load_sweep, run_sweep
+from warehouse import DEFAULT_WAREHOUSE_PATH
+
+
+def _apply_overrides(config, args):
+    if args.model:
+        config["model"]["name"] = args.model
+    if args.provider:
+        config["model"]["provider"] = args.provider
+    if args.temperature is not None:
+        config["model"]["generation_config"]["temperature"] = args.temperature
+    if getattr(args, "stream", False):
+        config["stream"] = True
+    if getattr(args, "batch_size", None):
+        config["batch_size"] = args.batch_size
+    if getattr(args, "structured", False):
+        config["structured"] = True
+    if getattr(args, "samples", None):
+        config["samples"] = args.samples
+    if getattr(args, "where", None):
+        config["dataset"]["where"] = list(config["dataset"].get("where") or []) + args.where
+    return config
+
+
+def _shard(value):
+    index, count = (int(part) for part in value.split("/"))
+    if not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"shard index must be in [0, {count})")
+    return index, count
+
+
+def _people(value):
+    from knights import MAX_PEOPLE, MIN_PEOPLE
+
+    value = int(value)
+    if not MIN_PEOPLE <= value <= MAX_PEOPLE:
+        raise argparse.ArgumentTypeError(f"people must be in [{MIN_PEOPLE}, {MAX_PEOPLE}]")
+    return value
+
+
+def cmd_list(args):
+    for name in list_configs():
+        print(f"{name:24} {load_config(name).get('description', '')}")
+
+
+def cmd_show(args):
+    for name in args.configs:
+        print(json.dumps(_apply_overrides(load_config(name), args), indent=4, ensure_ascii=False))
+
+
+# Several configs run one after the other in the same process, so provider
+# SDKs are imported and configured only once
+def cmd_run(args):
+    for name in args.configs:
+        config = _apply_overrides(load_config(name), args)
+        run_config(config, concurrency=args.concurrency, checkpoint_dir=args.checkpoint_dir,
+                   resume=args.resume, dry_run=args.dry_run, limit=args.limit,
+                   shard=args.shard, sample=args.sample, metrics_dir=args.metrics_dir,
+                   incremental=args.incremental)
+
+
+# Convert a JSON corpus or parquet file into a memory-mappable Arrow file
+def cmd_convert(args):
+    from columnar import convert
+
+    rows = convert(args.source, args.output, flat=args.flat)
+    print(f"Wrote {rows} rows to {args.output}")
+
+
+# Run the code_output programs locally and check (or fix) their answers
+def cmd_verify_code(args):
+    from executor import ExecutionCache, verify_dataset
+
+    cache = None if args.no_cache else ExecutionCache()
+    for path in args.paths:
+        report = verify_dataset(path, fix=args.fix, workers=args.workers, timeout=args.timeout,
+                                memory_mb=args.memory_mb, cache=cache)
+        print(f"{path}: {report['ok']}/{report['checked']} answers verified, "
+              f"{len(report['mismatch'])} wrong, {len(report['errors'])} errors"
+              + (f", {report['fixed']} fixed" if "fixed" in report else ""))
+        for item in report["mismatch"]:
+            print(f"  {item['id']}: stored {item['expected']}, actual {item['actual']}")
+        for item in report["errors"]:
+            print(f"  {item['id']}: {item['error']}")
+
+
+# Re-score stored checkpoints or warehouse runs with the current parser and
+# the scorer of their config (no model calls either way)
+def cmd_rescore(args):
+    from checkpoint import Checkpoint
+    from rescore import rescore_checkpoint
+
+    if not args.checkpoints and not args.run:
+        raise SystemExit("rescore needs checkpoint files or --run")
+    for path in args.checkpoints:
+        # checkpoints/<config>.jsonl; sweep jobs need --config
+        name = args.config or os.path.splitext(os.path.basename(path))[0]
+        try:
+            config = load_config(name)
+        except FileNotFoundError:
+            raise SystemExit(f"{path}: no config named {name!r}, pass it with --config")
+        config["structured"] = config["structured"] or args.structured
+        checkpoint = Checkpoint(path)
+        results, before, after = rescore_checkpoint(checkpoint, config)
+        print(f"{path}: {before} -> {after} correct of {len(results)}")
+        if args.write:
+            checkpoint.reset()
+            for result in results:
+                checkpoint.append(result.pop("id"), result)
+    if args.run:
+        from rescore import rescore_run
+        from warehouse import Warehouse
+
+        warehouse = Warehouse(args.warehouse)
+        try:
+            for run_id in args.run:
+                start = time.perf_counter()
+                new_run, before, after, total = rescore_run(warehouse, run_id, workers=args.workers)
+                print(f"run {run_id}: {before} -> {after} correct of {total}, stored as run "
+                      f"{new_run} ({time.perf_counter() - start:.1f}s)")
+        finally:
+            warehouse.close()
+
+
+# Generate synthetic code_output programs with their answers
+def cmd_generate(args):
+    from generator import write_generated
+
+    paths = write_generated(
+        args.output, args.programs, file_format=args.format, shard_size=args.shard_size,
+        inputs_per_program=args.inputs, seed=args.seed, loops=tuple(args.loops),
+        statements=tuple(args.statements), op_weights=args.op_weights)
+    print(f"Wrote {args.programs * args.inputs} triples to {len(paths)} files in {args.output}")
+
+
+# Solve the logic puzzles locally and check their stored answers
+def cmd_verify_logic(args):
+    from knights import verify_dataset
+
+    for path in args.paths:
+        report = verify_dataset(path)
+        print(f"{path}: {report['ok']}/{report['checked']} answers verified, "
+              f"{len(report['mismatch'])} wrong, {len(report['unsupported'])} unsupported")
+        for item in report["mismatch"]:
+            print(f"  {item['id']}: stored {item['expected']}, solver {item['actual']} "
+                  f"({item['solutions']} consistent assignments)")
+            if item["actual"] is None and item["solution"] is not None:
+                print(f"    no option matches {item['solution']}")
+        for item in report["unsupported"]:
+            print(f"  {item['id']}: {item['error']}")
+
+
+# Derive the ruletaker labels locally and compare them per depth
+def cmd_verify_rules(args):
+    from rules import annotate, verify_dataset
+
+    for path in args.paths:
+        report = verify_dataset(path, where=args.where)
+        print(f"{path}: {report['ok']}/{report['checked']} labels agree with forward chaining")
+        for depth, stats in sorted(report["by_depth"].items()):
+            print(f"  depth {depth}: {stats['ok']}/{stats['rows']}")
+        print("  proof depths of entailed statements: "
+              + ", ".join(f"{d}: {n}" for d, n in sorted(report["proof_depths"].items())))
+        for row in report["mismatch"]:
+            print(f"  {row['id']}: stored {row['flag']}, derived {row['entailed']} "
+                  f"(proof depth {row['proof_depth']})")
+        if args.annotate:
+            output = os.path.join(args.annotate, os.path.basename(path))
+            annotate(path, output)
+            print(f"  wrote {output}")
+
+
+# Generate knights-and-knaves puzzles with a unique solution
+def cmd_generate_logic(args):
+    from knights import write_puzzles
+
+    if args.people[0] > args.people[1]:
+        raise SystemExit(f"--people MIN must not exceed MAX, got {args.people}")
+    count = write_puzzles(args.output, args.count, people=tuple(args.people), seed=args.seed)
+    print(f"Wrote {count} puzzles to {args.output}")
+
+
+# Benchmark the harness offline and compare it with the stored baseline
+def cmd_bench(args):
+    rows = run_benchmarks(corpora=args.corpus, levels=args.levels, repeat=args.repeat,
+                          questions=args.questions, latency=args.latency,
+                          error_rate=args.error_rate)
+    print_rows(rows)
+    if args.save_baseline:
+        save_baseline(rows, args.baseline)
+        print(f"Baseline saved to {args.baseline}")
+        return
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print(f"No baseline at {args.baseline} (store one with --save-baseline)")
+        return
+    regressions = compare(rows, baseline, tolerance=args.tolerance)
+    for bench, metric, before, now in regressions:
+        print(f"REGRESSION {bench}: {metric} {before:.1f} -> {now:.1f}")
+    if regressions:
+        raise SystemExit(1)
+    print(f"No regressions against the baseline of {baseline['created']}")
+
+
+# Query the results warehouse: runs, accuracy grouped by run columns,
+# the questions two runs answered differently, or any SQL
+def cmd_results(args):
+    from warehouse import Warehouse, print_table
+
+    warehouse = Warehouse(args.warehouse)
+    try:
+        if args.action == "runs":
+            table = warehouse.runs(name=args.name)
+        elif args.action == "accuracy":
+            where = [tuple(condition.split("=", 1)) for condition in args.where or []]
+            table = warehouse.accuracy(by=args.by.split(","), where=where)
+        elif args.action == "diff":
+            if len(args.args) != 2:
+                raise SystemExit("diff needs two run ids")
+            table = warehouse.diff(int(args.args[0]), int(args.args[1]))
+        else:
+            table = warehouse.query(" ".join(args.args))
+        print_table(*table)
+    finally:
+        warehouse.close()
+
+
+# Expand a sweep matrix and run all its jobs on a shared worker pool
+def cmd_sweep(args):
+    run_sweep(load_sweep(args.sweep), concurrency=args.concurrency,
+              checkpoint_dir=args.checkpoint_dir, resume=args.resume,
+              dry_run=args.dry_run, limit=args.limit, shard=args.shard,
+              sample=args.sample, output=args.output, metrics_dir=args.metrics_dir,
+              incremental=args.incremental)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m eval", description="Evaluate models on the reasoning datasets")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = subparsers.add_parser("list", help="list the available configs")
+    list_parser.set_defaults(func=cmd_list)
+
+    overrides = argparse.ArgumentParser(add_help=False)
+    overrides.add_argument("configs", nargs="+",
+                           help="config names (configs/<name>.json) or paths")
+    overrides.add_argument("--model", help="override the model name")
+    overrides.add_argument("--provider", help="override the model provider")
+    overrides.add_argument("--temperature", type=float, help="override the temperature")
+    overrides.add_argument("--stream", action="store_true",
+                           help="stream responses and stop once the answer tag closes")
+    overrides.add_argument("--batch-size", type=int, metavar="K",
+                           help="pack K questions into each request")
+    overrides.add_argument("--structured", action="store_true",
+                           help="JSON output following the config schema instead of <answer> tags")
+    overrides.add_argument("--samples", type=int, metavar="N",
+                           help="self-consistency: up to N samples per question, majority vote")
+    overrides.add_argument("--where", action="append", metavar="PREDICATE",
+                           help="row filter for parquet/Arrow datasets, e.g. depth=3 (repeatable)")
+
+    show_parser = subparsers.add_parser("show", parents=[overrides],
+                                        help="print the resolved configs")
+    show_parser.set_defaults(func=cmd_show)
+
+    execution = argparse.ArgumentParser(add_help=False)
+    execution.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                           help="requests in flight at the same time")
+    execution.add_argument("--checkpoint-dir", default="checkpoints",
+                           help="directory of the JSONL checkpoints (one per config)")
+    execution.add_argument("--metrics-dir", default="metrics",
+                           help="directory of the metrics exports (JSONL and Prometheus text)")
+    execution.add_argument("--resume", action="store_true",
+                           help="skip questions already answered in the checkpoint")
+    execution.add_argument("--incremental", action="store_true",
+                           help="only ask questions whose inputs (question, options, template, "
+                                "system instruction, model, generation config) changed since the checkpoint")
+    execution.add_argument("--dry-run", action="store_true",
+                           help="load data and build prompts without calling the model")
+    execution.add_argument("--limit", type=int, help="only evaluate the first N items")
+    execution.add_argument("--shard", type=_shard, metavar="I/N",
+                           help="only evaluate shard I of N (0-based)")
+    execution.add_argument("--sample", type=int, metavar="N",
+                           help="evaluate a fixed random sample of N items")
+
+    run_parser = subparsers.add_parser("run", parents=[overrides, execution],
+                                       help="run evaluations")
+    run_parser.set_defaults(func=cmd_run)
+
+    sweep_parser = subparsers.add_parser("sweep", parents=[execution],
+                                         help="run a config matrix under one rate budget")
+    sweep_parser.add_argument("sweep", help="sweep name (sweeps/<name>.json) or path")
+    sweep_parser.add_argument("--output", help="CSV results table (default results/<sweep>.csv)")
+    sweep_parser.set_defaults(func=cmd_sweep)
+
+    convert_parser = subparsers.add_parser(
+        "convert", help="convert a dataset into a memory-mappable Arrow file")
+    convert_parser.add_argument("source", help="dataset directory, JSON array or parquet file")
+    convert_parser.add_argument("output", help="output .arrow file")
+    convert_parser.add_argument("--flat", action="store_true",
+                                help="one row per question instead of one per file")
+    convert_parser.set_defaults(func=cmd_convert)
+
+    verify_parser = subparsers.add_parser(
+        "verify-code", help="execute code_output programs locally and check their answers")
+    verify_parser.add_argument("paths", nargs="*", default=["dataset/code_output", "dataset/code_output/train"],
+                               help="code_output directories")
+    verify_parser.add_argument("--fix", action="store_true", help="rewrite wrong answers in place")
+    verify_parser.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    verify_parser.add_argument("--timeout", type=float, default=2.0, help="seconds per execution")
+    verify_parser.add_argument("--memory-mb", type=int, default=256, help="memory limit per worker")
+    verify_parser.add_argument("--no-cache", action="store_true",
+                               help="do not reuse executions cached by function hash")
+    verify_parser.set_defaults(func=cmd_verify_code)
+
+    rescore_parser = subparsers.add_parser(
+        "rescore", help="re-score checkpoints or stored runs without calling the model")
+    rescore_parser.add_argument("checkpoints", nargs="*", help="checkpoint JSONL files")
+    rescore_parser.add_argument("--config", help="config whose scorer grades the checkpoints "
+                                                 "(default: the checkpoint file name)")
+    rescore_parser.add_argument("--structured", action="store_true",
+                                help="the checkpoints were answered in structured output mode")
+    rescore_parser.add_argument("--run", type=int, action="append",
+                                help="warehouse run id to replay through the current scorer (repeatable)")
+    rescore_parser.add_argument("--warehouse", default=os.environ.get(
+        "EVAL_WAREHOUSE", DEFAULT_WAREHOUSE_PATH), help="warehouse SQLite file")
+    rescore_parser.add_argument("--workers", type=int, help="scoring processes (default: CPUs)")
+    rescore_parser.add_argument("--write", action="store_true",
+                                help="store the new scores in the checkpoints")
+    rescore_parser.set_defaults(func=cmd_rescore)
+
+    generate_parser = subparsers.add_parser(
+        "generate", help="generate synthetic code_output programs and answers")
+    generate_parser.add_argument("output", help="output directory")
+    generate_parser.add_argument("--programs", type=int, default=1000, help="number of programs")
+    generate_parser.add_argument("--inputs", type=int, default=3, help="inputs per program")
+    generate_parser.add_argument("--loops", type=int, nargs=2, default=[3, 10], metavar=("MIN", "MAX"),
+                                 help="range() bound of the loop")
+    generate_parser.add_argument("--statements", type=int, nargs=2, default=[5, 15],
+                                 metavar=("MIN", "MAX"), help="statements in the loop body")
+    generate_parser.add_argument("--op-weights", type=float, nargs=2, default=[1, 1],
+                                 metavar=("ADD", "SUB"), help="relative weight of + and -")
+    generate_parser.add_argument("--format", choices=["jsonl", "parquet", "json"], default="jsonl",
+                                 help="JSONL/parquet shards, or algN.json files like dataset/code_output")
+    generate_parser.add_argument("--shard-size", type=int, default=100_000, help="rows per shard")
+    generate_parser.add_argument("--seed", type=int, default=0)
+    generate_parser.set_defaults(func=cmd_generate)
+
+    verify_logic_parser = subparsers.add_parser(
+        "verify-logic", help="solve the logic puzzles locally and check their answers")
+    verify_logic_parser.add_argument("paths", nargs="*", default=["dataset/logic"],
+                                     help="logic directories")
+    verify_logic_parser.set_defaults(func=cmd_verify_logic)
+
+    verify_rules_parser = subparsers.add_parser(
+        "verify-rules", help="derive ruletaker labels with forward chaining and compare them")
+    verify_rules_parser.add_argument(
+        "paths", nargs="*", help="ruletaker parquet files",
+        default=[f"ruletaker_subset/{name}.parquet" for name in ("train", "test", "test_ood")])
+    verify_rules_parser.add_argument("--where", action="append", metavar="PREDICATE",
+                                     help="row filter, e.g. depth=3 (repeatable)")
+    verify_rules_parser.add_argument("--annotate", metavar="DIR",
+                                     help="write copies with entailed/proof_depth columns to DIR")
+    verify_rules_parser.set_defaults(func=cmd_verify_rules)
+
+    generate_logic_parser = subparsers.add_parser(
+        "generate-logic", help="generate knights-and-knaves puzzles with a unique solution")
+    generate_logic_parser.add_argument("output", help="output directory")
+    generate_logic_parser.add_argument("--count", type=int, default=100, help="number of puzzles")
+    generate_logic_parser.add_argument("--people", type=_people, nargs=2, default=[3, 9],
+                                       metavar=("MIN", "MAX"), help="inhabitants per puzzle")
+    generate_logic_parser.add_argument("--seed", type=int, default=0)
+    generate_logic_parser.set_defaults(func=cmd_generate_logic)
+
+    bench_parser = subparsers.add_parser(
+        "bench", help="benchmark loading, prompting, scoring and the eval loop offline")
+    bench_parser.add_argument("--corpus", action="append",
+                              help="only benchmark this corpus (repeatable, see bench.CORPORA)")
+    bench_parser.add_argument("--levels", type=int, nargs="+", default=list(CONCURRENCY_LEVELS),
+                              help="concurrency levels of the eval loop benchmark")
+    bench_parser.add_argument("--questions", type=int, default=256,
+                              help="questions per eval loop run")
+    bench_parser.add_argument("--latency", type=float, default=0.01,
+                              help="mean mock model latency in seconds")
+    bench_parser.add_argument("--error-rate", type=float, default=0.0,
+                              help="share of mock calls that fail")
+    bench_parser.add_argument("--repeat", type=int, default=5, help="runs per stage (best is kept)")
+    bench_parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON file")
+    bench_parser.add_argument("--save-baseline", action="store_true",
+                              help="store this run as the new baseline")
+    bench_parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                              help="relative slowdown flagged as a regression")
+    bench_parser.set_defaults(func=cmd_bench)
+
+    results_parser = subparsers.add_parser(
+        "results", help="query the warehouse of stored runs")
+    results_parser.add_argument("action", choices=["runs", "accuracy", "diff", "sql"])
+    results_parser.add_argument("args", nargs="*",
+                                help="two run ids for diff, the query for sql")
+    results_parser.add_argument("--warehouse", default=os.environ.get(
+        "EVAL_WAREHOUSE", DEFAULT_WAREHOUSE_PATH), help="warehouse SQLite file")
+    results_parser.add_argument("--name", help="only runs of this config or sweep job (runs)")
+    results_parser.add_argument("--by", default="run_id,name",
+                                help="comma separated run columns to group by (accuracy)")
+    results_parser.add_argument("--where", action="append", metavar="COLUMN=VALUE",
+                                help="filter on a run column (accuracy, repeatable)")
+    results_parser.set_defaults(func=cmd_results)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
@@ -0,0 +1,192 @@
+import json
+import operator
+import os
+import re
+
+# Backend columnar (Arrow). pyarrow solo se importa al usar parquet/arrow.
+
+COLUMNAR_SUFFIXES = (".parquet", ".arrow", ".feather")
+
+_OPERATORS = {
+    "=": operator.eq, "==": operator.eq, "!=": operator.ne,
+    "<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge,
+}
+_PREDICATE = re.compile(r"^\s*(\w+)\s*(==|!=|<=|>=|=|<|>)\s*(.+?)\s*$")
+
+
+def is_columnar(path):
+    return path.endswith(COLUMNAR_SUFFIXES)
+
+
+def _literal(text):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+# Parse predicates like "depth=3", "depth>=2", "flag=True" into one Arrow
+# filter expression (all of them must hold). Values are compared in the
+# column's own type, so "flag=True" matches the string column "True".
+def parse_where(predicates, schema):
+    import pyarrow.compute as pc
+
+    expression = None
+    used = []
+    for predicate in predicates or []:
+        match = _PREDICATE.match(predicate)
+        if match is None:
+            raise ValueError(f"Invalid predicate {predicate!r}, expected <column><op><value>")
+        column, op, value = match.groups()
+        if column not in schema.names:
+            raise ValueError(f"Unknown column {column!r}, expected one of {schema.names}")
+        value = _literal(value) if not _is_string(schema.field(column).type) else value
+        term = _OPERATORS[op](pc.field(column), value)
+        expression = term if expression is None else expression & term
+        used.append(column)
+    return expression, used
+
+
+def _is_string(arrow_type):
+    import pyarrow as pa
+
+    return pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type)
+
+
+# Open a parquet or Arrow IPC file as a dataset. Arrow files are memory mapped
+# so reads are zero-copy; parquet reads decode only the projected columns and
+# skip row groups whose statistics cannot match the filter.
+def open_dataset(path):
+    import pyarrow.dataset as ds
+    from pyarrow import fs
+
+    file_format = "parquet" if path.endswith(".parquet") else "ipc"
+    return ds.dataset(path, format=file_format, filesystem=fs.LocalFileSystem(use_mmap=True))
+
+
+# Read `columns` of the rows matching `where`. Returns the table and the
+# original row number of each row, which is what makes IDs stable for files
+# without an "id" column. Files with one (converted corpora) get the filter
+# pushed down into the scan; for the others see _scan_rows.
+def scan(path, columns=None, where=None):
+    dataset = open_dataset(path)
+    columns = columns or dataset.schema.names
+    expression, used = parse_where(where, dataset.schema)
+    if "id" in dataset.schema.names:
+        return dataset.to_table(columns=columns, filter=expression), None
+    if expression is None:
+        table = dataset.to_table(columns=columns)
+        return table, list(range(table.num_rows))
+    return _scan_rows(dataset, columns, expression, used)
+
+
+# Parts of a fragment with the row number they start at: parquet row groups
+# whose statistics cannot match `expression` are skipped without reading them
+def _parts(fragment, expression):
+    if not hasattr(fragment, "split_by_row_group"):
+        yield fragment, 0
+        return
+    metadata = fragment.metadata
+    starts = [0]
+    for group in range(metadata.num_row_groups - 1):
+        starts.append(starts[-1] + metadata.row_group(group).num_rows)
+    for part in fragment.split_by_row_group(filter=expression):
+        yield part, starts[part.row_groups[0].id]
+
+
+# Filter without an "id" column: the predicate is evaluated on a narrow scan
+# of only the predicate columns (row group by row group), and just the
+# matching rows of the projected columns are read with take()
+def _scan_rows(dataset, columns, expression, used):
+    import pyarrow as pa
+
+    tables = []
+    rows = []
+    offset = 0
+    for fragment in dataset.get_fragments():
+        for part, start in _parts(fragment, expression):
+            narrow = part.to_table(columns=used)
+            narrow = narrow.append_column("__row", pa.array(range(narrow.num_rows), type=pa.int64()))
+            local = narrow.filter(expression).column("__row")
+            if len(local):
+                tables.append(part.take(local, columns=columns))
+                rows.extend(offset + start + row for row in local.to_pylist())
+        offset += fragment.count_rows()
+    if not tables:
+        return dataset.schema.empty_table().select(columns), []
+    return pa.concat_tables(tables), rows
+
+
+# Columns holding question, answer, options and type, whichever layout the
+# file uses (converted corpora vs. ruletaker)
+def record_columns(path):
+    schema = open_dataset(path).schema
+    if "question" in schema.names:
+        names = ("id", "question", "answer", "options", "type")
+    else:
+        names = ("id", "context", "statement", "flag")
+    return [name for name in names if name in schema.names]
+
+
+# Converted corpora store JSON text; other files (e.g. generated shards)
+# keep plain strings, which are returned as they are
+def _decode(value):
+    if not isinstance(value, str):
+        return value
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+# Build a Record from one row of a scanned table
+def row_record(table, row, record_id, record_type):
+    from data import Record
+
+    values = {name: table.column(name)[row].as_py() for name in table.column_names}
+    if "question" in values:
+        return Record(values.get("id", record_id), _decode(values["question"]),
+                      _decode(values["answer"]), _decode(values.get("options")),
+                      values.get("type", record_type))
+    return Record(record_id, f"{values['context']}\n\nStatement: {values['statement']}",
+                  values["flag"], None, record_type)
+
+
+def _corpus_table(source, flat):
+    import pyarrow as pa
+    from data import Dataset
+
+    columns = {"id": [], "question": [], "answer": [], "options": [], "type": []}
+    for record in Dataset(source, flat=flat):
+        columns["id"].append(record.id)
+        columns["question"].append(json.dumps(record.question, ensure_ascii=False))
+        columns["answer"].append(json.dumps(record.answer, ensure_ascii=False))
+        columns["options"].append(
+            json.dumps(record.options, ensure_ascii=False) if record.options is not None else None)
+        columns["type"].append(record.type)
+    return pa.table({name: pa.array(values, type=pa.string()) for name, values in columns.items()})
+
+
+# Convert a corpus into an Arrow IPC file that is later memory mapped.
+# JSON corpora (directory of files or math-style array) keep question, answer
+# and options as JSON text so grouped items and option dicts survive the
+# round trip; parquet files keep all their columns plus a stable "id".
+def convert(source, output, flat=False):
+    import pyarrow as pa
+    from data import resolve_path
+
+    source = resolve_path(source)
+    if is_columnar(source):
+        table = open_dataset(source).to_table()
+        stem = os.path.splitext(os.path.basename(source))[0]
+        table = table.append_column(
+            "id", pa.array([f"{stem}:{row}" for row in range(table.num_rows)], type=pa.string()))
+    else:
+        table = _corpus_table(source, flat)
+
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    with pa.OSFile(output, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    return table.num_rows
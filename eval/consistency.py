@@ -0,0 +1,83 @@
+import asyncio
+import json
+import math
+from collections import Counter
+
+# Self-consistency: varias muestras por pregunta y voto por mayoria. Las
+# muestras se lanzan en paralelo y se deja de muestrear en cuanto la
+# respuesta en cabeza ya no puede (o muy probablemente no va a) perder.
+
+DEFAULT_CONFIDENCE = 0.95
+# Muestras en vuelo a la vez para una misma pregunta
+DEFAULT_PARALLEL = 3
+
+
+# Probability that the leading answer is more likely than the runner-up
+# given their vote counts: P(Beta(lead + 1, second + 1) > 1/2) under a
+# uniform prior, which for integer counts is a binomial tail
+def leader_probability(lead, second):
+    n = lead + second + 1
+    tail = sum(math.comb(n, k) for k in range(lead + 1, n + 1))
+    return 1 - tail / 2 ** n
+
+
+# True when sampling can stop: the leader cannot be caught with the samples
+# left, or the sequential test is confident enough that it will stay ahead
+def decided(counts, remaining, confidence=DEFAULT_CONFIDENCE):
+    ranked = [count for _, count in counts.most_common(2)] + [0, 0]
+    lead, second = ranked[0], ranked[1]
+    if lead == 0:
+        return remaining == 0
+    return lead - second > remaining or leader_probability(lead, second) >= confidence
+
+
+def _vote_key(result):
+    if "parse_error" in result:
+        return None
+    return json.dumps(result["received"], sort_keys=True, default=str)
+
+
+# Draw up to `max_samples` responses with `sample(i)` (a coroutine), score
+# each with `score(response_text)` and return the scored result of the
+# majority answer, with "votes" ([answer, count] pairs, most voted first) and
+# "samples" (responses drawn). Unparsable responses and failed samples do not
+# vote; if no sample succeeds the last error is raised.
+async def vote(sample, score, max_samples, parallel=DEFAULT_PARALLEL, confidence=DEFAULT_CONFIDENCE):
+    counts = Counter()
+    winners = {}
+    last_result = None
+    error = None
+    drawn = launched = 0
+    pending = set()
+    try:
+        while True:
+            while len(pending) < parallel and launched < max_samples:
+                pending.add(asyncio.ensure_future(sample(launched)))
+                launched += 1
+            if not pending:
+                break
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                drawn += 1
+                try:
+                    result = score(task.result())
+                except Exception as e:
+                    error = e
+                    continue
+                last_result = result
+                key = _vote_key(result)
+                if key is not None:
+                    counts[key] += 1
+                    winners.setdefault(key, result)
+            if decided(counts, max_samples - drawn, confidence):
+                break
+    finally:
+        # las muestras que siguen en vuelo ya no pueden cambiar el resultado
+        for task in pending:
+            task.cancel()
+
+    if last_result is None:
+        raise error
+    votes = counts.most_common()
+    result = winners[votes[0][0]] if votes else last_result
+    return {**result, "votes": [[json.loads(key), count] for key, count in votes], "samples": drawn}
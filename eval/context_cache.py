@@ -0,0 +1,179 @@
+import asyncio
+import datetime
+import time
+
+from ratelimit import estimate_tokens
+
+# Cache de prefijos en el proveedor: la system instruction compartida (el
+# ejemplo resuelto de logic_one_shot, el tutorial de scratchpad) se registra
+# una vez y cada peticion solo la referencia. Se renueva antes de caducar y
+# se borra al terminar el job.
+
+DEFAULT_TTL = 3600
+# Smallest prefix (in tokens) each provider accepts in an explicit cache;
+# "min_tokens" in the context_cache options overrides it
+MIN_TOKENS = {"gemini": 4096, "mock": 0}
+# Renovar cuando quede menos de esta fraccion del TTL
+REFRESH_MARGIN = 0.2
+
+
+# Explicit caching with google.generativeai (CachedContent). Models built
+# from a cached content carry the prefix server side.
+class GeminiPrefixBackend:
+    def __init__(self, model_config, system_instruction):
+        self.model_config = model_config
+        self.system_instruction = system_instruction
+
+    def create(self, ttl):
+        import google.generativeai as genai
+        from google.generativeai import caching
+        from providers import gemini_generation_config
+
+        handle = caching.CachedContent.create(
+            model=self.model_config["name"], system_instruction=self.system_instruction,
+            ttl=datetime.timedelta(seconds=ttl))
+        # con la configuracion de providers: en modo structured lleva el esquema JSON
+        model = genai.GenerativeModel.from_cached_content(
+            cached_content=handle, generation_config=gemini_generation_config(self.model_config))
+        return handle, model
+
+    def refresh(self, handle, ttl):
+        handle.update(ttl=datetime.timedelta(seconds=ttl))
+
+    def delete(self, handle):
+        handle.delete()
+
+
+# Emulation with the local mock backend (see providers.MockModel), to
+# measure the token and latency savings offline
+class MockPrefixBackend:
+    def __init__(self, model):
+        self.model = model
+
+    def create(self, ttl):
+        return self.model.create_cached_content(ttl), self.model
+
+    def refresh(self, handle, ttl):
+        self.model.refresh_cached_content(handle, ttl)
+
+    def delete(self, handle):
+        self.model.delete_cached_content(handle)
+
+
+# True if the exception says the cached content no longer exists
+def is_not_found_error(exc):
+    if getattr(exc, "code", None) == 404 or getattr(exc, "status_code", None) == 404:
+        return True
+    if type(exc).__name__ in ("NotFound", "NotFoundError"):
+        return True
+    message = str(exc).lower()
+    return any(hint in message for hint in ("404", "not found", "expired"))
+
+
+# Model whose system instruction lives in a provider-side cache. It keeps
+# the fields of the plain model (model_name, generation_config,
+# system_instruction), so response cache keys do not change. The SDK calls
+# block, so create/refresh/delete run in a thread instead of stalling every
+# request on the loop. The handle is created on the first request and created
+# again when it expired (e.g. after a long rate limit stall) or the provider
+# no longer finds it; if the provider refuses it, the plain model is used.
+class ContextCachedModel:
+    KEY_FIELDS = ("model_name", "_generation_config", "generation_config",
+                  "_system_instruction", "system_instruction")
+
+    def __init__(self, backend, model, ttl=DEFAULT_TTL):
+        self.backend = backend
+        for field in self.KEY_FIELDS:
+            if hasattr(model, field):
+                setattr(self, field, getattr(model, field))
+        self.ttl = ttl
+        self.refreshes = 0
+        self.creations = 0
+        self._plain = model
+        self._handle = None
+        self._model = None
+        self._expires = 0.0
+        self._lock = None
+
+    def _fresh(self):
+        return self._model is not None and (
+            self._handle is None or time.time() < self._expires - self.ttl * REFRESH_MARGIN)
+
+    async def _create(self):
+        try:
+            self._handle, self._model = await asyncio.to_thread(self.backend.create, self.ttl)
+        except Exception as e:
+            print(f"Context cache not available ({e}); sending the system instruction with every request")
+            self._handle, self._model = None, self._plain
+            return
+        self._expires = time.time() + self.ttl
+        self.creations += 1
+
+    async def _keep_fresh(self):
+        if self._fresh():
+            return
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._fresh():
+                return  # otra peticion ya la renovo
+            if self._model is None or time.time() >= self._expires:
+                await self._create()
+                return
+            try:
+                await asyncio.to_thread(self.backend.refresh, self._handle, self.ttl)
+            except Exception as e:
+                if not is_not_found_error(e):
+                    raise
+                await self._create()
+                return
+            self._expires = time.time() + self.ttl
+            self.refreshes += 1
+
+    async def _generate(self, prompt, stream):
+        if stream:
+            return await self._model.generate_content_async(prompt, stream=True)
+        return await self._model.generate_content_async(prompt)
+
+    async def generate_content_async(self, prompt, stream=False):
+        await self._keep_fresh()
+        handle = self._handle
+        try:
+            return await self._generate(prompt, stream)
+        except Exception as e:
+            if handle is None or not is_not_found_error(e):
+                raise
+        # la cache desaparecio en el proveedor: se crea de nuevo una sola vez
+        if self._handle is handle:
+            self._model = None
+        await self._keep_fresh()
+        return await self._generate(prompt, stream)
+
+    async def aclose(self):
+        if self._handle is not None:
+            handle, self._handle = self._handle, None
+            await asyncio.to_thread(self.backend.delete, handle)
+
+
+# Wrap `model` so its system instruction is cached on the provider. Returns
+# the plain model when the provider has no explicit cache (OpenAI caches
+# long prefixes on its own), when the prefix is below the provider's minimum
+# cacheable size (checked locally, without calling create) or when the
+# provider refuses it.
+def cache_prefix(model, model_config, system_instruction, options):
+    if not system_instruction:
+        return model
+    provider = model_config.get("provider", "gemini")
+    tokens = estimate_tokens(system_instruction)
+    min_tokens = options.get("min_tokens", MIN_TOKENS.get(provider, 0))
+    if tokens < min_tokens:
+        print(f"Context cache skipped: the system instruction has about {tokens} tokens, "
+              f"{provider} caches at least {min_tokens}")
+        return model
+    if provider == "gemini":
+        backend = GeminiPrefixBackend(model_config, system_instruction)
+    elif provider == "mock":
+        backend = MockPrefixBackend(model)
+    else:
+        return model
+    return ContextCachedModel(backend, model, ttl=options.get("ttl", DEFAULT_TTL))
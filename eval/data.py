@@ -0,0 +1,269 @@
+import copy
+import json
+import os
+import random
+from dataclasses import dataclass
+from functools import lru_cache
+
+import columnar
+
+# Raiz del repositorio: las rutas relativas de los configs se resuelven aqui
+# si no existen desde el directorio actual
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+INDEX_VERSION = 1
+
+
+def resolve_path(path):
+    if os.path.isabs(path) or os.path.exists(path):
+        return path
+    return os.path.join(REPO_ROOT, path)
+
+
+# One evaluation item. `id` is stable across runs: "<file stem>:<position>"
+# (or just "<file stem>" when the whole file is one grouped item).
+@dataclass(frozen=True)
+class Record:
+    id: str
+    question: object
+    answer: object
+    options: object = None
+    type: str = None
+
+
+# One line of the index: where a record lives and what it is, without its content
+@dataclass(frozen=True)
+class IndexEntry:
+    id: str
+    file: str
+    offset: int
+    length: int
+    type: str
+
+
+def _numeric_key(file_name):
+    # Ordenar archivos numéricamente (alg2 antes que alg10)
+    return int(''.join(filter(str.isdigit, file_name)) or 0), file_name
+
+
+def _answer_type(answer):
+    if isinstance(answer, list):
+        return "list"
+    return type(answer).__name__
+
+
+def _signature(paths):
+    return {os.path.basename(p): [os.stat(p).st_size, os.stat(p).st_mtime_ns] for p in paths}
+
+
+@lru_cache(maxsize=64)
+def _read_json(path, mtime_ns):
+    with open(path, 'r', encoding='utf8') as f:
+        return json.load(f)
+
+
+# Directory of {"questions", "answers", ["options"]} files (code_output, discrete, logic)
+def _index_directory(dir_path, files, flat):
+    entries = []
+    for file_name in files:
+        file_path = os.path.join(dir_path, file_name)
+        data = _read_json(file_path, os.stat(file_path).st_mtime_ns)
+        stem = os.path.splitext(file_name)[0]
+        kind = "option" if "options" in data else _answer_type(data['answers'])
+        # En logic `questions` es un solo enunciado con una unica respuesta
+        if isinstance(data['questions'], list):
+            assert len(data['questions']) == len(data['answers']), f"Mismatch in {file_path}"
+            if flat:
+                kind = _answer_type(data['answers'][0]) if data['answers'] else kind
+                entries.extend(IndexEntry(f"{stem}:{pos}", file_name, pos, 1, kind)
+                               for pos in range(len(data['questions'])))
+                continue
+        entries.append(IndexEntry(stem, file_name, -1, 0, kind))
+    return entries
+
+
+# JSON array of {"q", "a", "t"} (math): byte offset and length of every element
+def _index_json_array(file_path):
+    with open(file_path, 'rb') as f:
+        raw = f.read()
+    text = raw.decode('utf8')
+    decoder = json.JSONDecoder()
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    entries = []
+    pos = text.index('[') + 1
+    byte_pos = len(text[:pos].encode('utf8'))
+    while True:
+        while text[pos] in ' \t\r\n,':
+            byte_pos += 1
+            pos += 1
+        if text[pos] == ']':
+            break
+        item, end = decoder.raw_decode(text, pos)
+        length = len(text[pos:end].encode('utf8'))
+        entries.append(IndexEntry(f"{stem}:{len(entries)}", os.path.basename(file_path),
+                                  byte_pos, length, item.get('t')))
+        byte_pos += length
+        pos = end
+    return entries
+
+
+# JSONL file, one record per line (generator.py shards): byte offset and length of every line
+def _index_jsonl(file_path):
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    entries = []
+    offset = 0
+    with open(file_path, 'rb') as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                entries.append(IndexEntry(item.get('id', f"{stem}:{len(entries)}"),
+                                          os.path.basename(file_path), offset, len(line),
+                                          item.get('type') or _answer_type(item['answer'])))
+            offset += len(line)
+    return entries
+
+
+# Lazy, indexed view over a dataset. `path` is a directory of JSON files
+# (code_output, discrete, logic), a JSON list of {"q", "a", "t"} records
+# (math), a JSONL file of {"id", "question", "answer", ["options"], ["type"]}
+# rows (generator shards) or a parquet/Arrow file. With flat=False every file
+# of a directory is one item (its whole `questions` list goes in one prompt);
+# with flat=True every question is its own item. The index (file, offset, id,
+# type) is built once and cached next to the data and records are read only
+# when used, so slicing, sharding and sampling never load the whole corpus.
+# Parquet and Arrow files go through the columnar backend instead: only the
+# record columns are read (memory mapped for Arrow) and `where` predicates
+# such as ["depth=3"] select rows before any Python object is built.
+class Dataset:
+    def __init__(self, path, flat=False, where=None):
+        self.path = resolve_path(path)
+        self.flat = flat
+        self.where = where
+        self._table = None
+        if columnar.is_columnar(self.path):
+            self.entries = self._scan_columnar()
+        else:
+            if where:
+                raise ValueError("where predicates need a parquet or Arrow dataset")
+            self.entries = self._load_index()
+
+    def _view(self, entries):
+        view = copy.copy(self)
+        view.entries = entries
+        return view
+
+    def _scan_columnar(self):
+        stem = os.path.splitext(os.path.basename(self.path))[0]
+        self._table, rows = columnar.scan(
+            self.path, columns=columnar.record_columns(self.path), where=self.where)
+        names = self._table.column_names
+        if rows is None:
+            ids = self._table.column("id").to_pylist()
+        else:
+            ids = [f"{stem}:{row}" for row in rows]
+        if "type" in names:
+            types = self._table.column("type").to_pylist()
+        else:
+            types = ["bool" if "flag" in names else None] * len(ids)
+        return [IndexEntry(record_id, os.path.basename(self.path), position, 1, record_type)
+                for position, (record_id, record_type) in enumerate(zip(ids, types))]
+
+    def _index_path(self):
+        if os.path.isdir(self.path):
+            return os.path.join(self.path, ".flat.index.json" if self.flat else ".index.json")
+        return self.path + ".index.json"
+
+    def _data_files(self):
+        if os.path.isdir(self.path):
+            files = sorted((f for f in os.listdir(self.path)
+                            if f.endswith('.json') and not f.endswith('index.json')),
+                           key=_numeric_key)
+            return [os.path.join(self.path, f) for f in files]
+        return [self.path]
+
+    def _load_index(self):
+        files = self._data_files()
+        signature = _signature(files)
+        index_path = self._index_path()
+        try:
+            with open(index_path, 'r', encoding='utf8') as f:
+                cached = json.load(f)
+            if cached.get('version') == INDEX_VERSION and cached.get('files') == signature:
+                return [IndexEntry(*entry) for entry in cached['entries']]
+        except (OSError, ValueError):
+            pass
+
+        if os.path.isdir(self.path):
+            entries = _index_directory(self.path, [os.path.basename(f) for f in files], self.flat)
+        elif self.path.endswith('.jsonl'):
+            entries = _index_jsonl(self.path)
+        else:
+            entries = _index_json_array(self.path)
+        try:
+            with open(index_path, 'w', encoding='utf8') as f:
+                json.dump({'version': INDEX_VERSION, 'files': signature,
+                           'entries': [[e.id, e.file, e.offset, e.length, e.type] for e in entries]}, f)
+        except OSError:
+            pass  # directorio de solo lectura: se reconstruye en cada arranque
+        return entries
+
+    def _file_path(self, entry):
+        return os.path.join(self.path, entry.file) if os.path.isdir(self.path) else self.path
+
+    def _read(self, entry):
+        if self._table is not None:
+            return columnar.row_record(self._table, entry.offset, entry.id, entry.type)
+        file_path = self._file_path(entry)
+        if not os.path.isdir(self.path):
+            with open(file_path, 'rb') as f:
+                f.seek(entry.offset)
+                item = json.loads(f.read(entry.length))
+            if self.path.endswith('.jsonl'):
+                return Record(entry.id, item['question'], item['answer'], item.get('options'),
+                              entry.type)
+            return Record(entry.id, item['q'], item['a'], None, entry.type)
+
+        data = _read_json(file_path, os.stat(file_path).st_mtime_ns)
+        options = data.get('options')
+        if entry.offset < 0:
+            return Record(entry.id, data['questions'], data['answers'], options, entry.type)
+        return Record(entry.id, data['questions'][entry.offset], data['answers'][entry.offset],
+                      options, entry.type)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return self._view(self.entries[key])
+        return self._read(self.entries[key])
+
+    def __iter__(self):
+        for entry in self.entries:
+            yield self._read(entry)
+
+    # Shard `index` of `count` (round robin, so every shard mixes all files)
+    def shard(self, index, count):
+        return self._view(self.entries[index::count])
+
+    def sample(self, n, seed=0):
+        entries = list(self.entries)
+        random.Random(seed).shuffle(entries)
+        return self._view(entries[:n])
+
+
+# Forget what speeds up the next load of `path`: the parsed JSON files kept
+# in memory and the index stored next to the data (benchmarks time cold loads)
+def drop_caches(path, flat=False):
+    _read_json.cache_clear()
+    path = resolve_path(path)
+    if columnar.is_columnar(path):
+        return
+    if os.path.isdir(path):
+        index_path = os.path.join(path, ".flat.index.json" if flat else ".index.json")
+    else:
+        index_path = path + ".index.json"
+    try:
+        os.remove(index_path)
+    except FileNotFoundError:
+        pass
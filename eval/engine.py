@@ -0,0 +1,239 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+from cache import ResponseCache, cache_key
+from checkpoint import question_id
+from metrics import get_metrics
+from ratelimit import RateLimiter, call_with_backoff, estimate_tokens
+from parsing import AnswerExtractor
+
+# Numero de peticiones en vuelo por defecto
+DEFAULT_CONCURRENCY = 8
+
+
+# Run `worker(idx, item)` over every item keeping at most `concurrency`
+# coroutines in flight. Results come back in the same order as `items`.
+async def run_pool(worker, items, concurrency=DEFAULT_CONCURRENCY):
+    items = list(items)
+    results = [None] * len(items)
+    queue = asyncio.Queue()
+    for idx, item in enumerate(items):
+        queue.put_nowait((idx, item))
+
+    async def consume():
+        while True:
+            try:
+                idx, item = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            results[idx] = await worker(idx, item)
+
+    n_workers = max(1, min(concurrency, len(items)))
+    await asyncio.gather(*(consume() for _ in range(n_workers)))
+    return results
+
+
+# Limiter shared by every request of this process (EVAL_RPM, EVAL_TPM and
+# EVAL_RATE_STATE select the quota and the file shared between processes)
+_limiter = None
+
+
+def get_rate_limiter():
+    global _limiter
+    if _limiter is None:
+        _limiter = RateLimiter.from_env()
+    return _limiter
+
+
+def set_rate_limiter(limiter):
+    global _limiter
+    _limiter = limiter
+
+
+# Response cache shared by every request of this process (EVAL_CACHE selects
+# the SQLite file, EVAL_CACHE=off disables it)
+_cache = None
+_cache_loaded = False
+
+
+def get_response_cache():
+    global _cache, _cache_loaded
+    if not _cache_loaded:
+        _cache = ResponseCache.from_env()
+        _cache_loaded = True
+    return _cache
+
+
+def set_response_cache(cache):
+    global _cache, _cache_loaded
+    _cache = cache
+    _cache_loaded = True
+
+
+def _usage_tokens(response):
+    usage = getattr(response, "usage_metadata", None)
+    return getattr(usage, "total_token_count", 0) if usage else 0
+
+
+# (prompt, output, cached) tokens of a response, estimated when the API does
+# not say. Cached tokens are the part of the prompt served from a context cache.
+def _token_split(response, prompt, text):
+    usage = getattr(response, "usage_metadata", None)
+    prompt_tokens = getattr(usage, "prompt_token_count", None) if usage else None
+    output_tokens = getattr(usage, "candidates_token_count", None) if usage else None
+    cached_tokens = getattr(usage, "cached_content_token_count", None) if usage else None
+    return (prompt_tokens or estimate_tokens(prompt),
+            output_tokens if output_tokens is not None else estimate_tokens(text),
+            cached_tokens or 0)
+
+
+def _chunk_text(chunk):
+    try:
+        return chunk.text
+    except ValueError:
+        return ""  # fragmento sin texto (p. ej. solo metadatos)
+
+
+# Stream one completion and stop reading as soon as `answers` <answer> tags
+# have closed; closing the stream ends the generation on the server side.
+# Returns an object shaped like a full response (text, usage_metadata).
+async def _stream_answer(model, prompt, answers):
+    extractor = AnswerExtractor(answers)
+    started = time.perf_counter()
+    first_token = None
+    response = await model.generate_content_async(prompt, stream=True)
+    chunks = response.__aiter__()
+    usage = None
+    try:
+        async for chunk in chunks:
+            usage = getattr(chunk, "usage_metadata", None) or usage
+            text = _chunk_text(chunk)
+            if first_token is None and text:
+                first_token = time.perf_counter() - started
+            if extractor.feed(text):
+                break
+    finally:
+        close = getattr(chunks, "aclose", None)
+        if close is not None:
+            await close()
+    if usage is None or extractor.done:
+        # cortada antes del final: no llega el recuento, se estima
+        usage = SimpleNamespace(prompt_token_count=estimate_tokens(prompt),
+                                candidates_token_count=estimate_tokens(extractor.text),
+                                total_token_count=estimate_tokens(prompt) + estimate_tokens(extractor.text))
+    return SimpleNamespace(text=extractor.text, usage_metadata=usage, stopped_early=extractor.done,
+                           ttft=first_token)
+
+
+# Send a single prompt to the model and return the stripped response text.
+# Identical requests are answered from the response cache without an API call.
+# With stream=True the response is streamed and cut once `answers` answer
+# tags are complete, saving the latency and tokens of whatever follows.
+# `sample` numbers repeated draws of the same prompt so each one is cached apart.
+# A `slots` semaphore shared by several jobs (see sweep.py) is held for the
+# duration of each model call, so it caps the requests in flight whatever
+# the batching or voting; its FIFO wake-up interleaves the jobs fairly.
+# Every call is recorded in the process metrics (see metrics.py).
+async def ask(model, prompt, stream=False, answers=1, sample=0, slots=None):
+    metrics = get_metrics()
+    cache = get_response_cache()
+    if cache is not None:
+        key = cache_key(model, prompt, sample, stream)
+        started = time.perf_counter()
+        cached = cache.get(key)
+        if cached is not None:
+            metrics.record("request", cached=True, latency=time.perf_counter() - started,
+                           sample=sample)
+            return cached
+
+    if stream:
+        request = lambda: _stream_answer(model, prompt, answers)  # noqa: E731
+    else:
+        request = lambda: model.generate_content_async(prompt)  # noqa: E731
+
+    async def make_call():
+        if slots is None:
+            return await request()
+        async with slots:
+            return await request()
+
+    stats = {}
+    try:
+        response = await call_with_backoff(
+            get_rate_limiter(),
+            make_call,
+            tokens=estimate_tokens(prompt),
+            usage_of=_usage_tokens,
+            stats=stats,
+        )
+    except Exception as e:
+        metrics.record("request", cached=False, sample=sample, stream=stream,
+                       error=type(e).__name__)
+        raise
+    response_text = response.text.strip()
+    prompt_tokens, output_tokens, cached_tokens = _token_split(response, prompt, response_text)
+    metrics.record("request", cached=False, sample=sample, stream=stream,
+                   ttft=getattr(response, "ttft", None), prompt_tokens=prompt_tokens,
+                   output_tokens=output_tokens, cached_tokens=cached_tokens,
+                   cost=metrics.cost(prompt_tokens, output_tokens, cached_tokens),
+                   stopped_early=getattr(response, "stopped_early", None), **stats)
+    if cache is not None:
+        cache.put(key, response_text, model=getattr(model, "model_name", None))
+    return response_text
+
+
+# Evaluate every (question, answer) pair concurrently.
+# `evaluate_question(idx, question, answer)` is a coroutine returning the
+# result dict of one question; entries with "correct": True are counted.
+# With a `checkpoint` every result is streamed to it as soon as it is ready,
+# and `resume=True` skips the questions it already answered. `ids` are the
+# stable question IDs (by default derived from position and content).
+# `fingerprints` (see checkpoint.input_fingerprint) are stored with each
+# result; with `incremental=True` a stored answer is reused only while its
+# fingerprint matches, so just the new or changed questions are asked.
+# Reused answers go through `rescore(idx, result)` (current answer key and
+# scorer) and the checkpoint is rewritten with them.
+async def evaluate_async(evaluate_question, questions, answers, concurrency=DEFAULT_CONCURRENCY,
+                         checkpoint=None, resume=False, ids=None, fingerprints=None,
+                         incremental=False, rescore=None):
+    questions = list(questions)
+    answers = list(answers)
+    if ids is None:
+        ids = [question_id(idx, question) for idx, question in enumerate(questions)]
+
+    done = {}
+    if checkpoint is not None:
+        if incremental and fingerprints is not None:
+            stored = checkpoint.load()
+            for idx, (qid, fingerprint) in enumerate(zip(ids, fingerprints)):
+                if qid in stored and stored[qid].get("fingerprint") == fingerprint:
+                    result = {key: value for key, value in stored[qid].items() if key != "id"}
+                    done[qid] = rescore(idx, result) if rescore is not None else result
+            checkpoint.reset()
+            for qid, result in done.items():
+                checkpoint.append(qid, result)
+            print(f"Incremental: {len(done)}/{len(ids)} questions unchanged, "
+                  f"{len(ids) - len(done)} to ask")
+        elif resume:
+            done = checkpoint.load()
+            print(f"Resuming: {sum(1 for qid in ids if qid in done)}/{len(ids)} questions already answered")
+        else:
+            checkpoint.reset()
+
+    pending = [idx for idx, qid in enumerate(ids) if qid not in done]
+
+    async def worker(_, idx):
+        result = await evaluate_question(idx, questions[idx], answers[idx])
+        if fingerprints is not None:
+            result = {**result, "fingerprint": fingerprints[idx]}
+        if checkpoint is not None:
+            checkpoint.append(ids[idx], result)
+        return result
+
+    fresh = await run_pool(worker, pending, concurrency)
+    results = [done.get(qid) for qid in ids]
+    for idx, result in zip(pending, fresh):
+        results[idx] = result
+    correct = sum(1 for result in results if result.get("correct"))
+    return correct, results
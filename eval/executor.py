@@ -0,0 +1,269 @@
+import ast
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import textwrap
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from data import Dataset, resolve_path
+
+DEFAULT_TIMEOUT = 2.0
+DEFAULT_MEMORY_MB = 256
+DEFAULT_CACHE_PATH = os.path.join(".eval_cache", "executions.sqlite")
+
+_CODE = re.compile(r"```python\s*\n(.*?)```", re.S)
+_INPUT = re.compile(r"valor de entrada `x\s*=\s*(-?\d+)`")
+# La clave "answers" del objeto (dentro de las preguntas las comillas van escapadas)
+_ANSWERS = re.compile(r'(?<!\\)"answers"\s*:\s*\[')
+
+# Nodos permitidos en los programas de code_output: asignaciones aritmeticas
+# dentro de bucles `for _ in range(n)` y un `return int(...)`
+_ALLOWED_NODES = (
+    ast.Module, ast.FunctionDef, ast.arguments, ast.arg, ast.Assign, ast.AugAssign,
+    ast.For, ast.Return, ast.Call, ast.Name, ast.Load, ast.Store, ast.Constant,
+    ast.BinOp, ast.UnaryOp, ast.Add, ast.Sub, ast.Mult, ast.USub, ast.UAdd, ast.Expr,
+    ast.Pass,
+)
+_ALLOWED_CALLS = {"range", "int"}
+_SAFE_BUILTINS = {"range": range, "int": int}
+
+
+# Pull the program and the input value out of a code_output question
+def extract_program(question):
+    code = _CODE.search(question)
+    value = _INPUT.search(question)
+    if code is None or value is None:
+        raise ValueError("question has no ```python block or `x = ...` input")
+    return textwrap.dedent(code.group(1)).strip() + "\n", int(value.group(1))
+
+
+def function_hash(source):
+    return hashlib.sha256(source.encode("utf8")).hexdigest()
+
+
+# Reject anything that is not straight-line arithmetic over loops
+def check_program(source):
+    tree = ast.parse(source)
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ValueError(f"forbidden syntax: {type(node).__name__}")
+        if isinstance(node, ast.Call) and not (
+                isinstance(node.func, ast.Name) and node.func.id in _ALLOWED_CALLS):
+            raise ValueError("only range() and int() may be called")
+        if isinstance(node, ast.Name) and node.id.startswith("__"):
+            raise ValueError("dunder names are not allowed")
+    functions = [node for node in tree.body if isinstance(node, ast.FunctionDef)]
+    if len(functions) != 1 or len(tree.body) != 1:
+        raise ValueError("expected exactly one function definition")
+    return functions[0].name
+
+
+def _limit_worker(memory_mb):
+    import resource
+
+    limit = memory_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _on_alarm(signum, frame):
+    raise TimeoutError("execution timed out")
+
+
+# Run one program over several inputs inside a pool worker. Each call gets
+# its own wall-clock budget; errors are returned, never raised.
+def _run_program(source, inputs, timeout):
+    import signal
+
+    try:
+        name = check_program(source)
+        namespace = {"__builtins__": _SAFE_BUILTINS}
+        exec(compile(source, "<random_function>", "exec"), namespace)
+        function = namespace[name]
+    except Exception as e:
+        return [(None, f"{type(e).__name__}: {e}")] * len(inputs)
+
+    signal.signal(signal.SIGALRM, _on_alarm)
+    outputs = []
+    for x in inputs:
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+        try:
+            outputs.append((function(x), None))
+        except (Exception, MemoryError) as e:
+            outputs.append((None, f"{type(e).__name__}: {e}"))
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    return outputs
+
+
+# SQLite cache of (function hash, input) -> output, so a program already run
+# for an input is never executed again
+class ExecutionCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS executions (
+                function TEXT NOT NULL,
+                input INTEGER NOT NULL,
+                output TEXT,
+                error TEXT,
+                PRIMARY KEY (function, input)
+            )""")
+        self.conn.commit()
+
+    def get_many(self, function, inputs):
+        found = {}
+        for x, output, error in self.conn.execute(
+                "SELECT input, output, error FROM executions WHERE function = ?", (function,)):
+            found[x] = (int(output) if output is not None else None, error)
+        return {x: found[x] for x in inputs if x in found}
+
+    def put_many(self, function, results):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO executions VALUES (?, ?, ?, ?)",
+            [(function, x, str(output) if output is not None else None, error)
+             for x, (output, error) in results.items()])
+        self.conn.commit()
+
+
+def _pool(workers, memory_mb):
+    return ProcessPoolExecutor(max_workers=workers, initializer=_limit_worker,
+                               initargs=(memory_mb,))
+
+
+# Run the pending programs in a process pool, yielding (hash, outputs) as
+# they finish. A worker killed outright (e.g. by the RLIMIT_AS cap) breaks
+# the whole pool: the programs that finished are kept, the first unfinished
+# one runs again alone and is recorded as errored if it kills that worker
+# too, and the rest go to a fresh pool.
+def _run_pending(sources, pending, workers, timeout, memory_mb):
+    queue = dict(pending)
+    while queue:
+        broken = None
+        with _pool(workers, memory_mb) as pool:
+            futures = {digest: pool.submit(_run_program, sources[digest], inputs, timeout)
+                       for digest, inputs in queue.items()}
+            for digest, future in futures.items():
+                try:
+                    outputs = future.result()
+                except BrokenProcessPool:
+                    broken = digest
+                    break
+                del queue[digest]
+                yield digest, outputs
+        if broken is None:
+            return
+        for digest, future in futures.items():
+            if digest in queue and digest != broken and future.done() and not future.exception():
+                del queue[digest]
+                yield digest, future.result()
+        inputs = queue.pop(broken)
+        try:
+            with _pool(1, memory_mb) as pool:
+                outputs = pool.submit(_run_program, sources[broken], inputs, timeout).result()
+        except BrokenProcessPool:
+            outputs = [(None, f"BrokenProcessPool: worker died (memory limit {memory_mb} MB?)")]
+            outputs *= len(inputs)
+        yield broken, outputs
+
+
+# Execute every (program, input) pair. Programs are grouped by hash so each
+# one is compiled once per batch, cached results are reused, and the rest run
+# in a process pool with per-call time and per-worker memory limits.
+# Returns {(hash, input): (output, error)}.
+def execute_all(pairs, workers=None, timeout=DEFAULT_TIMEOUT, memory_mb=DEFAULT_MEMORY_MB,
+                cache=None):
+    by_function = {}
+    sources = {}
+    for source, x in pairs:
+        digest = function_hash(source)
+        sources[digest] = source
+        by_function.setdefault(digest, set()).add(x)
+
+    results = {}
+    pending = {}
+    for digest, inputs in by_function.items():
+        cached = cache.get_many(digest, inputs) if cache is not None else {}
+        results.update({(digest, x): value for x, value in cached.items()})
+        missing = sorted(inputs - set(cached))
+        if missing:
+            pending[digest] = missing
+
+    for digest, outputs in _run_pending(sources, pending, workers, timeout, memory_mb):
+        outputs = dict(zip(pending[digest], outputs))
+        results.update({(digest, x): value for x, value in outputs.items()})
+        if cache is not None:
+            cache.put_many(digest, outputs)
+    return results
+
+
+# Rewrite only the given positions of the "answers" array in the JSON text,
+# so a fixed corpus file keeps its formatting and the diff shows the answers
+def _replace_answers(text, answers):
+    match = _ANSWERS.search(text)
+    if match is None:
+        raise ValueError("no answers array")
+    decoder = json.JSONDecoder()
+    spans = []
+    pos = match.end()
+    while True:
+        while text[pos] in " \t\r\n,":
+            pos += 1
+        if text[pos] == "]":
+            break
+        _, end = decoder.raw_decode(text, pos)
+        spans.append((pos, end))
+        pos = end
+    for position in sorted(answers, reverse=True):
+        start, end = spans[position]
+        text = text[:start] + json.dumps(answers[position]) + text[end:]
+    return text
+
+
+# Check the stored answers of a code_output corpus against real executions.
+# With fix=True wrong answers are rewritten in the JSON files.
+def verify_dataset(path, fix=False, workers=None, timeout=DEFAULT_TIMEOUT,
+                   memory_mb=DEFAULT_MEMORY_MB, cache=None):
+    dataset = Dataset(path, flat=True)
+    records = list(dataset)
+    programs = []
+    report = {"checked": 0, "ok": 0, "mismatch": [], "errors": []}
+    for record in records:
+        try:
+            programs.append(extract_program(record.question))
+        except ValueError as e:
+            programs.append(None)
+            report["errors"].append({"id": record.id, "error": str(e)})
+
+    results = execute_all([p for p in programs if p is not None], workers=workers,
+                          timeout=timeout, memory_mb=memory_mb, cache=cache)
+
+    fixes = {}
+    for entry, record, program in zip(dataset.entries, records, programs):
+        if program is None:
+            continue
+        output, error = results[(function_hash(program[0]), program[1])]
+        report["checked"] += 1
+        if error is not None:
+            report["errors"].append({"id": record.id, "error": error})
+        elif output == record.answer:
+            report["ok"] += 1
+        else:
+            report["mismatch"].append({"id": record.id, "expected": record.answer, "actual": output})
+            fixes.setdefault(entry.file, {})[entry.offset] = output
+
+    if fix and fixes:
+        if not os.path.isdir(dataset.path):
+            raise ValueError("--fix only works on directories of JSON files")
+        for file_name, answers in fixes.items():
+            file_path = os.path.join(resolve_path(dataset.path), file_name)
+            with open(file_path, "r", encoding="utf8", newline="") as f:
+                text = f.read()
+            with open(file_path, "w", encoding="utf8", newline="") as f:
+                f.write(_replace_answers(text, answers))
+        report["fixed"] = sum(len(answers) for answers in fixes.values())
+    return report
@@ -0,0 +1,182 @@
+import json
+import os
+
+import numpy as np
+
+# Generador de programas al estilo de dataset/code_output: bucles de
+# asignaciones aritmeticas sobre a, b, c y x.
+
+VARIABLES = ["a", "b", "c", "x"]
+OPERATORS = ["+", "-"]
+_NOOP = len(VARIABLES)  # registro extra donde escriben las sentencias de relleno
+_LIMIT = 2 ** 62
+
+QUESTION_TEMPLATE = (
+    "\n        ```python\n        \n{program}    \n        ```\n        \n"
+    "        Ejecuta la función `random_function` con el valor de entrada `x = {x}`.\n"
+    "        \n        Especifica el valor devuelto (int).\n        "
+)
+
+
+# A batch of random programs as integer arrays, so it can be interpreted
+# with NumPy. Statement s of program p is
+#   VARIABLES[target[p, s]] = VARIABLES[left[p, s]] OPERATORS[op[p, s]] VARIABLES[right[p, s]]
+# and only the first n_statements[p] statements are real.
+class ProgramBatch:
+    def __init__(self, init, loops, n_statements, target, left, op, right, returns):
+        self.init = init
+        self.loops = loops
+        self.n_statements = n_statements
+        self.target = target
+        self.left = left
+        self.op = op
+        self.right = right
+        self.returns = returns
+
+    def __len__(self):
+        return len(self.loops)
+
+    @classmethod
+    def random(cls, rng, count, loops=(3, 10), statements=(5, 15), init=(0, 5), op_weights=None):
+        weights = np.array(op_weights or [1, 1], dtype=float)
+        max_statements = statements[1]
+        n_statements = rng.integers(statements[0], statements[1] + 1, size=count)
+        shape = (count, max_statements)
+        target = rng.integers(0, len(VARIABLES), size=shape)
+        padding = np.arange(max_statements)[None, :] >= n_statements[:, None]
+        target[padding] = _NOOP
+        return cls(
+            init=rng.integers(init[0], init[1] + 1, size=(count, 3)),
+            loops=rng.integers(loops[0], loops[1] + 1, size=count),
+            n_statements=n_statements,
+            target=target,
+            left=rng.integers(0, len(VARIABLES), size=shape),
+            op=rng.choice(len(OPERATORS), size=shape, p=weights / weights.sum()),
+            right=rng.integers(0, len(VARIABLES), size=shape),
+            returns=rng.integers(0, len(VARIABLES), size=count),
+        )
+
+    def source(self, p):
+        a, b, c = self.init[p]
+        lines = ["def random_function(x):", f"    a = {a}", f"    b = {b}", f"    c = {c}",
+                 "    ", f"    for _ in range({self.loops[p]}):"]
+        for s in range(self.n_statements[p]):
+            lines.append(f"        {VARIABLES[self.target[p, s]]} = {VARIABLES[self.left[p, s]]} "
+                         f"{OPERATORS[self.op[p, s]]} {VARIABLES[self.right[p, s]]}")
+        lines.append(f"    return int({VARIABLES[self.returns[p]]})")
+        return "\n".join(lines) + "\n"
+
+    # Exact interpreter with Python ints (fallback when int64 would overflow)
+    def run_exact(self, p, x):
+        values = [int(v) for v in self.init[p]] + [int(x), 0]
+        for _ in range(self.loops[p]):
+            for s in range(self.n_statements[p]):
+                left, right = values[self.left[p, s]], values[self.right[p, s]]
+                op = OPERATORS[self.op[p, s]]
+                values[self.target[p, s]] = left + right if op == "+" else left - right
+        # a, b, c viven en 0..2 y x en 3
+        return values[self.returns[p]]
+
+    # Run every program on its row of `inputs` (shape (programs, k)) at once.
+    # Returns int64 answers and a mask of programs that left the safe int64
+    # range; those are recomputed exactly.
+    def run(self, inputs):
+        count, k = inputs.shape
+        rows = np.arange(count)
+        # registros: a, b, c, x y el de relleno
+        state = np.zeros((len(VARIABLES) + 1, count, k), dtype=np.int64)
+        state[0:3] = self.init.T[:, :, None]
+        state[3] = inputs
+        overflow = np.zeros(count, dtype=bool)
+        for step in range(self.loops.max()):
+            active = (self.loops > step)[:, None]
+            for s in range(self.target.shape[1]):
+                left = state[self.left[:, s], rows]
+                right = state[self.right[:, s], rows]
+                # |a| y |b| < 2**62 garantiza que a +- b cabe en int64
+                big = (np.abs(left) >= _LIMIT) | (np.abs(right) >= _LIMIT)
+                overflow |= (big & active).any(axis=1)
+                with np.errstate(over="ignore"):
+                    result = np.where(self.op[:, s][:, None] == 0, left + right, left - right)
+                targets = self.target[:, s]
+                state[targets, rows] = np.where(active, result, state[targets, rows])
+        answers = state[self.returns, rows]
+        overflow |= (np.abs(answers) >= _LIMIT).any(axis=1)
+        return answers, overflow
+
+
+# Generate `count` programs with `inputs_per_program` inputs each, in batches.
+# Yields one dict per (program, input, answer) triple.
+def generate(count, inputs_per_program=3, seed=0, batch_size=4096, input_range=(1, 100), **shape):
+    rng = np.random.default_rng(seed)
+    produced = 0
+    while produced < count:
+        size = min(batch_size, count - produced)
+        batch = ProgramBatch.random(rng, size, **shape)
+        inputs = rng.integers(input_range[0], input_range[1] + 1, size=(size, inputs_per_program))
+        answers, overflow = batch.run(inputs)
+        for p in range(size):
+            source = batch.source(p)
+            for j in range(inputs_per_program):
+                x = int(inputs[p, j])
+                answer = batch.run_exact(p, x) if overflow[p] else int(answers[p, j])
+                yield {
+                    "id": f"gen{produced + p}:{j}",
+                    "program": source,
+                    "input": x,
+                    "answer": answer,
+                    "question": QUESTION_TEMPLATE.format(program=source, x=x),
+                }
+        produced += size
+
+
+def _write_shard(rows, output_dir, index, file_format):
+    path = os.path.join(output_dir, f"shard-{index:05d}.{file_format}")
+    if file_format == "jsonl":
+        with open(path, "w", encoding="utf8") as f:
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    else:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.table({
+            "id": [row["id"] for row in rows],
+            "question": [row["question"] for row in rows],
+            "program": [row["program"] for row in rows],
+            "input": pa.array([row["input"] for row in rows], type=pa.int64()),
+            # las respuestas exactas pueden no caber en int64
+            "answer": [str(row["answer"]) for row in rows],
+            "type": ["int"] * len(rows),
+        })
+        pq.write_table(table, path)
+    return path
+
+
+# Stream generated triples into JSONL or parquet shards of `shard_size` rows,
+# or into algN.json files with the same layout as dataset/code_output
+def write_generated(output_dir, count, file_format="jsonl", shard_size=100_000, **options):
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    rows = []
+    if file_format == "json":
+        per_program = options.get("inputs_per_program", 3)
+        for row in generate(count, **options):
+            rows.append(row)
+            if len(rows) == per_program:
+                path = os.path.join(output_dir, f"alg{len(paths)}.json")
+                with open(path, "w", encoding="utf8") as f:
+                    json.dump({"questions": [r["question"] for r in rows],
+                               "answers": [r["answer"] for r in rows]}, f, indent=4)
+                paths.append(path)
+                rows = []
+        return paths
+
+    for row in generate(count, **options):
+        rows.append(row)
+        if len(rows) == shard_size:
+            paths.append(_write_shard(rows, output_dir, len(paths), file_format))
+            rows = []
+    if rows:
+        paths.append(_write_shard(rows, output_dir, len(paths), file_format))
+    return paths
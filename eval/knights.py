@@ -0,0 +1,479 @@
+import json
+import os
+import random
+import re
+import unicodedata
+
+from data import Dataset
+
+# Solver de Truhanes y Caballeros. Las formulas son tuplas:
+#   ("var", i), ("const", bool), ("not", f), ("and", [f, ...]), ("or", [f, ...]),
+#   ("implies", f, g), ("iff", f, g), ("xor", [f, ...]), ("exactly", k, [f, ...])
+# y se evaluan a la vez sobre las 2**n asignaciones: la tabla de verdad de una
+# formula es un int cuyo bit k vale 1 si la asignacion k la satisface.
+
+ROLES = {
+    "caballero": "knight", "knight": "knight", "izquierda": "knight", "izquierdo": "knight",
+    "izquierdista": "knight", "left": "knight", "culpable": "knight",
+    "truhan": "knave", "bribon": "knave", "escudero": "knave", "knave": "knave",
+    "derecha": "knave", "derecho": "knave", "diestro": "knave", "right": "knave",
+    "inocente": "knave",
+    "normal": "normal",
+}
+_ROLE_WORD = r"(?:un |una |a )?([a-z]+)"
+_NUMBERS = {"dos": 2, "tres": 3, "cuatro": 4, "cinco": 5, "seis": 6, "siete": 7}
+
+
+def _fold(text):
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in text if not unicodedata.combining(ch)).replace("…", "...")
+
+
+def _role(word):
+    word = word.lower()
+    for candidate in (word, word[:-2] if word.endswith("es") else word, word.rstrip("s")):
+        if candidate in ROLES:
+            return ROLES[candidate]
+    raise ValueError(f"unknown role {word!r}")
+
+
+def _var_table(i, n):
+    half = 1 << i
+    table = ((1 << half) - 1) << half
+    size, total = half * 2, 1 << n
+    while size < total:
+        table |= table << size
+        size *= 2
+    return table & ((1 << total) - 1)
+
+
+# Truth table of `formula` over `n` variables as a bitset of 2**n assignments
+def truth_table(formula, n):
+    full = (1 << (1 << n)) - 1
+    tables = {}
+
+    def table(f):
+        kind = f[0]
+        if kind == "var":
+            if f[1] not in tables:
+                tables[f[1]] = _var_table(f[1], n)
+            return tables[f[1]]
+        if kind == "const":
+            return full if f[1] else 0
+        if kind == "not":
+            return full ^ table(f[1])
+        if kind == "and":
+            result = full
+            for child in f[1]:
+                result &= table(child)
+            return result
+        if kind == "or":
+            result = 0
+            for child in f[1]:
+                result |= table(child)
+            return result
+        if kind == "implies":
+            return (full ^ table(f[1])) | table(f[2])
+        if kind == "iff":
+            return full ^ (table(f[1]) ^ table(f[2]))
+        if kind == "xor":
+            result = 0
+            for child in f[1]:
+                result ^= table(child)
+            return result
+        if kind == "exactly":
+            # counts[j]: asignaciones con exactamente j hijos verdaderos
+            counts = [full]
+            for child in f[2]:
+                t = table(child)
+                counts = [(counts[j] & ~t if j < len(counts) else 0) |
+                          (counts[j - 1] & t if j > 0 else 0)
+                          for j in range(len(counts) + 1)]
+            return counts[f[1]] & full if f[1] < len(counts) else 0
+        raise ValueError(f"unknown formula {kind!r}")
+
+    return table(formula)
+
+
+# People (single capital letters) with one variable each: true means knight,
+# left-handed or guilty depending on the puzzle. With normals every person
+# gets a second variable (knave) and a normal is neither.
+class Puzzle:
+    def __init__(self, people, normals=False):
+        self.people = list(people)
+        self.normals = normals
+        self.constraints = []
+        if normals:
+            for p in self.people:
+                self.constraints.append(("not", ("and", [self.role(p, "knight"), self.role(p, "knave")])))
+
+    @property
+    def n_vars(self):
+        return len(self.people) * (2 if self.normals else 1)
+
+    def role(self, person, role):
+        if person not in self.people:
+            raise ValueError(f"unknown person {person!r}")
+        i = self.people.index(person)
+        knight = ("var", i)
+        if role == "knight":
+            return knight
+        if not self.normals:
+            if role == "normal":
+                return ("const", False)
+            return ("not", knight)
+        knave = ("var", len(self.people) + i)
+        if role == "knave":
+            return knave
+        return ("and", [("not", knight), ("not", knave)])
+
+    # A speaker's statement: knights tell the truth, knaves lie, normals may do either
+    def says(self, speaker, statement):
+        if self.normals:
+            self.constraints.append(("implies", self.role(speaker, "knight"), statement))
+            self.constraints.append(("implies", self.role(speaker, "knave"), ("not", statement)))
+        else:
+            self.constraints.append(("iff", self.role(speaker, "knight"), statement))
+
+    def models(self):
+        return truth_table(("and", self.constraints), self.n_vars)
+
+    def solutions(self):
+        models = self.models()
+        found = []
+        while models:
+            k = (models & -models).bit_length() - 1
+            models &= models - 1
+            found.append({p: self._role_at(k, i) for i, p in enumerate(self.people)})
+        return found
+
+    def _role_at(self, assignment, i):
+        if assignment >> i & 1:
+            return "knight"
+        if not self.normals or assignment >> (len(self.people) + i) & 1:
+            return "knave"
+        return "normal"
+
+    # True when `assignment` ({person: role}, possibly partial) holds in every
+    # consistent world
+    def entails(self, assignment):
+        models = self.models()
+        literal = ("and", [self.role(p, r) for p, r in assignment.items()])
+        return models != 0 and models & ~truth_table(literal, self.n_vars) == 0
+
+
+class _StatementParser:
+    def __init__(self, puzzle, speaker=None):
+        self.puzzle = puzzle
+        self.speaker = speaker
+        self.last_role = None
+
+    def _person(self, word):
+        if word.lower() == "yo":
+            if self.speaker is None:
+                raise ValueError("'yo' without a speaker")
+            return self.speaker
+        return word
+
+    def parse(self, text):
+        text = text.strip(' ."')
+        if len(text) > 1 and text[0].isupper() and text[1].islower():
+            text = text[0].lower() + text[1:]
+
+        match = re.match(r"^si (.+?),? entonces (.+)$", text)
+        if match:
+            return ("implies", self.parse(match.group(1)), self.parse(match.group(2)))
+        parts = re.split(r",? si y solo si ", text)
+        if len(parts) == 2:
+            return ("iff", self.parse(parts[0]), self.parse(parts[1]))
+        quantified = self._quantified(text)
+        if quantified is not None:
+            return quantified
+        parts = re.split(r",? o ", text)
+        if len(parts) > 1:
+            return ("or", [self.parse(part) for part in parts])
+        parts = re.split(r",? (?:y|pero) ", text)
+        if len(parts) > 1:
+            return ("and", [self.parse(part) for part in parts])
+        return self._atom(text)
+
+    def _quantified(self, text):
+        puzzle = self.puzzle
+        match = re.match(r"^en el conjunto \{([A-Z ,]*)\} hay un numero (par|impar) de caball\w*$", text)
+        if match:
+            members = re.findall(r"[A-Z]", match.group(1))
+            parity = ("xor", [puzzle.role(p, "knight") for p in members])
+            return parity if match.group(2) == "impar" else ("not", parity)
+        match = re.match(r"^todos somos " + _ROLE_WORD + "$", text)
+        if match:
+            role = _role(match.group(1))
+            return ("and", [puzzle.role(p, role) for p in puzzle.people])
+        match = re.match(r"^(al menos|exactamente) uno de nosotros es " + _ROLE_WORD + "$", text)
+        if match:
+            role = _role(match.group(2))
+            members = [puzzle.role(p, role) for p in puzzle.people]
+            return ("or", members) if match.group(1) == "al menos" else ("exactly", 1, members)
+        match = re.match(r"^(?:entre ([A-Z]|yo) y ([A-Z]|yo) hay al menos un|al menos uno entre "
+                         r"([A-Z]|yo) y ([A-Z]|yo) es) " + _ROLE_WORD + "$", text)
+        if match:
+            first, second = match.group(1) or match.group(3), match.group(2) or match.group(4)
+            role = _role(match.group(5))
+            return ("or", [puzzle.role(self._person(p), role) for p in (first, second)])
+        match = re.match(r"^((?:[A-Z]|yo)(?:, (?:[A-Z]|yo))*) y ([A-Z]|yo) (?:son|somos) "
+                         + _ROLE_WORD + "$", text)
+        if match:
+            people = re.findall(r"[A-Z]|yo", match.group(1)) + [match.group(2)]
+            role = _role(match.group(3))
+            return ("and", [puzzle.role(self._person(p), role) for p in people])
+        return None
+
+    def _atom(self, text):
+        match = re.match(r"^(?:([A-Z]|yo) )?(no )?(?:tambien |tampoco )?(?:es|soy) "
+                         + _ROLE_WORD + "$", text)
+        if match:
+            person = self._person(match.group(1) or "yo")
+            role = _role(match.group(3))
+            self.last_role = role
+            atom = self.puzzle.role(person, role)
+            return ("not", atom) if match.group(2) else atom
+        match = re.match(r"^([A-Z]|yo) no lo es$", text)
+        if match and self.last_role is not None:
+            return ("not", self.puzzle.role(self._person(match.group(1)), self.last_role))
+        raise ValueError(f"cannot parse statement {text!r}")
+
+
+def parse_statement(puzzle, text, speaker=None):
+    return _StatementParser(puzzle, speaker).parse(_fold(text))
+
+
+def _people(text, statements):
+    letters = set(re.findall(r"\b([A-Z])\b", " ".join(statements)))
+    match = re.search(r"[Hh]ay (\d+|\w+) (?:habitantes|nativos|defendidos|sospechosos)", text)
+    count = 0
+    if match:
+        count = int(match.group(1)) if match.group(1).isdigit() else _NUMBERS.get(match.group(1), 0)
+    last = max([ord(letter) - ord("A") + 1 for letter in letters] + [count])
+    return [chr(ord("A") + i) for i in range(last)]
+
+
+def _split_speakers(text):
+    starts = list(re.finditer(r"(?:^|\s)([A-Z]):\s", text))
+    statements = []
+    for match, following in zip(starts, starts[1:] + [None]):
+        body = text[match.end():following.start() if following else len(text)]
+        body = re.split(r"\s(?:Pregunta:|¿)", body)[0]
+        statements.append((match.group(1), body))
+    return statements
+
+
+# Build a Puzzle from the Spanish text of a logic question. Supported:
+# knights/knaves (caballeros, truhanes, bribones), knights/knaves/normals,
+# the deaf island (izquierda/derecha), parity sets and Inspector Craig cases.
+# Anything else raises ValueError.
+def parse_puzzle(text):
+    text = _fold(text)
+    if "Universidad" in text or "complice" in text:
+        raise ValueError("puzzle needs facts outside the supported patterns")
+
+    if "Sordos" in text:
+        said = re.findall(r'De ([A-Z]) a ([A-Z]): "([^"]*)"', text)
+        puzzle = Puzzle(_people(text, [s for _, _, s in said] + [f"{x} {y}" for x, y, _ in said]))
+        for speaker, listener, statement in said:
+            same_tribe = ("iff", puzzle.role(speaker, "knight"), puzzle.role(listener, "knight"))
+            puzzle.constraints.append(("iff", same_tribe, parse_statement(puzzle, statement, speaker)))
+        return puzzle
+
+    if "Inspector Craig" in text:
+        facts = [chunk.split(". ")[0] for chunk in re.split(r"\s*\d+\.\s*", text)[1:]]
+        puzzle = Puzzle(_people(text, facts))
+        for fact in facts:
+            puzzle.constraints.append(parse_statement(puzzle, fact))
+        return puzzle
+
+    unknown = re.search(r"Entonces ([A-Z]) dijo una de las \w+ afirmaciones siguientes: (.*)$", text)
+    if unknown:
+        text = text[:unknown.start()]
+    said = re.findall(r'(?:El nativo )?\b([A-Z]) dijo: "([^"]*)"', text)
+    said += re.findall(r"\b([A-Z]) realiza el siguiente planteamiento: (.*?)\s*(?:¿|$)", text)
+    if not said:
+        said = _split_speakers(text)
+    if not said:
+        raise ValueError("statements have no speaker")
+    alternatives = []
+    if unknown:
+        alternatives = [s for s in re.split(r"\.\s*", unknown.group(2)) if s.strip()]
+
+    puzzle = Puzzle(_people(text, [s for _, s in said] + [x for x, _ in said]
+                            + ([unknown.group(1)] if unknown else [])),
+                    normals="normales" in text)
+    if puzzle.normals and "al menos uno es un caballero y al menos uno es un bribon" in text.lower():
+        puzzle.constraints.append(("or", [puzzle.role(p, "knight") for p in puzzle.people]))
+        puzzle.constraints.append(("or", [puzzle.role(p, "knave") for p in puzzle.people]))
+    for speaker, statement in said:
+        puzzle.says(speaker, parse_statement(puzzle, statement, speaker))
+    if alternatives:
+        _choose_alternative(puzzle, unknown.group(1), alternatives)
+    return puzzle
+
+
+# The last statement is one of several; the logician could name everyone, so
+# it is the alternative that leaves exactly one consistent world
+def _choose_alternative(puzzle, speaker, alternatives):
+    options = [("iff", puzzle.role(speaker, "knight"), parse_statement(puzzle, alternative, speaker))
+               for alternative in alternatives]
+    base = puzzle.models()
+    unique = [option for option in options
+              if bin(base & truth_table(option, puzzle.n_vars)).count("1") == 1]
+    if len(unique) == 1:
+        puzzle.constraints.append(unique[0])
+    else:
+        puzzle.constraints.append(("or", options))
+
+
+# Parse one multiple-choice option into {person: role}
+def parse_option(text, puzzle):
+    text = _fold(text).strip()
+    if text.rstrip(".") == "Nadie":
+        return {p: "knave" for p in puzzle.people}
+    if re.fullmatch(r"[A-Z](?:\s*,\s*[A-Z])*\.?", text):
+        named = set(re.findall(r"[A-Z]", text))
+        return {p: "knight" if p in named else "knave" for p in puzzle.people}
+
+    assignment = {}
+    for group, members in re.findall(r"(Caballeros|Knights|Bribones|Knaves|Truhanes)\s*:\s*\{?((?:[\s,]*[A-Z]\b)*)",
+                                     text):
+        for person in re.findall(r"[A-Z]", members):
+            assignment[person] = _role(group)
+    for person, word in re.findall(r"\b([A-Z]) (?:es|is) (?:un |una |a )?([a-z]+)", text):
+        assignment[person] = _role(word)
+    if not assignment:
+        raise ValueError(f"cannot parse option {text!r}")
+    return assignment
+
+
+# Key of the option that holds in every consistent world; when several do,
+# the most specific one (partial options are distractors). None when no
+# option or more than one equally specific option is entailed.
+def solve_options(puzzle, options):
+    entailed = []
+    for key, text in options.items():
+        assignment = parse_option(text, puzzle)
+        if all(p in puzzle.people for p in assignment) and puzzle.entails(assignment):
+            entailed.append((len(assignment), key))
+    if not entailed:
+        return None
+    entailed.sort(reverse=True)
+    if len(entailed) > 1 and entailed[0][0] == entailed[1][0]:
+        return None
+    return int(entailed[0][1])
+
+
+# Solve every puzzle of a logic corpus and compare with its stored answer
+def verify_dataset(path):
+    report = {"checked": 0, "ok": 0, "mismatch": [], "unsupported": []}
+    for record in Dataset(path):
+        try:
+            puzzle = parse_puzzle(record.question)
+            solved = solve_options(puzzle, record.options)
+        except ValueError as e:
+            report["unsupported"].append({"id": record.id, "error": str(e)})
+            continue
+        report["checked"] += 1
+        expected = record.answer[0] if isinstance(record.answer, list) else record.answer
+        if solved == expected:
+            report["ok"] += 1
+        else:
+            solutions = puzzle.solutions()
+            report["mismatch"].append({"id": record.id, "expected": expected, "actual": solved,
+                                       "solutions": len(solutions),
+                                       "solution": solutions[0] if len(solutions) == 1 else None})
+    return report
+
+
+PUZZLE_HEADER = (
+    "Caballeros y bribones. Hay una isla en la que ciertos habitantes llamados caballeros siempre "
+    "dicen la verdad y otros llamados bribones que siempre mienten. Se supone que cada habitante "
+    "de la isla es caballero o bribón. En el problema hay {n} habitantes, que se indican con los "
+    "símbolos A, B, C,... Los primeros {n} de ellos hacen una afirmación. ¿Quién es un caballero y "
+    "quién un bribón?"
+)
+_CONNECTIVES = ["and", "or", "iff", "implies"]
+
+
+def _render_atom(person, knight):
+    return f"{person} es un {'caballero' if knight else 'bribón'}"
+
+
+def _render_statement(kind, a, b):
+    if kind == "and":
+        return f"{a} y {b}"
+    if kind == "or":
+        return f"{a} o {b}"
+    if kind == "iff":
+        return f"{a}, si y solo si {b}"
+    return f"Si {a}, entonces {b}"
+
+
+def _render_solution(solution, people):
+    return ", ".join(_render_atom(p, solution[p] == "knight") for p in people) + "."
+
+
+# Every person speaks about two others and people are named A..Z
+MIN_PEOPLE = 3
+MAX_PEOPLE = 26
+
+
+# Random knights-and-knaves puzzle with exactly one consistent assignment, in
+# the style of dataset/logic (every person makes one two-atom statement).
+# Returns a corpus item: {"questions", "reasoning", "answers", "options"}.
+def generate_puzzle(rng, n_people, max_tries=1000):
+    if not MIN_PEOPLE <= n_people <= MAX_PEOPLE:
+        raise ValueError(f"n_people must be in [{MIN_PEOPLE}, {MAX_PEOPLE}], got {n_people}")
+    people = [chr(ord("A") + i) for i in range(n_people)]
+    for _ in range(max_tries):
+        puzzle = Puzzle(people)
+        texts = []
+        for speaker in people:
+            a, b = rng.sample([p for p in people if p != speaker], 2)
+            kind = rng.choice(_CONNECTIVES)
+            text = _render_statement(kind, _render_atom(a, rng.random() < 0.5),
+                                     _render_atom(b, rng.random() < 0.5))
+            puzzle.says(speaker, parse_statement(puzzle, text, speaker))
+            texts.append(f"{speaker}: {text}.")
+        solutions = puzzle.solutions()
+        if len(solutions) == 1:
+            break
+    else:
+        raise RuntimeError(f"no unique puzzle with {n_people} people after {max_tries} tries")
+
+    solution = solutions[0]
+    distractors = set()
+    while len(distractors) < 2:
+        other = {p: rng.choice(["knight", "knave"]) for p in people}
+        if other != solution:
+            distractors.add(_render_solution(other, people))
+    # como en el corpus, una opcion incompleta que coincide con la solucion
+    partial = _render_solution(solution, people[:-1])
+    choices = [_render_solution(solution, people), partial, *distractors]
+    order = list(range(4))
+    rng.shuffle(order)
+    options = {str(position + 1): choices[index] for position, index in enumerate(order)}
+    return {
+        "questions": PUZZLE_HEADER.format(n=n_people) + " " + " ".join(texts),
+        "reasoning": "",
+        "answers": [order.index(0) + 1],
+        "options": options,
+    }
+
+
+# Write `count` generated puzzles as logicN.json files
+def write_puzzles(output_dir, count, people=(3, 9), seed=0):
+    if people[0] > people[1]:
+        raise ValueError(f"people range {people} is empty")
+    rng = random.Random(seed)
+    os.makedirs(output_dir, exist_ok=True)
+    for i in range(count):
+        item = generate_puzzle(rng, rng.randint(*people))
+        with open(os.path.join(output_dir, f"logic{i + 1}.json"), "w", encoding="utf8") as f:
+            json.dump(item, f, indent=4, ensure_ascii=False)
+    return count
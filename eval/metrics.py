@@ -0,0 +1,174 @@
+import contextvars
+import json
+import os
+import time
+
+# Instrumentacion de cada llamada al modelo y de cada pregunta: latencia,
+# tiempo hasta el primer token, tokens, reintentos, espera en el limiter y
+# coste. Se exporta en JSONL y en formato de texto de Prometheus.
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+# USD por millon de tokens (entrada, salida); `model.price` en la config
+# ({"input": ..., "output": ...}) tiene prioridad
+PRICES = {
+    "gemini-2.0-flash-exp": (0.0, 0.0),
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-1.5-flash": (0.075, 0.30),
+    "gemini-1.5-pro": (1.25, 5.00),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "mistral-large-latest": (2.00, 6.00),
+    "mistral-small-latest": (0.20, 0.60),
+}
+
+# Precio relativo de los tokens de entrada servidos desde la cache de contexto
+CACHED_RATE = 0.25
+
+# Labels of the code being measured (job, question id...). Tasks inherit
+# them, so a model call made deep inside a question is attributed to it.
+_labels = contextvars.ContextVar("metric_labels", default={})
+
+
+def label(**values):
+    _labels.set({**_labels.get(), **values})
+
+
+def price_of(model_config):
+    price = model_config.get("price")
+    if price is not None:
+        return price["input"], price["output"]
+    return PRICES.get(model_config["name"].split("/")[-1])
+
+
+def quantile(values, q):
+    values = sorted(values)
+    if not values:
+        return None
+    position = q * (len(values) - 1)
+    low = int(position)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+# Records of one run. `kind` is "request" (one model call, or a cache hit)
+# or "question" (one question end to end, retries included).
+class Metrics:
+    def __init__(self):
+        self.records = []
+        self.prices = {}  # job -> (input, output) USD per million tokens
+
+    # Estimated cost of a call made by the current job (None if its price is
+    # unknown). Tokens served from a context cache are billed at CACHED_RATE.
+    def cost(self, prompt_tokens, output_tokens, cached_tokens=0):
+        price = self.prices.get(_labels.get().get("job"))
+        if price is None:
+            return None
+        billed = prompt_tokens - cached_tokens + CACHED_RATE * cached_tokens
+        return (price[0] * billed + price[1] * output_tokens) / 1e6
+
+    def record(self, kind, **fields):
+        labels = _labels.get()
+        self.records.append({"kind": kind, **labels, **fields, "time": round(time.time(), 3)})
+
+    def of(self, kind, field, **where):
+        return [record[field] for record in self.records
+                if record["kind"] == kind and record.get(field) is not None
+                and all(record.get(key) == value for key, value in where.items())]
+
+    def write_jsonl(self, path):
+        with open(path, "w", encoding="utf8") as f:
+            for record in self.records:
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+    # Prometheus text exposition: summaries with quantiles per job, and
+    # token, cost, request and retry totals
+    def write_prometheus(self, path):
+        jobs = sorted({record.get("job", "") for record in self.records})
+        lines = []
+
+        def summary(name, help_text, kind, field):
+            lines.extend([f"# HELP {name} {help_text}", f"# TYPE {name} summary"])
+            for job in jobs:
+                values = self.of(kind, field, job=job) if job else self.of(kind, field)
+                for q in QUANTILES:
+                    if values:
+                        lines.append(f'{name}{{job="{job}",quantile="{q}"}} {quantile(values, q):.6f}')
+                lines.append(f'{name}_sum{{job="{job}"}} {sum(values):.6f}')
+                lines.append(f'{name}_count{{job="{job}"}} {len(values)}')
+
+        def counter(name, help_text, kind, field):
+            lines.extend([f"# HELP {name} {help_text}", f"# TYPE {name} counter"])
+            for job in jobs:
+                values = self.of(kind, field, job=job) if job else self.of(kind, field)
+                lines.append(f'{name}{{job="{job}"}} {sum(values):g}')
+
+        summary("eval_request_latency_seconds", "Model call latency (successful attempt)",
+                "request", "latency")
+        summary("eval_time_to_first_token_seconds", "Time to the first streamed token",
+                "request", "ttft")
+        summary("eval_throttle_wait_seconds", "Time waiting for the rate limiter",
+                "request", "throttle")
+        summary("eval_question_seconds", "Wall-clock time per question", "question", "seconds")
+        lines.extend(["# HELP eval_tokens_total Tokens per direction", "# TYPE eval_tokens_total counter"])
+        for job in jobs:
+            where = {"job": job} if job else {}
+            for direction, field in (("prompt", "prompt_tokens"), ("output", "output_tokens"),
+                                     ("cached", "cached_tokens")):
+                lines.append(f'eval_tokens_total{{job="{job}",direction="{direction}"}} '
+                             f'{sum(self.of("request", field, **where)):g}')
+        counter("eval_cost_usd_total", "Estimated cost in USD", "request", "cost")
+        counter("eval_rate_limit_retries_total", "Calls retried after a 429", "request", "retries")
+        counter("eval_question_retries_total", "Questions retried after an error", "question", "retries")
+        counter("eval_cache_hits_total", "Requests answered from the response cache",
+                "request", "cached")
+        lines.extend(["# HELP eval_request_errors_total Calls that failed after the 429 retries",
+                      "# TYPE eval_request_errors_total counter"])
+        for job in jobs:
+            where = {"job": job} if job else {}
+            lines.append(f'eval_request_errors_total{{job="{job}"}} '
+                         f'{len(self.of("request", "error", **where))}')
+        with open(path, "w", encoding="utf8") as f:
+            f.write("\n".join(lines) + "\n")
+
+    # Write <prefix>.jsonl and <prefix>.prom
+    def export(self, prefix):
+        if os.path.dirname(prefix):
+            os.makedirs(os.path.dirname(prefix), exist_ok=True)
+        self.write_jsonl(f"{prefix}.jsonl")
+        self.write_prometheus(f"{prefix}.prom")
+
+    def print_summary(self):
+        requests = [record for record in self.records if record["kind"] == "request"]
+        questions = self.of("question", "seconds")
+        print(f"\nMetrics: {len(requests)} requests "
+              f"({sum(1 for record in requests if record.get('cached'))} cached, "
+              f"{sum(1 for record in requests if 'error' in record)} failed), "
+              f"{len(questions)} questions")
+        for title, kind, field in (("request latency", "request", "latency"),
+                                   ("time to first token", "request", "ttft"),
+                                   ("throttle wait", "request", "throttle"),
+                                   ("question time", "question", "seconds")):
+            values = self.of(kind, field)
+            if values:
+                print(f"  {title:20} " + "  ".join(
+                    f"p{round(q * 100)} {quantile(values, q):.3f}s" for q in QUANTILES))
+        costs = self.of("request", "cost")
+        print(f"  tokens: prompt {sum(self.of('request', 'prompt_tokens'))} "
+              f"({sum(self.of('request', 'cached_tokens'))} from context cache), "
+              f"output {sum(self.of('request', 'output_tokens'))}; "
+              f"429 retries {sum(self.of('request', 'retries'))}; "
+              f"cost {f'${sum(costs):.4f}' if costs else 'n/a'}")
+
+
+# Metrics of the current run, shared by every request of this process
+_metrics = Metrics()
+
+
+def get_metrics():
+    return _metrics
+
+
+def set_metrics(metrics):
+    global _metrics
+    _metrics = metrics
@@ -0,0 +1,211 @@
+import ast
+import json
+import math
+import re
+from dataclasses import dataclass
+from fractions import Fraction
+
+# Extraccion y parseo de respuestas <answer>...</answer>, compartido por
+# todos los scorers. Un fallo de parseo se devuelve como resultado (nunca se
+# lanza), asi no provoca reintentos que vuelven a cobrar la llamada.
+
+ANSWER_RE = re.compile(r"<\s*answer\s*>(.*?)<\s*/\s*answer\s*>", re.S | re.I)
+# <answer id="2">...</answer>, used when several questions share one request
+INDEXED_ANSWER_RE = re.compile(
+    r"<\s*answer\s+id\s*=\s*[\"']?(\d+)[\"']?\s*>(.*?)<\s*/\s*answer\s*>", re.S | re.I)
+
+BOOLEANS = {
+    "true": True, "verdadero": True, "verdadera": True, "cierto": True, "yes": True,
+    "si": True, "sí": True,
+    "false": False, "falso": False, "falsa": False, "no": False,
+}
+KINDS = ("list", "int", "number", "bool", "text")
+
+_FENCE = re.compile(r"^```\w*\s*|\s*```$")
+_BOXED = re.compile(r"\\boxed\{(.*)\}", re.S)
+_LABEL = re.compile(r"^(?:respuesta|answer|final answer|resultado)\s*[:=]\s*", re.I)
+_THOUSANDS = re.compile(r"^-?\d{1,3}(,\d{3})+(\.\d+)?$")
+_FRAC = re.compile(r"^\\[dt]?frac\{(-?[\d.]+)\}\{(-?[\d.]+)\}$")
+
+
+# Result of parsing one response. `status` is "ok", "missing" (no answer
+# tag) or "invalid" (tag found but its content does not parse as `kind`).
+@dataclass(frozen=True)
+class ParseOutcome:
+    status: str
+    value: object = None
+    raw: str = None
+    error: str = None
+
+    @property
+    def ok(self):
+        return self.status == "ok"
+
+
+# Every <answer> block, in order, with surrounding noise removed
+def extract_answers(text):
+    return [clean(block) for block in ANSWER_RE.findall(text or "")]
+
+
+# Raw answer of each of `count` packed questions (ids 1..count), None where
+# the response has no usable answer. Responses that ignore the ids but hold
+# exactly `count` plain answers are mapped by position.
+def indexed_answers(text, count):
+    answers = [None] * count
+    for index, block in INDEXED_ANSWER_RE.findall(text or ""):
+        index = int(index) - 1
+        if 0 <= index < count and answers[index] is None and block.strip():
+            answers[index] = block.strip()
+    if all(answer is None for answer in answers):
+        plain = ANSWER_RE.findall(text or "")
+        if len(plain) == count:
+            answers = [block.strip() or None for block in plain]
+    return answers
+
+
+# Strip what models wrap answers in: code fences, bold, $...$, \boxed{},
+# "Respuesta:" labels and a trailing period
+def clean(raw):
+    text = _FENCE.sub("", raw.strip()).strip()
+    boxed = _BOXED.search(text)
+    if boxed:
+        text = boxed.group(1)
+    while len(text) > 4 and text.startswith("**") and text.endswith("**"):
+        text = text[2:-2].strip()
+    text = text.strip("$`").strip()
+    text = _LABEL.sub("", text)
+    return text.rstrip(".").strip().replace("\u2212", "-")
+
+
+# Exact number from "12", "-3.5", "2/9", "\frac{2}{9}" or "1,234" (int,
+# Fraction or float); ValueError when it is not one
+def to_number(text):
+    text = clean(text)
+    if "=" in text:
+        text = text.rsplit("=", 1)[1].strip()
+    if _THOUSANDS.match(text):
+        text = text.replace(",", "")
+    match = _FRAC.match(text.replace(" ", ""))
+    if match:
+        text = f"{match.group(1)}/{match.group(2)}"
+    if re.fullmatch(r"[-+]?\d+", text):
+        return int(text)
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    try:
+        return Fraction(text.replace(" ", ""))
+    except (ValueError, ZeroDivisionError):
+        raise ValueError(f"not a number: {text!r}")
+
+
+def to_bool(text):
+    key = clean(text).lower()
+    if key not in BOOLEANS:
+        raise ValueError(f"not a boolean: {text!r}")
+    return BOOLEANS[key]
+
+
+def _scalar(text):
+    try:
+        return to_number(text)
+    except ValueError:
+        return clean(text).strip("'\"")
+
+
+# A list from JSON ("[1, 2]"), Python literals ("(1, 2)", "[True, 'a']") or a
+# bare comma separated sequence ("1, 2/3, x"); a single value becomes [value]
+def to_list(text):
+    text = clean(text)
+    for parse in (json.loads, ast.literal_eval):
+        try:
+            value = parse(text)
+        except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+            continue
+        if isinstance(value, (list, tuple)):
+            return [list(item) if isinstance(item, tuple) else item for item in value]
+        return [value]
+    text = text.strip("[]()")
+    return [_scalar(part) for part in text.split(",")] if text else []
+
+
+_PARSERS = {
+    "list": to_list,
+    "int": lambda text: _integer(to_number(text)),
+    "number": to_number,
+    "bool": to_bool,
+    "text": clean,
+}
+
+
+def _integer(value):
+    if isinstance(value, int):
+        return value
+    if not math.isfinite(value):
+        raise ValueError(f"not an integer: {value}")
+    if value == int(value):
+        return int(value)
+    raise ValueError(f"not an integer: {value}")
+
+
+# Parse the answer of a response as `kind`. When there are several <answer>
+# blocks (scratchpads often quote the tag while reasoning) the first one that
+# parses wins.
+def parse_answer(text, kind="text"):
+    blocks = extract_answers(text)
+    if not blocks:
+        return ParseOutcome("missing", error="no <answer> tag in the response")
+    error = None
+    for block in blocks:
+        if not block:
+            error = error or "empty <answer> tag"
+            continue
+        try:
+            return ParseOutcome("ok", _PARSERS[kind](block), block)
+        except (ValueError, TypeError, OverflowError) as e:
+            error = str(e)
+    return ParseOutcome("invalid", raw=blocks[0], error=error)
+
+
+# Incremental <answer> extractor for streamed responses. Chunks are fed as
+# they arrive (tags may be split across chunks); `feed` returns True once
+# `expected` answers have been closed, so the rest of the generation can be
+# dropped. Tags are matched as loosely as ANSWER_RE ("< answer >", "</ANSWER >"),
+# and the opening one may carry attributes (id="2").
+class AnswerExtractor:
+    OPEN = re.compile(r"<\s*answer\b[^<>]*>", re.I)
+    CLOSE = re.compile(r"<\s*/\s*answer\s*>", re.I)
+    # Longest tag text kept waiting for the rest of a split tag
+    MAX_TAG = 64
+
+    def __init__(self, expected=1):
+        self.expected = expected
+        self.text = ""
+        self.answers = []
+        self._pos = 0
+        self._start = None
+
+    @property
+    def done(self):
+        return len(self.answers) >= self.expected
+
+    def feed(self, chunk):
+        self.text += chunk
+        while not self.done:
+            tag = self.OPEN if self._start is None else self.CLOSE
+            match = tag.search(self.text, self._pos)
+            if match is None:
+                # la etiqueta puede llegar partida: se vuelve a mirar desde el ultimo "<"
+                last = self.text.rfind("<", self._pos)
+                if last < 0 or len(self.text) - last > self.MAX_TAG:
+                    last = len(self.text)
+                self._pos = last
+                break
+            if self._start is None:
+                self._start = self._pos = match.end()
+            else:
+                self.answers.append(self.text[self._start:match.start()])
+                self._start = None
+                self._pos = match.end()
+        return self.done
@@ -0,0 +1,19 @@
+import os
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+
+
+# Load a prompt text by name (templates/<name>.txt) or by path
+def load_text(name):
+    if name is None:
+        return None
+    path = name if name.endswith(".txt") else os.path.join(TEMPLATES_DIR, f"{name}.txt")
+    with open(path, "r", encoding="utf8") as f:
+        return f.read()
+
+
+# Fill a question template; `{options}` expands to the options block (or to
+# nothing when the dataset has no options)
+def build_prompt(template, question, options=None):
+    options_block = f"{options}\n\n" if options is not None else ""
+    return template.format(question=question, options=options_block)
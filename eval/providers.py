@@ -0,0 +1,390 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+from types import SimpleNamespace
+
+from cache import cache_key
+from ratelimit import estimate_tokens
+
+# Los SDKs de los proveedores son pesados: se importan y configuran solo
+# la primera vez que se crea un modelo de ese proveedor
+_configured = set()
+
+# Conexiones HTTP keep-alive por cliente (un cliente por proveedor y proceso)
+DEFAULT_POOL_SIZE = 32
+DEFAULT_TIMEOUT = 600
+
+# Todos los modelos exponen la interfaz de GenerativeModel que usa engine.ask:
+# `await generate_content_async(prompt, stream=False)` devuelve un objeto con
+# `.text` y `.usage_metadata.total_token_count`; con stream=True, un iterable
+# asincrono de fragmentos con la misma forma. `model_name`,
+# `generation_config` y `system_instruction` forman la clave de la cache.
+
+
+def _gemini_model(model_config, system_instruction):
+    import google.generativeai as genai
+
+    if "gemini" not in _configured:
+        # Configure API key (debemos poner en la terminal una vez cargado el environment: !export GEMINI_API_KEY=<api key>)
+        genai.configure(api_key=os.environ["GEMINI_API_KEY"])
+        _configured.add("gemini")
+    # el cliente asincrono de genai ya comparte un canal gRPC por proceso
+    return genai.GenerativeModel(
+        model_name=model_config["name"],
+        generation_config=gemini_generation_config(model_config),
+        system_instruction=system_instruction,
+    )
+
+
+# generation_config sent to Gemini, with the JSON schema in structured mode
+def gemini_generation_config(model_config):
+    generation_config = model_config.get("generation_config")
+    if model_config.get("response_schema"):
+        from schemas import gemini_schema
+
+        generation_config = {**(generation_config or {}), "response_mime_type": "application/json",
+                             "response_schema": gemini_schema(model_config["response_schema"])}
+    return generation_config
+
+
+# One pooled client per event loop and client settings: configs of the same
+# provider share it only when base_url, pool size, timeout and API key match.
+# httpx connections belong to the event loop that opened them, so a new loop
+# (one asyncio.run per config) gets a new client, and close_clients() must run
+# before that loop ends.
+_clients = {}
+# httpx clients opened by the SDK clients above, by event loop
+_http_clients = {}
+
+
+# Environment variable holding the API key ("api_key_env" in the model config)
+def _api_key(model_config, default_env):
+    return os.environ[model_config.get("api_key_env", default_env)]
+
+
+def _client_settings(provider, model_config, default_env):
+    return (provider, model_config.get("base_url"),
+            model_config.get("pool_size", DEFAULT_POOL_SIZE),
+            model_config.get("timeout", DEFAULT_TIMEOUT),
+            model_config.get("api_key_env", default_env))
+
+
+def _pooled_client(settings, factory):
+    key = (asyncio.get_running_loop(), settings)
+    if key not in _clients:
+        _clients[key] = factory()
+    return _clients[key]
+
+
+def _http_client(model_config):
+    import httpx
+
+    size = model_config.get("pool_size", DEFAULT_POOL_SIZE)
+    client = httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=size, max_keepalive_connections=size,
+                            keepalive_expiry=60),
+        timeout=httpx.Timeout(model_config.get("timeout", DEFAULT_TIMEOUT), connect=10))
+    _http_clients.setdefault(asyncio.get_running_loop(), []).append(client)
+    return client
+
+
+# Close the pooled clients of the running loop (keep-alive connections included)
+async def close_clients():
+    loop = asyncio.get_running_loop()
+    for key in [key for key in _clients if key[0] is loop]:
+        del _clients[key]
+    for client in _http_clients.pop(loop, []):
+        await client.aclose()
+
+
+# Await `awaitable` and close the pooled clients afterwards, also on errors:
+# asyncio.run(closing_clients(...)) for each loop that talks to a provider
+async def closing_clients(awaitable):
+    try:
+        return await awaitable
+    finally:
+        await close_clients()
+
+
+# usage_metadata with the Gemini field names
+def _usage(prompt_tokens, output_tokens, cached_tokens=0):
+    return SimpleNamespace(prompt_token_count=prompt_tokens, candidates_token_count=output_tokens,
+                           cached_content_token_count=cached_tokens,
+                           total_token_count=prompt_tokens + output_tokens)
+
+
+# OpenAI caches long prompt prefixes by itself and reports the hits
+def _chat_usage(usage):
+    if not usage:
+        return None
+    details = getattr(usage, "prompt_tokens_details", None)
+    return _usage(usage.prompt_tokens, usage.completion_tokens,
+                  getattr(details, "cached_tokens", None) or 0)
+
+
+# Chat completion models (OpenAI, Mistral) behind the GenerativeModel interface.
+# The Gemini generation_config keys are translated; top_k and
+# response_mime_type have no equivalent and are dropped. A "response_schema"
+# (schemas.py) becomes the provider's JSON response format.
+class _ChatModel:
+    def __init__(self, model_config, system_instruction):
+        self.model_name = model_config["name"]
+        self.generation_config = dict(model_config.get("generation_config") or {})
+        self.system_instruction = system_instruction
+        self.model_config = model_config
+        self.response_schema = model_config.get("response_schema")
+        if self.response_schema:
+            # forma parte de la peticion: entra en la clave de la cache
+            self.generation_config["response_schema"] = self.response_schema
+
+    def _messages(self, prompt):
+        messages = [{"role": "user", "content": prompt}]
+        if self.system_instruction:
+            messages.insert(0, {"role": "system", "content": self.system_instruction})
+        return messages
+
+    def _params(self):
+        config = self.generation_config
+        params = {"temperature": config.get("temperature"), "top_p": config.get("top_p"),
+                  "max_tokens": config.get("max_output_tokens"),
+                  "response_format": self._response_format()}
+        return {key: value for key, value in params.items() if value is not None}
+
+    def _response_format(self):
+        return None
+
+
+class OpenAIModel(_ChatModel):
+    def _response_format(self):
+        if self.response_schema:
+            from schemas import openai_response_format
+
+            return openai_response_format(self.response_schema)
+        return None
+
+    def _client(self):
+        from openai import AsyncOpenAI
+
+        settings = _client_settings("openai", self.model_config, "OPENAI_API_KEY")
+        return _pooled_client(settings, lambda: AsyncOpenAI(
+            api_key=_api_key(self.model_config, "OPENAI_API_KEY"),
+            base_url=self.model_config.get("base_url"),
+            http_client=_http_client(self.model_config),
+            max_retries=0))  # los 429 los reintenta el limiter
+
+    async def generate_content_async(self, prompt, stream=False):
+        client = self._client()
+        request = {"model": self.model_name, "messages": self._messages(prompt), **self._params()}
+        if stream:
+            response = await client.chat.completions.create(
+                **request, stream=True, stream_options={"include_usage": True})
+            return self._chunks(response)
+        response = await client.chat.completions.create(**request)
+        return SimpleNamespace(text=response.choices[0].message.content or "",
+                               usage_metadata=_chat_usage(response.usage))
+
+    async def _chunks(self, response):
+        try:
+            async for chunk in response:
+                # el ultimo fragmento solo trae el recuento de tokens
+                text = chunk.choices[0].delta.content if chunk.choices else None
+                usage = _chat_usage(chunk.usage)
+                yield SimpleNamespace(text=text or "", usage_metadata=usage)
+        finally:
+            await response.close()
+
+
+# Mistral's JSON mode does not take a schema: it goes in the system message
+class MistralModel(_ChatModel):
+    def _response_format(self):
+        return {"type": "json_object"} if self.response_schema else None
+
+    def _messages(self, prompt):
+        messages = super()._messages(prompt)
+        if self.response_schema:
+            from schemas import json_schema
+
+            hint = ("Answer only with a JSON object that follows this schema: "
+                    + json.dumps(json_schema(self.response_schema)))
+            messages.insert(0, {"role": "system", "content": hint})
+        return messages
+
+    def _client(self):
+        from mistralai import Mistral
+
+        settings = _client_settings("mistral", self.model_config, "MISTRAL_API_KEY")
+        return _pooled_client(settings, lambda: Mistral(
+            api_key=_api_key(self.model_config, "MISTRAL_API_KEY"),
+            async_client=_http_client(self.model_config)))
+
+    async def generate_content_async(self, prompt, stream=False):
+        client = self._client()
+        request = {"model": self.model_name, "messages": self._messages(prompt), **self._params()}
+        if stream:
+            return self._chunks(await client.chat.stream_async(**request))
+        response = await client.chat.complete_async(**request)
+        return SimpleNamespace(text=response.choices[0].message.content or "",
+                               usage_metadata=_chat_usage(response.usage))
+
+    async def _chunks(self, events):
+        async with events:
+            async for event in events:
+                chunk = event.data
+                text = chunk.choices[0].delta.content if chunk.choices else None
+                usage = _chat_usage(chunk.usage)
+                yield SimpleNamespace(text=text if isinstance(text, str) else "", usage_metadata=usage)
+
+
+class MockError(Exception):
+    pass
+
+
+class MockRateLimitError(MockError):
+    code = 429
+
+
+# Recorded responses for the mock: a response cache (.sqlite, looked up by
+# request key) or a JSONL file of {"response": ..., "prompt": ...} lines.
+# Unknown requests get one of the recorded responses, chosen by prompt hash.
+class _Replay:
+    def __init__(self, path=None, responses=None):
+        self.by_key = {}
+        self.by_prompt = {}
+        self.responses = list(responses or [])
+        if path is None:
+            return
+        if path.endswith((".sqlite", ".db")):
+            import sqlite3
+
+            conn = sqlite3.connect(path)
+            try:
+                self.by_key = dict(conn.execute("SELECT key, response FROM responses"))
+            finally:
+                conn.close()
+            self.responses += list(self.by_key.values())
+        else:
+            with open(path, "r", encoding="utf8") as f:
+                for line in f:
+                    if line.strip():
+                        row = json.loads(line)
+                        self.responses.append(row["response"])
+                        if "prompt" in row:
+                            self.by_prompt[row["prompt"]] = row["response"]
+
+    def pick(self, key, prompt):
+        if key in self.by_key:
+            return self.by_key[key]
+        if prompt in self.by_prompt:
+            return self.by_prompt[prompt]
+        if not self.responses:
+            return "<answer>0</answer>"
+        digest = hashlib.sha256(prompt.encode("utf8")).digest()
+        return self.responses[int.from_bytes(digest[:8], "big") % len(self.responses)]
+
+
+# Local backend for offline benchmarks: replays recorded responses after a
+# random latency and fails with the configured error rates. Options go in
+# the "mock" section of the model config:
+#   replay           .sqlite response cache or .jsonl of recorded responses
+#   responses        inline list of responses (used with or instead of replay)
+#   latency, jitter  mean seconds per call and relative spread (uniform)
+#   error_rate       share of calls raising MockError (retried by the runner)
+#   rate_limit_rate  share of calls raising a 429 (retried by the limiter)
+#   chunk_size       characters per streamed chunk
+#   seed             seed of the latency/error draws
+#   latency_per_1k_input  extra seconds per 1000 input tokens not served
+#                    from the emulated context cache
+class MockModel:
+    def __init__(self, model_config, system_instruction=None):
+        options = model_config.get("mock", {})
+        self.model_name = model_config.get("name", "mock")
+        self.generation_config = model_config.get("generation_config")
+        self.system_instruction = system_instruction
+        self.latency = options.get("latency", 0.2)
+        self.jitter = options.get("jitter", 0.5)
+        self.error_rate = options.get("error_rate", 0.0)
+        self.rate_limit_rate = options.get("rate_limit_rate", 0.0)
+        self.chunk_size = options.get("chunk_size", 32)
+        self.replay = _Replay(options.get("replay"), options.get("responses"))
+        self.latency_per_1k_input = options.get("latency_per_1k_input", 0.0)
+        self.rng = random.Random(options.get("seed", 0))
+        self.calls = 0
+        self._cached = None  # (name, expires) del contenido cacheado emulado
+
+    # Emulated provider-side cache of the system instruction (context_cache.py)
+    def create_cached_content(self, ttl):
+        self._cached = (f"cachedContents/mock-{id(self):x}", time.time() + ttl)
+        return self._cached[0]
+
+    def refresh_cached_content(self, name, ttl):
+        self._cached = (name, time.time() + ttl)
+
+    def delete_cached_content(self, name):
+        self._cached = None
+
+    def _cached_tokens(self):
+        if self._cached is None or not self.system_instruction:
+            return 0
+        if time.time() > self._cached[1]:
+            raise MockError(f"404 {self._cached[0]} expired")
+        return estimate_tokens(self.system_instruction)
+
+    def _delay(self, input_tokens):
+        delay = self.latency * (1 + self.jitter * (2 * self.rng.random() - 1))
+        return max(0.0, delay + self.latency_per_1k_input * input_tokens / 1000)
+
+    def _fail(self):
+        draw = self.rng.random()
+        if draw < self.rate_limit_rate:
+            raise MockRateLimitError("429 mock rate limit")
+        if draw < self.rate_limit_rate + self.error_rate:
+            raise MockError("mock server error")
+
+    async def generate_content_async(self, prompt, stream=False):
+        self.calls += 1
+        text = self.replay.pick(cache_key(self, prompt), prompt)
+        prompt_tokens = estimate_tokens(prompt)
+        if self.system_instruction:
+            prompt_tokens += estimate_tokens(self.system_instruction)
+        cached_tokens = self._cached_tokens()
+        delay = self._delay(prompt_tokens - cached_tokens)
+        usage = _usage(prompt_tokens, estimate_tokens(text), cached_tokens)
+        if stream:
+            return self._chunks(text, delay, usage)
+        await asyncio.sleep(delay)
+        self._fail()
+        return SimpleNamespace(text=text, usage_metadata=usage)
+
+    async def _chunks(self, text, delay, usage):
+        pieces = [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)] or [""]
+        self._fail()
+        for i, piece in enumerate(pieces):
+            await asyncio.sleep(delay / len(pieces))
+            yield SimpleNamespace(text=piece, usage_metadata=usage if i == len(pieces) - 1 else None)
+
+
+PROVIDERS = {
+    "gemini": _gemini_model,
+    "openai": OpenAIModel,
+    "mistral": MistralModel,
+    "mock": MockModel,
+}
+
+
+# Build the model described by the "model" section of a config. With
+# "context_cache" ({"ttl": seconds}) the system instruction is registered
+# once in the provider's cache (see context_cache.py); await `aclose()` on
+# the model when done to release it.
+def create_model(model_config, system_instruction=None):
+    provider = model_config.get("provider", "gemini")
+    if provider not in PROVIDERS:
+        raise ValueError(f"Unknown provider {provider!r}, expected one of {sorted(PROVIDERS)}")
+    model = PROVIDERS[provider](model_config, system_instruction)
+    if model_config.get("context_cache"):
+        from context_cache import cache_prefix
+
+        model = cache_prefix(model, model_config, system_instruction, model_config["context_cache"])
+    return model
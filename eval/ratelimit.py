@@ -0,0 +1,213 @@
+import asyncio
+import json
+import os
+import random
+import time
+
+# Cuotas por defecto de gemini-2.0-flash-exp (free tier)
+DEFAULT_RPM = 10
+DEFAULT_TPM = 4_000_000
+
+MAX_BACKOFF = 60
+MAX_RETRIES = 8
+
+
+# Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)]
+def backoff_delay(attempt, base=1, cap=MAX_BACKOFF):
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+# Rough token estimate for a prompt (~4 characters per token)
+def estimate_tokens(text):
+    return max(1, len(text) // 4)
+
+
+# True if the exception looks like a 429 / quota exhausted error from any SDK
+def is_rate_limit_error(exc):
+    if getattr(exc, "code", None) == 429 or getattr(exc, "status_code", None) == 429:
+        return True
+    if type(exc).__name__ in ("ResourceExhausted", "TooManyRequests", "RateLimitError"):
+        return True
+    message = str(exc).lower()
+    return any(hint in message for hint in ("429", "quota", "rate limit", "resource exhausted"))
+
+
+def _fresh_state(now):
+    return {
+        "requests": None,   # nivel del bucket de peticiones (None = lleno)
+        "tokens": None,     # nivel del bucket de tokens (None = lleno)
+        "updated": now,
+        "blocked_until": 0.0,
+        "strikes": 0,
+        "scale": 1.0,       # fraccion de la cuota que usamos (AIMD)
+    }
+
+
+# Bucket state kept in memory, shared by every coroutine of this process
+class _MemoryState:
+    def __init__(self):
+        self.state = _fresh_state(time.time())
+
+    def update(self, fn):
+        self.state, result = fn(dict(self.state))
+        return result
+
+
+# Bucket state kept in a JSON file guarded by an exclusive flock, so that
+# several processes evaluating at the same time share one quota
+class _FileState:
+    def __init__(self, path):
+        import fcntl
+        self._fcntl = fcntl
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def update(self, fn):
+        with open(self.path, "a+", encoding="utf8") as f:
+            self._fcntl.flock(f, self._fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                raw = f.read()
+                try:
+                    state = json.loads(raw) if raw else _fresh_state(time.time())
+                except json.JSONDecodeError:
+                    state = _fresh_state(time.time())
+                state, result = fn(state)
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+                f.flush()
+            finally:
+                self._fcntl.flock(f, self._fcntl.LOCK_UN)
+        return result
+
+
+# Token bucket limiter enforcing requests-per-minute and tokens-per-minute.
+# On 429/quota errors it backs off exponentially with jitter, pauses every
+# worker sharing the state and temporarily lowers the allowed rate (AIMD).
+class RateLimiter:
+    def __init__(self, rpm=DEFAULT_RPM, tpm=DEFAULT_TPM, state_path=None,
+                 max_backoff=MAX_BACKOFF):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_backoff = max_backoff
+        self._state = _FileState(state_path) if state_path else _MemoryState()
+
+    @classmethod
+    def from_env(cls):
+        rpm = os.environ.get("EVAL_RPM")
+        tpm = os.environ.get("EVAL_TPM")
+        return cls(
+            rpm=float(rpm) if rpm else DEFAULT_RPM,
+            tpm=float(tpm) if tpm else DEFAULT_TPM,
+            state_path=os.environ.get("EVAL_RATE_STATE") or None,
+        )
+
+    def _refill(self, state, now):
+        elapsed = max(0.0, now - state["updated"])
+        scale = state["scale"]
+        for key, per_minute in (("requests", self.rpm), ("tokens", self.tpm)):
+            if not per_minute:
+                continue
+            capacity = per_minute * scale
+            level = capacity if state[key] is None else state[key]
+            state[key] = min(capacity, level + elapsed * capacity / 60)
+        state["updated"] = now
+        return state
+
+    def _take(self, state, tokens, now):
+        state = self._refill(state, now)
+        if now < state["blocked_until"]:
+            return state, state["blocked_until"] - now
+
+        wait = 0.0
+        needs = (("requests", self.rpm, 1), ("tokens", self.tpm, tokens))
+        for key, per_minute, amount in needs:
+            if not per_minute:
+                continue
+            capacity = per_minute * state["scale"]
+            # Una peticion mayor que la capacidad solo espera a tener el bucket lleno
+            amount = min(amount, capacity)
+            if state[key] < amount:
+                wait = max(wait, (amount - state[key]) * 60 / capacity)
+        if wait > 0:
+            return state, wait
+
+        for key, per_minute, amount in needs:
+            if per_minute:
+                state[key] -= min(amount, per_minute * state["scale"])
+        return state, 0.0
+
+    # Wait until there is budget for one request of `tokens` tokens
+    async def acquire(self, tokens=0):
+        while True:
+            wait = self._state.update(
+                lambda state: self._take(state, tokens, time.time()))
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    # Correct the token bucket once the real usage of a request is known
+    def record_usage(self, used_tokens, estimated_tokens):
+        if not self.tpm:
+            return
+
+        def adjust(state):
+            state = self._refill(state, time.time())
+            state["tokens"] -= used_tokens - estimated_tokens
+            return state, None
+
+        self._state.update(adjust)
+
+    def record_success(self):
+        def relax(state):
+            state["strikes"] = max(0, state["strikes"] - 1)
+            state["scale"] = min(1.0, state["scale"] + 0.05)
+            return state, None
+
+        self._state.update(relax)
+
+    # Register a 429/quota error and return how long the caller should wait
+    def record_rate_limited(self):
+        def penalize(state):
+            now = time.time()
+            state["strikes"] += 1
+            state["scale"] = max(0.1, state["scale"] / 2)
+            delay = min(self.max_backoff, 2 ** state["strikes"])
+            delay = random.uniform(delay / 2, delay)
+            state["blocked_until"] = max(state["blocked_until"], now + delay)
+            return state, state["blocked_until"] - now
+
+        return self._state.update(penalize)
+
+
+# Call `make_call()` (a coroutine factory) under the limiter, retrying only
+# rate limit errors. `usage_of(result)` may return the real token count.
+# A `stats` dict receives the time spent waiting for the limiter ("throttle"),
+# the 429 retries and the latency of the successful call.
+async def call_with_backoff(limiter, make_call, tokens=0, usage_of=None,
+                            max_retries=MAX_RETRIES, stats=None):
+    attempt = 0
+    throttle = 0.0
+    while True:
+        started = time.perf_counter()
+        await limiter.acquire(tokens)
+        sent = time.perf_counter()
+        throttle += sent - started
+        try:
+            result = await make_call()
+        except Exception as e:
+            if not is_rate_limit_error(e) or attempt >= max_retries:
+                raise
+            attempt += 1
+            delay = limiter.record_rate_limited()
+            print(f"Rate limited ({e}), backing off {delay:.1f} seconds...")
+            continue
+        limiter.record_success()
+        if stats is not None:
+            stats.update(throttle=throttle, retries=attempt, latency=time.perf_counter() - sent)
+        if usage_of is not None:
+            used = usage_of(result)
+            if used:
+                limiter.record_usage(used, tokens)
+        return result
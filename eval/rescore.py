@@ -0,0 +1,114 @@
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from runner import make_scorer, rescored
+from checker import score_batch
+from scoring import BATCH_SCORERS, TYPED_SCORERS, triplet_score
+from warehouse import decompress
+
+# Recalificacion offline de una ejecucion guardada: las respuestas crudas del
+# almacen pasan otra vez por el parser y el scorer actuales en un pool de
+# procesos y el resultado se guarda como una ejecucion nueva, sin llamar al
+# modelo.
+
+DEFAULT_CHUNK_SIZE = 1000
+
+_scorer = None
+_typed = False
+_batch_scorer = None
+
+
+def _init_worker(config):
+    global _scorer, _typed, _batch_scorer
+    _scorer = make_scorer(config)
+    _typed = config["scorer"] in TYPED_SCORERS
+    if not config.get("structured"):
+        _batch_scorer = BATCH_SCORERS.get(config["scorer"])
+
+
+# Score (compressed response, expected JSON, answer type) rows in a worker
+def _score_chunk(rows):
+    responses = [decompress(data) for data, _, _ in rows]
+    answers = [json.loads(expected) for _, expected, _ in rows]
+    if _batch_scorer is not None:
+        return _batch_scorer(responses, answers, [answer_type for _, _, answer_type in rows])
+    scored = []
+    for response_text, answer, (_, _, answer_type) in zip(responses, answers, rows):
+        try:
+            if _typed:
+                scored.append(_scorer(response_text, answer, answer_type=answer_type))
+            else:
+                scored.append(_scorer(response_text, answer))
+        except Exception as e:
+            scored.append({"expected": answer, "error": str(e)})
+    return scored
+
+
+# Re-score the results stored in a checkpoint with the scorer of `config`,
+# from the raw "response" of each result. Checkpoints written before raw
+# responses were kept can only be checked again with the typed checker on
+# "received"; with any other scorer those results are left as they were.
+# Returns the rescored results and how many were correct before and after.
+def rescore_checkpoint(checkpoint, config):
+    results = [result for result in checkpoint.load().values() if "expected" in result]
+    _init_worker(config)
+    replay = [i for i, result in enumerate(results) if result.get("response") is not None]
+    graded = list(results)
+    if _batch_scorer is not None:
+        scored = _batch_scorer([results[i]["response"] for i in replay],
+                               [results[i]["expected"] for i in replay],
+                               [results[i].get("type") for i in replay])
+    else:
+        scored = [_scorer(results[i]["response"], results[i]["expected"], answer_type=results[i].get("type"))
+                  if _typed else _scorer(results[i]["response"], results[i]["expected"])
+                  for i in replay]
+    for i, result in zip(replay, scored):
+        graded[i] = rescored(results[i], result)
+
+    if _typed:
+        stale = [i for i, result in enumerate(results)
+                 if result.get("response") is None and "received" in result]
+        correct = score_batch([results[i]["received"] for i in stale],
+                              [results[i]["expected"] for i in stale],
+                              [results[i].get("type") for i in stale])
+        for i, ok in zip(stale, correct):
+            graded[i] = {**results[i], "correct": bool(ok)}
+    before = sum(1 for result in results if result.get("correct"))
+    after = sum(1 for result in graded if result.get("correct"))
+    return graded, before, after
+
+
+# Replay every stored response of `run_id` through the current scorer and
+# store the outcome as a new run ("rescored_from" in its config) that shares
+# the raw responses, latency and tokens of the original one. Results without
+# a response (request errors) are copied as they were.
+# Returns (new run_id, correct before, correct after, items).
+def rescore_run(warehouse, run_id, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    config = warehouse.run(run_id)
+    stored = list(warehouse.results_of(run_id))
+    replay = [row for row in stored if row["data"] is not None]
+    chunks = [[(row["data"], row["expected"], row["answer_type"]) for row in replay[i:i + chunk_size]]
+              for i in range(0, len(replay), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(config,)) as pool:
+        scored = iter([result for chunk in pool.map(_score_chunk, chunks) for result in chunk])
+
+    results = []
+    for row in stored:
+        if row["data"] is not None:
+            results.append(next(scored))
+        else:
+            results.append({"expected": None if row["expected"] is None else json.loads(row["expected"]),
+                            "error": row["error"] or "no stored response"})
+    costs = {row["question_id"]: row for row in stored}
+    new_run = warehouse.record_run({**config, "rescored_from": run_id},
+                                   [row["question_id"] for row in stored], results,
+                                   started=time.time(), costs=costs)
+    warehouse.copy_responses(run_id, new_run)
+    before = sum(1 for row in stored if row["correct"])
+    after = sum(1 for result in results if result.get("correct"))
+    if config["summary"] == "triplet":
+        print(f"[{config['name']}] triplet score {triplet_score(stored):.2f} -> "
+              f"{triplet_score(results):.2f}")
+    return new_run, before, after, len(results)
@@ -0,0 +1,153 @@
+import os
+import re
+from collections import Counter, defaultdict
+
+import columnar
+from data import resolve_path
+
+# Motor de encadenamiento hacia adelante para ruletaker_subset: cada fila es
+# una teoria "Facts:" + "Rules:" y un enunciado a comprobar.
+
+RULE_TEMPLATES = [re.compile(pattern) for pattern in (
+    r"^When (.+), we can conclude (.+)$",
+    r"^Given that (.+), it follows that (.+)$",
+    r"^If (.+), then (.+)$",
+    r"^Based on (.+), it is evident that (.+)$",
+    r"^Assuming (.+), we can say (.+)$",
+)]
+COLUMNS = ["context", "statement", "flag", "depth"]
+
+
+def normalize(sentence):
+    return sentence.strip().rstrip(".").strip().lower()
+
+
+def parse_rule(line):
+    for template in RULE_TEMPLATES:
+        match = template.match(line.strip().rstrip("."))
+        if match:
+            premises = tuple(normalize(p) for p in match.group(1).split(" and "))
+            return premises, normalize(match.group(2))
+    raise ValueError(f"unknown rule template: {line!r}")
+
+
+# Split a context into (facts, rules); rules are (premises, conclusion)
+def parse_theory(context):
+    facts_part, _, rules_part = context.partition("Rules:")
+    facts = [normalize(line) for line in facts_part.replace("Facts:", "").splitlines() if line.strip()]
+    rules = [parse_rule(line) for line in rules_part.splitlines() if line.strip()]
+    return facts, rules
+
+
+# Forward chaining with rules indexed by premise. Every rule keeps a counter
+# of premises still missing, so a fact only touches the rules that mention
+# it and each rule fires once, when its last premise arrives. Derivation
+# runs in rounds: the depth of a fact is the round it first appears in (0 for
+# given facts), i.e. the length of its shortest proof.
+class RuleEngine:
+    def __init__(self, rules=()):
+        self.atoms = {}
+        self.rules = []
+        self.by_premise = defaultdict(list)
+        for premises, conclusion in rules:
+            self.add_rule(premises, conclusion)
+
+    def atom(self, sentence):
+        return self.atoms.setdefault(sentence, len(self.atoms))
+
+    def add_rule(self, premises, conclusion):
+        premise_ids = {self.atom(p) for p in premises}
+        rule_id = len(self.rules)
+        self.rules.append((len(premise_ids), self.atom(conclusion)))
+        for premise in premise_ids:
+            self.by_premise[premise].append(rule_id)
+
+    # {atom id: depth} of everything derivable from `facts`
+    def closure(self, facts):
+        depth = {}
+        frontier = []
+        for fact in facts:
+            fact = self.atom(fact)
+            if fact not in depth:
+                depth[fact] = 0
+                frontier.append(fact)
+        missing = [count for count, _ in self.rules]
+        level = 0
+        while frontier:
+            level += 1
+            derived = []
+            for fact in frontier:
+                for rule_id in self.by_premise.get(fact, ()):
+                    missing[rule_id] -= 1
+                    if missing[rule_id] == 0:
+                        conclusion = self.rules[rule_id][1]
+                        if conclusion not in depth:
+                            depth[conclusion] = level
+                            derived.append(conclusion)
+            frontier = derived
+        return depth
+
+    # (entailed, proof depth or None)
+    def entails(self, facts, statement):
+        depth = self.closure(facts).get(self.atoms.get(normalize(statement)))
+        return depth is not None, depth
+
+
+def solve(context, statement):
+    facts, rules = parse_theory(context)
+    return RuleEngine(rules).entails(facts, statement)
+
+
+# Gold entailment and proof depth of every row (optionally filtered with
+# `where` predicates). Yields dicts with the row id, the stored flag and
+# depth, and what the engine derives.
+def label_rows(path, where=None):
+    path = resolve_path(path)
+    table, rows = columnar.scan(path, columns=COLUMNS, where=where)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    columns = {name: table.column(name).to_pylist() for name in COLUMNS}
+    for position in range(table.num_rows):
+        entailed, proof_depth = solve(columns["context"][position], columns["statement"][position])
+        row = rows[position] if rows is not None else position
+        yield {
+            "id": f"{stem}:{row}",
+            "flag": columns["flag"][position] == "True",
+            "depth": columns["depth"][position],
+            "entailed": entailed,
+            "proof_depth": proof_depth,
+        }
+
+
+# Compare the stored True/False labels with the derived ones, per depth
+def verify_dataset(path, where=None):
+    report = {"checked": 0, "ok": 0, "mismatch": [], "by_depth": {}, "proof_depths": Counter()}
+    for row in label_rows(path, where=where):
+        report["checked"] += 1
+        stats = report["by_depth"].setdefault(row["depth"], {"rows": 0, "ok": 0})
+        stats["rows"] += 1
+        if row["entailed"] == row["flag"]:
+            report["ok"] += 1
+            stats["ok"] += 1
+        else:
+            report["mismatch"].append(row)
+        if row["entailed"]:
+            report["proof_depths"][row["proof_depth"]] += 1
+    return report
+
+
+# Copy a ruletaker parquet file adding the "entailed" and "proof_depth"
+# columns, so runs can be filtered with --where proof_depth=3
+def annotate(path, output):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    path = resolve_path(path)
+    labels = list(label_rows(path))
+    table = columnar.open_dataset(path).to_table()
+    table = table.append_column("entailed", pa.array([row["entailed"] for row in labels]))
+    table = table.append_column(
+        "proof_depth", pa.array([row["proof_depth"] for row in labels], type=pa.int64()))
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    pq.write_table(table, output)
+    return table.num_rows
@@ -0,0 +1,317 @@
+import asyncio
+import copy
+import functools
+import json
+import os
+import time
+
+from checkpoint import Checkpoint, input_fingerprint, job_fingerprint
+from consistency import DEFAULT_CONFIDENCE, DEFAULT_PARALLEL, vote
+from data import Dataset
+from engine import DEFAULT_CONCURRENCY, ask, evaluate_async
+from metrics import Metrics, get_metrics, label, price_of, set_metrics
+from prompts import build_prompt, load_text
+from ratelimit import backoff_delay
+from scoring import SCORERS, TYPED_SCORERS, triplet_score
+
+CONFIGS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "configs")
+
+DEFAULT_CONFIG = {
+    "dataset": {"path": None, "flat": False},
+    "model": {
+        "provider": "gemini",
+        "name": "gemini-2.0-flash-exp",
+        "generation_config": {
+            "temperature": 1,
+            "top_p": 0.95,
+            "top_k": 40,
+            "max_output_tokens": 8192,
+            "response_mime_type": "text/plain",
+        },
+    },
+    "system_instruction": None,
+    "template": "answer_integer",
+    "scorer": "list",
+    "summary": "accuracy",
+    # Reintentos de una pregunta ante cualquier error (los 429 los reintenta el limiter)
+    "retries": 0,
+    # Leer la respuesta en streaming y cortarla al cerrar </answer>
+    "stream": False,
+    # Preguntas por peticion (ver batching.py); 1 = una peticion por pregunta
+    "batch_size": 1,
+    # Muestras por pregunta con voto por mayoria (ver consistency.py); se deja
+    # de muestrear cuando el voto ya esta decidido con `vote_confidence`
+    "samples": 1,
+    "vote_confidence": 0.95,
+    # Esquema de la respuesta del dataset (schemas.py); con structured=True el
+    # proveedor devuelve JSON validado con pydantic en vez de <answer>
+    "schema": None,
+    "structured": False,
+}
+
+
+def merge_config(base, override):
+    merged = copy.deepcopy(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_config(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def list_configs():
+    return sorted(f[:-5] for f in os.listdir(CONFIGS_DIR) if f.endswith(".json"))
+
+
+# Load a config by name (configs/<name>.json) or by path, filled with defaults
+def load_config(name):
+    path = name if name.endswith(".json") else os.path.join(CONFIGS_DIR, f"{name}.json")
+    with open(path, "r", encoding="utf8") as f:
+        config = json.load(f)
+    config.setdefault("name", os.path.splitext(os.path.basename(path))[0])
+    return merge_config(DEFAULT_CONFIG, config)
+
+
+# Process one question and evaluate its answer; the raw response is kept
+# under "response". With a `batcher` the prompt is packed with other questions into one request;
+# with `samples` > 1 the answer is a self-consistency vote over several samples.
+# `slots` is the request semaphore shared by the jobs of a sweep (see engine.ask).
+async def evaluate_question(model, template, scorer, retries, idx, question, answer, options=None,
+                            stream=False, batcher=None, samples=1, confidence=DEFAULT_CONFIDENCE,
+                            slots=None):
+    attempt = 0
+    started = time.perf_counter()
+    while True:
+        try:
+            print(f"processing question {idx+1}")
+            prompt = build_prompt(template, question, options)
+            score = lambda text: {**scorer(text, answer), "response": text}  # noqa: E731
+            if samples > 1:
+                sample = lambda i: ask(model, prompt, stream=stream, sample=i, slots=slots)  # noqa: E731
+                scored = await vote(sample, score, samples, confidence=confidence)
+            elif batcher is not None:
+                scored = score(await batcher.submit(prompt))
+            else:
+                scored = score(await ask(model, prompt, stream=stream, slots=slots))
+            result = {"question": question, **scored}
+
+            print("=" * 53)
+            print(f"\n- Given answer -> {result['received']}")
+            print(f"- Expected answer -> {result['expected']}")
+            print("=" * 53, "\n\n")
+            get_metrics().record("question", seconds=time.perf_counter() - started,
+                                 retries=attempt, correct=result["correct"])
+            return result
+
+        except Exception as e:
+            print(f"Error processing question {idx+1}: {str(e)}")
+            attempt += 1
+            if attempt > retries:
+                get_metrics().record("question", seconds=time.perf_counter() - started,
+                                     retries=attempt - 1, error=str(e))
+                return {
+                    "question": question,
+                    "expected": answer,
+                    "error": str(e)
+                }
+            wait_time = backoff_delay(attempt)
+            print(f"Retrying in {wait_time:.1f} seconds...")
+            await asyncio.sleep(wait_time)
+
+
+# Keys of a stored result that do not come from the scorer
+STORED_KEYS = ("id", "question", "fingerprint", "response", "votes", "samples")
+
+
+# A stored result graded again: `scored` replaces every scorer field (a stale
+# parse_error or error goes away), the rest of the result is kept
+def rescored(result, scored):
+    return {**{key: result[key] for key in STORED_KEYS if key in result}, **scored}
+
+
+def report(config, correct_count, detailed_results):
+    total = len(detailed_results)
+    # Print summary
+    accuracy = (correct_count / total) * 100 if total else 0.0
+    print(f"[{config['name']}] Accuracy: {accuracy:.2f}% ({correct_count}/{total})")
+
+    # Print detailed results
+    print("\nDetailed Results:")
+    for i, result in enumerate(detailed_results):
+        if 'error' in result:
+            print(f"Q{i+1}: ERROR - {result['error']}")
+        else:
+            status = "✓ OK" if result['correct'] else "✗ FAIL"
+            print(
+                f"Q{i+1}: {status} Expected {result['expected']}, Got {result['received']}")
+
+    if config["summary"] == "triplet":
+        print(f"\nScore: {triplet_score(detailed_results):.2f}")
+
+
+# Scorer of a config: the named one, or its structured output wrapper
+def make_scorer(config):
+    if config.get("structured"):
+        from schemas import structured_scorer
+
+        return structured_scorer(config["scorer"], config["schema"])
+    return SCORERS[config["scorer"]]
+
+
+# Load everything a config needs before talking to the model. Only the
+# dataset index is read here; records are loaded when the job runs.
+def prepare_config(config, limit=None, shard=None, sample=None):
+    if config["batch_size"] > 1 and config["samples"] > 1:
+        raise ValueError(f"[{config['name']}] batch_size and samples cannot be combined")
+    if config["structured"] and (config["schema"] is None or config["batch_size"] > 1):
+        raise ValueError(f"[{config['name']}] structured output needs a schema and batch_size 1")
+    scorer = make_scorer(config)
+    dataset = Dataset(config["dataset"]["path"], flat=config["dataset"]["flat"],
+                      where=config["dataset"].get("where"))
+    if shard is not None:
+        dataset = dataset.shard(*shard)
+    if sample is not None:
+        dataset = dataset.sample(sample)
+    if limit is not None:
+        dataset = dataset[:limit]
+    return {
+        "config": config,
+        "dataset": dataset,
+        "template": load_text(config["template"]),
+        "system_instruction": load_text(config["system_instruction"]),
+        "scorer": scorer,
+    }
+
+
+def print_dry_run(job):
+    config = job["config"]
+    print(f"[{config['name']}] {len(job['dataset'])} items from {config['dataset']['path']}, "
+          f"model {config['model']['provider']}/{config['model']['name']}, "
+          f"scorer {config['scorer']}")
+    if len(job["dataset"]):
+        record = job["dataset"][0]
+        print(build_prompt(job["template"], record.question, record.options))
+
+
+# Input fingerprint of every question of a prepared config. The scorer is
+# not part of it: stored answers are re-scored offline (see rescore.py).
+def fingerprints(job):
+    config = job["config"]
+    model = config["model"]
+    shared = job_fingerprint(
+        job["system_instruction"], job["template"], model.get("provider"), model["name"],
+        model.get("generation_config"), config["structured"] and config["schema"],
+        config["samples"], config["samples"] > 1 and config["vote_confidence"])
+    return [input_fingerprint(shared, record.question, record.options) for record in job["dataset"]]
+
+
+# Evaluate a prepared config. `slots` is shared when several configs run
+# at the same time (see sweep.py) and taken once per model call. With `incremental` only the questions whose
+# inputs changed since the checkpoint was written are asked again.
+async def run_job_async(job, concurrency=DEFAULT_CONCURRENCY, checkpoint_dir="checkpoints",
+                        resume=False, slots=None, incremental=False):
+    from providers import create_model
+
+    config = job["config"]
+    model_config = config["model"]
+    if config["structured"]:
+        model_config = {**model_config, "response_schema": config["schema"]}
+    model = create_model(model_config, job["system_instruction"])
+    records = list(job["dataset"])
+    get_metrics().prices[config["name"]] = price_of(config["model"])
+    batcher = None
+    if config["batch_size"] > 1:
+        from batching import Batcher
+
+        batcher = Batcher(lambda prompt, answers: ask(model, prompt, stream=config["stream"],
+                                                      answers=answers, slots=slots),
+                          config["batch_size"])
+        # `concurrency` sigue contando peticiones en vuelo, no preguntas
+        concurrency *= config["batch_size"]
+    elif config["samples"] > 1:
+        concurrency = max(1, concurrency // min(config["samples"], DEFAULT_PARALLEL))
+
+    async def evaluate_one(idx, question, answer):
+        label(job=config["name"], question=records[idx].id)
+        scorer = job["scorer"]
+        if config["scorer"] in TYPED_SCORERS:
+            scorer = functools.partial(scorer, answer_type=records[idx].type)
+        return await evaluate_question(
+            model, job["template"], scorer, config["retries"],
+            idx, question, answer, records[idx].options, stream=config["stream"],
+            batcher=batcher, samples=config["samples"], confidence=config["vote_confidence"],
+            slots=slots)
+
+    # answers reused by an incremental run are graded again: the answer key or
+    # the scorer may have changed since (neither is part of the fingerprint)
+    def rescore_stored(idx, result):
+        if result.get("response") is None:
+            return result
+        scorer = job["scorer"]
+        if config["scorer"] in TYPED_SCORERS:
+            scorer = functools.partial(scorer, answer_type=records[idx].type)
+        try:
+            return rescored(result, scorer(result["response"], records[idx].answer))
+        except Exception as e:
+            return rescored(result, {"expected": records[idx].answer, "error": str(e)})
+
+    checkpoint = Checkpoint(os.path.join(checkpoint_dir, f"{config['name']}.jsonl"))
+    try:
+        outcome = await evaluate_async(
+            evaluate_one, [record.question for record in records],
+            [record.answer for record in records], concurrency,
+            checkpoint=checkpoint, resume=resume,
+            ids=[record.id for record in records], fingerprints=fingerprints(job),
+            incremental=incremental, rescore=rescore_stored)
+    finally:
+        # libera la cache de contexto del proveedor, si la hay
+        if hasattr(model, "aclose"):
+            await model.aclose()
+    if batcher is not None:
+        print(f"[{config['name']}] {batcher.requests} requests for {len(records)} questions "
+              f"(batches of {config['batch_size']})")
+    return outcome
+
+
+# Run one config end to end. With dry_run nothing is sent (and no provider
+# SDK is imported): the dataset is loaded and the first prompt is printed.
+# Per request and per question metrics go to <metrics_dir>/<name>.jsonl/.prom
+# and the run is stored in the results warehouse (EVAL_WAREHOUSE, see warehouse.py).
+def run_config(config, concurrency=DEFAULT_CONCURRENCY, checkpoint_dir="checkpoints",
+               resume=False, dry_run=False, limit=None, shard=None, sample=None,
+               metrics_dir="metrics", incremental=False):
+    job = prepare_config(config, limit=limit, shard=shard, sample=sample)
+    if dry_run:
+        print_dry_run(job)
+        return None
+
+    metrics = Metrics()
+    set_metrics(metrics)
+    started = time.time()
+    from providers import closing_clients
+
+    correct_count, detailed_results = asyncio.run(closing_clients(run_job_async(
+        job, concurrency=concurrency, checkpoint_dir=checkpoint_dir, resume=resume,
+        incremental=incremental)))
+    report(config, correct_count, detailed_results)
+    metrics.print_summary()
+    metrics.export(os.path.join(metrics_dir, config["name"]))
+    store_runs([(job, detailed_results)], metrics, started)
+    return correct_count, detailed_results
+
+
+# Store finished jobs, as (job, results) pairs, in the results warehouse
+def store_runs(outcomes, metrics, started):
+    from warehouse import Warehouse
+
+    warehouse = Warehouse.from_env()
+    if warehouse is None:
+        return
+    try:
+        for job, results in outcomes:
+            run_id = warehouse.record_run(job["config"], [record.id for record in job["dataset"]],
+                                          results, metrics, started=started)
+            print(f"[{job['config']['name']}] stored as run {run_id} in {warehouse.path}")
+    finally:
+        warehouse.close()
@@ -0,0 +1,114 @@
+import re
+from typing import List
+
+from pydantic import BaseModel, Field, ValidationError
+
+# Salida estructurada: el proveedor genera JSON que cumple el esquema de la
+# respuesta del dataset y se valida con pydantic, sin buscar <answer> con
+# expresiones regulares. Cada esquema sabe dar su valor en la forma que
+# esperan los jueces de scoring.py.
+
+
+class IntAnswer(BaseModel):
+    answer: int = Field(description="the integer value asked for")
+
+    def value(self):
+        return self.answer
+
+
+class IntListAnswer(BaseModel):
+    answers: List[int] = Field(description="one integer per question, in order")
+
+    def value(self):
+        return self.answers
+
+
+class OptionAnswer(BaseModel):
+    option: int = Field(description="number of the correct option")
+
+    def value(self):
+        return [self.option]
+
+
+class ValueAnswer(BaseModel):
+    answer: str = Field(description="the final value, e.g. 12, -3.5, 2/9, True or (1, 2)")
+
+    def value(self):
+        return self.answer.strip()
+
+
+class BoolAnswer(BaseModel):
+    answer: bool = Field(description="whether the statement follows from the facts and rules")
+
+    def value(self):
+        return self.answer
+
+
+# code_output (one question), code_output/discrete (grouped), logic, math, ruletaker
+SCHEMAS = {
+    "int": IntAnswer,
+    "int_list": IntListAnswer,
+    "option": OptionAnswer,
+    "value": ValueAnswer,
+    "bool": BoolAnswer,
+}
+
+# Palabras clave de JSON Schema que entienden todos los proveedores
+_SCHEMA_KEYS = {"type", "description", "properties", "required", "items", "enum"}
+
+
+def _strip(node):
+    schema = {key: value for key, value in node.items() if key in _SCHEMA_KEYS}
+    if "properties" in schema:
+        schema["properties"] = {key: _strip(value) for key, value in schema["properties"].items()}
+    if "items" in schema:
+        schema["items"] = _strip(schema["items"])
+    return schema
+
+
+# JSON Schema of a response, without the pydantic extras (titles, $defs)
+def json_schema(name):
+    return _strip(SCHEMAS[name].model_json_schema())
+
+
+# response_schema for google.generativeai (OpenAPI types in upper case)
+def gemini_schema(name):
+    def upper(node):
+        node = dict(node, type=node["type"].upper())
+        if "properties" in node:
+            node["properties"] = {key: upper(value) for key, value in node["properties"].items()}
+        if "items" in node:
+            node["items"] = upper(node["items"])
+        return node
+
+    return upper(json_schema(name))
+
+
+# response_format of OpenAI structured outputs (strict mode)
+def openai_response_format(name):
+    return {"type": "json_schema", "json_schema": {
+        "name": name, "strict": True, "schema": {**json_schema(name), "additionalProperties": False}}}
+
+
+_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+# Scorer for structured responses: validates the JSON against the schema and
+# grades its value with the judge of `scorer` (scoring.JUDGES), no tags
+# involved. An invalid response is recorded as a parse error, like
+# malformed tags.
+def structured_scorer(scorer, name):
+    from scoring import JUDGES
+
+    model = SCHEMAS[name]
+    judge = JUDGES[scorer]
+
+    def score(response_text, answer, **options):
+        try:
+            parsed = model.model_validate_json(_FENCE.sub("", response_text.strip()))
+        except ValidationError as e:
+            return {"expected": answer, "received": response_text, "correct": False,
+                    "parse_error": f"{name} schema: {e.errors()[0]['msg']}"}
+        return judge(parsed.value(), answer, **options)
+
+    return score
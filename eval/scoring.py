@@ -0,0 +1,169 @@
+from parsing import parse_answer
+
+# Los scorers no lanzan excepciones por respuestas mal formadas: el fallo de
+# parseo queda registrado en el resultado ("parse_error") y no se reintenta.
+
+
+def _unparsed(outcome, answer):
+    return {"expected": answer, "received": outcome.raw, "correct": False,
+            "parse_error": outcome.error}
+
+
+# Each scorer parses the <answer> tag and hands the value to its judge. The
+# judges grade an already parsed value, so structured output (schemas.py)
+# scores the JSON value pydantic validated without going through the tags.
+
+
+# Grouped questions: a list with one value per question, compared
+# numerically against the expected list
+def judge_list(selection, answer):
+    # Normalize to list for comparison
+    if not isinstance(answer, list):
+        answer = [answer]
+
+    # Convert tuples to lists for comparison
+    answer = [list(item) if isinstance(item, tuple)
+              else item for item in answer]
+
+    # Evaluate response
+    is_correct = True
+    if len(selection) != len(answer):
+        is_correct = False
+    else:
+        for inner_index in range(len(answer)):
+            try:
+                if float(selection[inner_index]) != float(answer[inner_index]):
+                    is_correct = False
+                    break
+            except (ValueError, TypeError, OverflowError):
+                is_correct = False
+                break
+
+    return {"expected": answer, "received": selection, "correct": is_correct}
+
+
+# Single questions: one integer
+def judge_int(selection, answer):
+    if isinstance(answer, int):
+        # exacto: float() de un entero de cientos de digitos desborda
+        is_correct = selection == answer
+    elif isinstance(answer, float):
+        is_correct = selection == answer
+    else:
+        is_correct = str(selection) == str(answer)
+
+    return {"expected": answer, "received": selection, "correct": is_correct}
+
+
+# Free-form values (math): numeric comparison when both sides are numbers,
+# element-wise for comma separated tuples, plain text otherwise
+def judge_value(selection, answer):
+    def same(received, expected):
+        try:
+            return float(received) == float(expected)
+        except ValueError:
+            return received.strip().lower() == expected.strip().lower()
+
+    expected_parts = str(answer).split(",")
+    received_parts = str(selection).split(",")
+    is_correct = len(expected_parts) == len(received_parts) and all(
+        same(received, expected) for received, expected in zip(received_parts, expected_parts))
+    return {"expected": answer, "received": selection, "correct": is_correct}
+
+
+# True/False answers (ruletaker)
+def judge_bool(selection, answer):
+    expected = str(answer).strip().lower() == "true"
+    return {"expected": answer, "received": selection, "correct": selection is expected}
+
+
+# Typed answers (math t in int/float/bool/string/tuple): per-type
+# normalization and tolerances from checker.py
+def judge_typed(selection, answer, answer_type=None):
+    from checker import check, infer_type
+
+    answer_type = answer_type or infer_type(answer)
+    return {"expected": answer, "received": selection, "type": answer_type,
+            "correct": check(selection, answer, answer_type)}
+
+
+def _scorer(kind, judge):
+    def score(response_text, answer):
+        outcome = parse_answer(response_text, kind)
+        if not outcome.ok:
+            return _unparsed(outcome, answer)
+        return judge(outcome.value, answer)
+
+    return score
+
+
+score_list = _scorer("list", judge_list)
+score_int = _scorer("int", judge_int)
+score_value = _scorer("text", judge_value)
+# Spanish answers are accepted too (parsing.BOOLEANS)
+score_bool = _scorer("bool", judge_bool)
+
+
+# One live answer: scalar checker.check (no NumPy arrays per response)
+def score_typed(response_text, answer, answer_type=None):
+    from checker import infer_type
+
+    outcome = parse_answer(response_text, "text")
+    if not outcome.ok:
+        return {**_unparsed(outcome, answer), "type": answer_type or infer_type(answer)}
+    return judge_typed(outcome.value, answer, answer_type)
+
+
+# Column version of score_typed: every response is parsed, then all parsed
+# answers are checked in one checker.score_batch call
+def score_typed_batch(responses, answers, answer_types):
+    from checker import infer_type, score_batch
+
+    results = []
+    parsed = []
+    for response_text, answer, answer_type in zip(responses, answers, answer_types):
+        answer_type = answer_type or infer_type(answer)
+        outcome = parse_answer(response_text, "text")
+        if not outcome.ok:
+            results.append({**_unparsed(outcome, answer), "type": answer_type})
+            continue
+        parsed.append(len(results))
+        results.append({"expected": answer, "received": outcome.value, "type": answer_type})
+    correct = score_batch([results[i]["received"] for i in parsed],
+                          [results[i]["expected"] for i in parsed],
+                          [results[i]["type"] for i in parsed])
+    for i, ok in zip(parsed, correct):
+        results[i]["correct"] = bool(ok)
+    return results
+
+
+SCORERS = {
+    "list": score_list,
+    "int": score_int,
+    "value": score_value,
+    "bool": score_bool,
+    "typed": score_typed,
+}
+# Scorers that also receive the record type as `answer_type`
+TYPED_SCORERS = {"typed"}
+JUDGES = {
+    "list": judge_list,
+    "int": judge_int,
+    "value": judge_value,
+    "bool": judge_bool,
+    "typed": judge_typed,
+}
+# Column versions (responses, answers, answer_types) used to re-score stored runs
+BATCH_SCORERS = {"typed": score_typed_batch}
+
+
+# code_output groups three inputs per function: each group scores 2**hits / 8
+def triplet_score(results):
+    temp = 0
+    scores = []
+    for i, result in enumerate(results):
+        temp += (1 if result.get('correct') else 0)
+        if i % 3 == 2:
+            scores.append((2**temp)/8)
+            temp = 0
+    return sum(scores)/len(scores) if scores else 0.0
@@ -0,0 +1,144 @@
+import asyncio
+import csv
+import itertools
+import json
+import os
+import re
+import time
+
+from engine import DEFAULT_CONCURRENCY
+from metrics import Metrics, set_metrics
+from runner import load_config, merge_config, prepare_config, print_dry_run, run_job_async, store_runs
+from scoring import triplet_score
+
+SWEEPS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sweeps")
+
+TABLE_COLUMNS = ["job", "dataset", "style", "params", "items", "correct",
+                 "accuracy", "errors", "score", "seconds", "failed"]
+
+
+# Load a sweep by name (sweeps/<name>.json) or by path
+def load_sweep(name):
+    path = name if name.endswith(".json") else os.path.join(SWEEPS_DIR, f"{name}.json")
+    with open(path, "r", encoding="utf8") as f:
+        sweep = json.load(f)
+    sweep.setdefault("name", os.path.splitext(os.path.basename(path))[0])
+    return sweep
+
+
+def _set_path(config, dotted_key, value):
+    *parents, last = dotted_key.split(".")
+    for key in parents:
+        config = config.setdefault(key, {})
+    config[last] = value
+
+
+# Expand configs x styles x matrix into one config per job.
+# A style is a set of config overrides; "only" restricts it to some configs.
+def expand_sweep(sweep):
+    styles = sweep.get("styles") or {"plain": {}}
+    matrix = sweep.get("matrix", {})
+    keys = list(matrix)
+    jobs = []
+    for name in sweep["configs"]:
+        for style, overrides in styles.items():
+            overrides = dict(overrides)
+            only = overrides.pop("only", None)
+            if only is not None and name not in only:
+                continue
+            for values in itertools.product(*(matrix[key] for key in keys)):
+                config = merge_config(load_config(name), overrides)
+                labels = [name, style]
+                for key, value in zip(keys, values):
+                    _set_path(config, key, value)
+                    labels.append(f"{key.rsplit('.', 1)[-1]}={value}")
+                config["name"] = re.sub(r"[^\w.=-]", "_", "-".join(labels))
+                config["style"] = style
+                config["params"] = dict(zip(keys, values))
+                jobs.append(config)
+    return jobs
+
+
+def _table_row(config, correct, results, seconds, failed=None):
+    total = len(results)
+    return {
+        "job": config["name"],
+        "dataset": config["dataset"]["path"],
+        "style": config["style"],
+        "params": " ".join(f"{key.rsplit('.', 1)[-1]}={value}"
+                           for key, value in config["params"].items()),
+        "items": total,
+        "correct": correct,
+        "accuracy": round(100 * correct / total, 2) if total else 0.0,
+        "errors": sum(1 for result in results if "error" in result),
+        "score": round(triplet_score(results), 4) if config["summary"] == "triplet" else "",
+        "seconds": round(seconds, 1),
+        "failed": failed or "",
+    }
+
+
+def write_table(rows, output):
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=TABLE_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    widths = {column: max(len(column), *(len(str(row[column])) for row in rows))
+              for column in TABLE_COLUMNS}
+    print(" | ".join(column.ljust(widths[column]) for column in TABLE_COLUMNS))
+    print("-+-".join("-" * widths[column] for column in TABLE_COLUMNS))
+    for row in rows:
+        print(" | ".join(str(row[column]).ljust(widths[column]) for column in TABLE_COLUMNS))
+
+
+# All jobs run on one event loop: each keeps its own queue but they share
+# `concurrency` request slots (one per model call, see engine.ask) and the
+# process-wide rate limiter, so whenever one job is waiting (slow answers,
+# retries) the others use the quota.
+# A job that fails as a whole (provider setup, checkpoint...) does not stop
+# the others: its error is returned in place of its results.
+async def _run_jobs(jobs, concurrency, checkpoint_dir, resume, incremental=False):
+    slots = asyncio.Semaphore(concurrency)
+
+    async def timed(job):
+        start = time.perf_counter()
+        try:
+            correct, results = await run_job_async(
+                job, concurrency=concurrency, checkpoint_dir=checkpoint_dir,
+                resume=resume, slots=slots, incremental=incremental)
+        except Exception as e:
+            print(f"[{job['config']['name']}] job failed: {e!r}")
+            return 0, [], time.perf_counter() - start, repr(e)
+        return correct, results, time.perf_counter() - start, None
+
+    from providers import closing_clients
+
+    return await closing_clients(asyncio.gather(*(timed(job) for job in jobs)))
+
+
+def run_sweep(sweep, concurrency=DEFAULT_CONCURRENCY, checkpoint_dir="checkpoints",
+              resume=False, dry_run=False, limit=None, shard=None, sample=None, output=None,
+              metrics_dir="metrics", incremental=False):
+    configs = expand_sweep(sweep)
+    jobs = [prepare_config(config, limit=limit, shard=shard, sample=sample) for config in configs]
+    print(f"Sweep {sweep['name']}: {len(jobs)} jobs, "
+          f"{sum(len(job['dataset']) for job in jobs)} items")
+    if dry_run:
+        for job in jobs:
+            print_dry_run(job)
+        return None
+
+    metrics = Metrics()
+    set_metrics(metrics)
+    started = time.time()
+    outcomes = asyncio.run(_run_jobs(jobs, concurrency, checkpoint_dir, resume, incremental))
+    rows = [_table_row(config, *outcome) for config, outcome in zip(configs, outcomes)]
+    write_table(rows, output or os.path.join("results", f"{sweep['name']}.csv"))
+    metrics.print_summary()
+    metrics.export(os.path.join(metrics_dir, sweep["name"]))
+    # los jobs fallidos no tienen resultados que guardar
+    store_runs([(job, results) for job, (_, results, _, failed) in zip(jobs, outcomes)
+                if failed is None], metrics, started)
+    return rows
@@ -0,0 +1,252 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+
+# Almacen de resultados de todas las ejecuciones en SQLite: configuracion de
+# cada run y, por pregunta, respuesta cruda, respuesta parseada, acierto,
+# latencia y tokens. Indexado por run, dataset e ID de pregunta para poder
+# comparar modelos, temperaturas o estilos con una consulta. Las respuestas
+# crudas se guardan comprimidas y una sola vez por contenido (ver rescore.py).
+
+DEFAULT_WAREHOUSE_PATH = os.path.join("results", "warehouse.sqlite")
+
+# Columnas de `runs` por las que se puede agrupar la precision
+RUN_COLUMNS = ("run_id", "name", "dataset", "provider", "model", "temperature", "template",
+               "system_instruction", "scorer", "style", "started")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    dataset TEXT NOT NULL,
+    provider TEXT,
+    model TEXT,
+    temperature REAL,
+    template TEXT,
+    system_instruction TEXT,
+    scorer TEXT,
+    style TEXT,
+    config TEXT NOT NULL,
+    started REAL NOT NULL,
+    finished REAL,
+    items INTEGER,
+    correct INTEGER
+);
+CREATE INDEX IF NOT EXISTS runs_name ON runs (name);
+CREATE INDEX IF NOT EXISTS runs_dataset ON runs (dataset);
+-- Narrow rows (no response text) so scans over millions of results stay fast
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL,
+    question_id TEXT NOT NULL,
+    dataset TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    correct INTEGER,
+    expected TEXT,
+    received TEXT,
+    parse_error TEXT,
+    error TEXT,
+    answer_type TEXT,
+    latency REAL,
+    prompt_tokens INTEGER,
+    output_tokens INTEGER,
+    requests INTEGER,
+    PRIMARY KEY (run_id, question_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_question ON results (dataset, question_id, run_id);
+CREATE TABLE IF NOT EXISTS responses (
+    run_id INTEGER NOT NULL,
+    question_id TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    PRIMARY KEY (run_id, question_id)
+) WITHOUT ROWID;
+-- zlib-compressed raw responses, stored once per distinct text
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    data BLOB NOT NULL
+) WITHOUT ROWID;
+"""
+RESULT_COLUMNS = ("run_id", "question_id", "dataset", "position", "correct", "expected", "received",
+                  "parse_error", "error", "answer_type", "latency", "prompt_tokens",
+                  "output_tokens", "requests")
+
+
+def _json(value):
+    return None if value is None else json.dumps(value, ensure_ascii=False, default=str)
+
+
+def compress(text):
+    data = text.encode("utf8")
+    return hashlib.sha1(data).hexdigest(), zlib.compress(data, 6)
+
+
+def decompress(data):
+    return zlib.decompress(data).decode("utf8")
+
+
+# Latency, tokens and request count per question from the run metrics
+def _question_costs(metrics, job):
+    costs = {}
+    for record in metrics.records:
+        if record["kind"] != "request" or record.get("job") != job or record.get("question") is None:
+            continue
+        entry = costs.setdefault(record["question"], {"latency": 0.0, "prompt_tokens": 0,
+                                                      "output_tokens": 0, "requests": 0})
+        entry["latency"] += record.get("latency") or 0.0
+        entry["prompt_tokens"] += record.get("prompt_tokens") or 0
+        entry["output_tokens"] += record.get("output_tokens") or 0
+        entry["requests"] += 1
+    return costs
+
+
+class Warehouse:
+    def __init__(self, path=DEFAULT_WAREHOUSE_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def _store_responses(self, rows):
+        blobs = {}
+        links = []
+        for run_id, question_id, text in rows:
+            digest, data = compress(text)
+            blobs[digest] = data
+            links.append((run_id, question_id, digest))
+        self.conn.executemany("INSERT OR IGNORE INTO blobs VALUES (?, ?)", blobs.items())
+        self.conn.executemany("INSERT OR REPLACE INTO responses VALUES (?, ?, ?)", links)
+
+    @classmethod
+    def from_env(cls):
+        path = os.environ.get("EVAL_WAREHOUSE", DEFAULT_WAREHOUSE_PATH)
+        if path.lower() in ("", "0", "off", "none"):
+            return None
+        return cls(path)
+
+    # Store one finished run: its config and every question result, with the
+    # latency and tokens recorded in `metrics` (or given per question id in
+    # `costs`). Returns the new run_id.
+    def record_run(self, config, ids, results, metrics=None, started=None, costs=None):
+        model = config["model"]
+        generation = model.get("generation_config") or {}
+        correct = sum(1 for result in results if result.get("correct"))
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO runs (name, dataset, provider, model, temperature, template,"
+                " system_instruction, scorer, style, config, started, finished, items, correct)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (config["name"], config["dataset"]["path"], model.get("provider"), model.get("name"),
+                 generation.get("temperature"), config.get("template"),
+                 config.get("system_instruction"), config.get("scorer"), config.get("style"),
+                 _json(config), started or time.time(), time.time(), len(results), correct))
+            run_id = cursor.lastrowid
+            if costs is None:
+                costs = _question_costs(metrics, config["name"]) if metrics is not None else {}
+            rows, responses = [], []
+            for position, (question_id, result) in enumerate(zip(ids, results)):
+                cost = costs.get(question_id, {})
+                rows.append((run_id, question_id, config["dataset"]["path"], position,
+                             None if "correct" not in result else int(bool(result["correct"])),
+                             _json(result.get("expected")), _json(result.get("received")),
+                             result.get("parse_error"), result.get("error"), result.get("type"),
+                             cost.get("latency"), cost.get("prompt_tokens"),
+                             cost.get("output_tokens"), cost.get("requests")))
+                if result.get("response") is not None:
+                    responses.append((run_id, question_id, result["response"]))
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO results ({', '.join(RESULT_COLUMNS)})"
+                f" VALUES ({', '.join('?' * len(RESULT_COLUMNS))})", rows)
+            self._store_responses(responses)
+        return run_id
+
+    def query(self, sql, params=()):
+        cursor = self.conn.execute(sql, params)
+        columns = [column[0] for column in cursor.description]
+        return columns, cursor.fetchall()
+
+    def runs(self, name=None):
+        where, params = ("WHERE name = ?", (name,)) if name else ("", ())
+        return self.query(
+            "SELECT run_id, name, dataset, provider, model, temperature, items, correct,"
+            " ROUND(100.0 * correct / MAX(items, 1), 2) AS accuracy,"
+            " datetime(started, 'unixepoch') AS started"
+            f" FROM runs {where} ORDER BY run_id", params)
+
+    # Accuracy grouped by run columns (model, temperature, style...).
+    # `where` holds (column, value) pairs on the same columns. Results are
+    # summed per run first (a scan in primary key order), then per group.
+    def accuracy(self, by=("run_id", "name"), where=()):
+        for column in list(by) + [column for column, _ in where]:
+            if column not in RUN_COLUMNS:
+                raise ValueError(f"Unknown column {column!r}, expected one of {RUN_COLUMNS}")
+        groups = ", ".join(f"runs.{column}" for column in by)
+        clause = " AND ".join(f"runs.{column} = ?" for column, _ in where)
+        return self.query(
+            f"SELECT {groups}, SUM(n) AS items, SUM(hits) AS correct,"
+            " ROUND(100.0 * SUM(hits) / SUM(n), 2) AS accuracy,"
+            " SUM(errors) AS errors, SUM(parse_errors) AS parse_errors,"
+            " ROUND(SUM(latency) / SUM(timed), 3) AS latency,"
+            " SUM(prompt_tokens) AS prompt_tokens, SUM(output_tokens) AS output_tokens"
+            " FROM (SELECT run_id, COUNT(*) AS n, COALESCE(SUM(correct), 0) AS hits,"
+            " SUM(error IS NOT NULL) AS errors, SUM(parse_error IS NOT NULL) AS parse_errors,"
+            " TOTAL(latency) AS latency, COUNT(latency) AS timed,"
+            " SUM(prompt_tokens) AS prompt_tokens, SUM(output_tokens) AS output_tokens"
+            " FROM results"
+            + (f" WHERE run_id IN (SELECT run_id FROM runs WHERE {clause})" if clause else "")
+            + f" GROUP BY run_id) JOIN runs USING (run_id) GROUP BY {groups} ORDER BY {groups}",
+            tuple(value for _, value in where))
+
+    # Questions answered differently by two runs (correctness or answer)
+    def diff(self, run_a, run_b):
+        return self.query(
+            "SELECT a.question_id, a.expected, a.received AS received_a, b.received AS received_b,"
+            " a.correct AS correct_a, b.correct AS correct_b"
+            " FROM results a JOIN results b ON b.run_id = ? AND b.question_id = a.question_id"
+            " WHERE a.run_id = ? AND (a.correct IS NOT b.correct OR a.received IS NOT b.received)"
+            " ORDER BY a.position", (run_b, run_a))
+
+    def response(self, run_id, question_id):
+        row = self.conn.execute(
+            "SELECT data FROM responses JOIN blobs USING (digest)"
+            " WHERE run_id = ? AND question_id = ?", (run_id, question_id)).fetchone()
+        return decompress(row[0]) if row else None
+
+    # Let `target` share the raw responses stored for `source`
+    def copy_responses(self, source, target):
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO responses"
+                              " SELECT ?, question_id, digest FROM responses WHERE run_id = ?",
+                              (target, source))
+
+    def run(self, run_id):
+        row = self.conn.execute("SELECT config FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"No run {run_id} in {self.path}")
+        return json.loads(row[0])
+
+    # Stored results of a run in order, as dicts with the result columns and
+    # the compressed raw response under "data" (None if there was none)
+    def results_of(self, run_id):
+        cursor = self.conn.execute(
+            f"SELECT {', '.join('results.' + column for column in RESULT_COLUMNS)}, blobs.data"
+            " FROM results LEFT JOIN responses USING (run_id, question_id)"
+            " LEFT JOIN blobs USING (digest) WHERE run_id = ? ORDER BY position", (run_id,))
+        for row in cursor:
+            yield dict(zip(RESULT_COLUMNS + ("data",), row))
+
+    def close(self):
+        self.conn.close()
+
+
+def print_table(columns, rows):
+    cells = [[("" if value is None else str(value)) for value in row] for row in rows]
+    widths = [max([len(column)] + [len(row[i]) for row in cells]) for i, column in enumerate(columns)]
+    print(" | ".join(column.ljust(width) for column, width in zip(columns, widths)))
+    print("-+-".join("-" * width for width in widths))
+    for row in cells:
+        print(" | ".join(value.ljust(width) for value, width in zip(row, widths)))
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Los modulos de eval/ se importan entre si por nombre (igual que __main__.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "eval"))
@@ -0,0 +1,69 @@
+import asyncio
+import re
+
+from batching import Batcher, build_batch_prompt
+from parsing import extract_answers
+
+
+def _questions(prompt):
+    return re.findall(r"### Question \d+\n\n(\S+)", prompt) or [prompt]
+
+
+# Fake model: packed prompts get answers only for the "easy" questions
+def _send(sent):
+    async def send(prompt, answers):
+        sent.append((_questions(prompt), answers))
+        if answers == 1:
+            return f"<answer>{prompt}</answer>"
+        return "".join(f'<answer id="{i}">{question}</answer>'
+                       for i, question in enumerate(_questions(prompt), start=1)
+                       if question.startswith("easy"))
+    return send
+
+
+def test_missing_packed_answers_are_re_asked_in_halves():
+    sent = []
+    batcher = Batcher(_send(sent), 4)
+    prompts = ["easy1", "hard2", "hard3", "hard4"]
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(prompt) for prompt in prompts))
+
+    responses = asyncio.run(run())
+    assert [extract_answers(response) for response in responses] == [[p] for p in prompts]
+    # lote de 4, luego las 3 sin respuesta en mitades (2 + 1), y la mitad de 2 en sueltas
+    assert sent == [(prompts, 4), (["hard2", "hard3"], 2), (["hard4"], 1),
+                    (["hard2"], 1), (["hard3"], 1)]
+    assert batcher.requests == 5
+
+
+def test_incomplete_batch_is_sent_after_max_wait():
+    sent = []
+    batcher = Batcher(_send(sent), 8, max_wait=0.01)
+
+    async def run():
+        return await asyncio.wait_for(
+            asyncio.gather(batcher.submit("easy1"), batcher.submit("easy2")), 1)
+
+    responses = asyncio.run(run())
+    assert sent == [(["easy1", "easy2"], 2)]
+    assert responses == ["<answer>easy1</answer>", "<answer>easy2</answer>"]
+
+
+def test_request_error_reaches_every_question():
+    async def send(prompt, answers):
+        raise RuntimeError("server error")
+
+    batcher = Batcher(send, 2)
+
+    async def run():
+        return await asyncio.gather(batcher.submit("a"), batcher.submit("b"),
+                                    return_exceptions=True)
+
+    assert [str(error) for error in asyncio.run(run())] == ["server error"] * 2
+
+
+def test_batch_prompt_numbers_the_questions():
+    prompt = build_batch_prompt(["first ", "second"])
+    assert "Below are 2 independent questions" in prompt
+    assert _questions(prompt) == ["first", "second"]
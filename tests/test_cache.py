@@ -0,0 +1,26 @@
+from cache import ResponseCache, cache_key
+
+
+def test_running_total_tracks_puts_and_eviction(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), max_bytes=100)
+    for i in range(10):
+        cache.put(f"k{i}", "x" * 30)
+    cache.put("k9", "y" * 10)
+    assert cache._total == cache._count_bytes() <= 100
+    assert cache.get("k9") == "y" * 10
+    assert cache.get("k0") is None
+    cache.close()
+
+
+def test_total_is_read_back_on_open(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = ResponseCache(path)
+    cache.put("a", "abc")
+    cache.close()
+    assert ResponseCache(path)._total == 3
+
+
+def test_streamed_responses_have_their_own_key():
+    model = type("Model", (), {"model_name": "m", "generation_config": {}})()
+    assert cache_key(model, "p") == cache_key(model, "p", sample=0, stream=False)
+    assert cache_key(model, "p") != cache_key(model, "p", stream=True)
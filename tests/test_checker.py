@@ -0,0 +1,56 @@
+import pytest
+
+from checker import check, score_batch
+from checkpoint import Checkpoint
+from rescore import rescore_checkpoint
+from runner import load_config
+
+
+def test_score_batch_accepts_list_answers():
+    correct = score_batch([[1, 2], [1, 2], "[1, 2]"], [[1, 2], [2, 1], [1, 2]])
+    assert correct.tolist() == [True, False, True]
+
+
+def test_rescore_checkpoint_with_list_answers(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / "algs.jsonl"))
+    checkpoint.append("alg0", {"question": "q", "expected": [3, -1, 7], "received": [3, -1, 7],
+                               "correct": True, "response": "<answer>[3, -1, 7]</answer>"})
+    checkpoint.append("alg1", {"question": "q", "expected": [5, 5, 5], "received": [5, 4, 5],
+                               "correct": True, "response": "<answer>[5, 4, 5]</answer>"})
+    results, before, after = rescore_checkpoint(checkpoint, load_config("algs"))
+    assert (before, after) == (2, 1)
+    assert [result["correct"] for result in results] == [True, False]
+    assert results[1]["id"] == "alg1"
+
+
+def test_rescore_checkpoint_uses_the_config_scorer(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / "ruletaker.jsonl"))
+    checkpoint.append("r0", {"question": "q", "expected": "False", "received": False,
+                             "correct": False, "response": "<answer>Falso</answer>"})
+    results, before, after = rescore_checkpoint(checkpoint, load_config("ruletaker"))
+    assert (before, after) == (0, 1)
+
+
+def test_rescore_old_checkpoint_without_responses(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / "math.jsonl"))
+    checkpoint.append("m0", {"question": "q", "expected": "0.5", "received": "1/2", "correct": False})
+    checkpoint.append("m1", {"question": "q", "expected": [1, 2], "received": [1, 2], "correct": True})
+    _, before, after = rescore_checkpoint(checkpoint, load_config("math"))
+    assert (before, after) == (1, 2)
+
+
+CASES = [
+    ("12", "12", "int"), ("12.0", "12", "int"), ("12.5", "12", "int"),
+    ("9007199254740993", "9007199254740993", "int"), ("9007199254740992", "9007199254740993", "int"),
+    ("2/9", "0.2222222222", "float"), ("0.23", "2/9", "float"), ("inf", "inf", "float"),
+    ("Yes", "True", "bool"), ("falso", "True", "bool"),
+    ("(B)", "b", "string"), ("X^2", "x**2", "string"),
+    ("(1, 2/3)", "1,0.6666666667", "tuple"), ("1, a", "1,A", "tuple"), ("1", "1,2", "tuple"),
+    ("", "", "tuple"), ("4", "4", None), ("a,b", "a,b", None), (None, "3", "int"),
+]
+
+
+@pytest.mark.parametrize("received, expected, answer_type", CASES)
+def test_scalar_check_agrees_with_score_batch(received, expected, answer_type):
+    batch = score_batch([received], [expected], [answer_type])[0]
+    assert check(received, expected, answer_type) == bool(batch)
@@ -0,0 +1,45 @@
+import os
+
+import pyarrow.parquet as pq
+import pytest
+
+from columnar import convert, scan
+from data import Dataset
+
+RULETAKER = os.path.join(os.path.dirname(__file__), os.pardir, "ruletaker_subset", "test.parquet")
+
+
+@pytest.fixture(scope="module")
+def multi_group(tmp_path_factory):
+    # varios row groups para que la poda por estadisticas entre en juego
+    path = str(tmp_path_factory.mktemp("columnar") / "ruletaker.parquet")
+    pq.write_table(pq.read_table(RULETAKER).sort_by("depth"), path, row_group_size=40)
+    return path
+
+
+def _in_memory(path, predicate):
+    rows = pq.read_table(path).to_pylist()
+    return [(position, row["statement"]) for position, row in enumerate(rows) if predicate(row)]
+
+
+@pytest.mark.parametrize("where, predicate", [
+    (["depth=3"], lambda row: row["depth"] == 3),
+    (["depth>=2", "flag=True"], lambda row: row["depth"] >= 2 and row["flag"] == "True"),
+    (["depth<0"], lambda row: False),
+])
+def test_where_pushdown_matches_in_memory_filter(multi_group, where, predicate):
+    table, rows = scan(multi_group, columns=["statement"], where=where)
+    assert list(zip(rows, table.column("statement").to_pylist())) == _in_memory(multi_group, predicate)
+
+
+def test_converted_arrow_keeps_ids_and_filters(multi_group, tmp_path):
+    output = str(tmp_path / "ruletaker.arrow")
+    assert convert(multi_group, output) == pq.read_metadata(multi_group).num_rows
+    ids = [record.id for record in Dataset(output, where=["depth=3"])]
+    expected = [position for position, _ in _in_memory(multi_group, lambda row: row["depth"] == 3)]
+    assert ids == [f"ruletaker:{position}" for position in expected]
+
+
+def test_unknown_column_is_rejected():
+    with pytest.raises(ValueError):
+        scan(RULETAKER, where=["height=3"])
@@ -0,0 +1,63 @@
+import asyncio
+import math
+from collections import Counter
+
+import pytest
+
+from consistency import decided, leader_probability, vote
+from scoring import score_int
+
+
+def test_leader_probability_matches_the_beta_posterior():
+    assert leader_probability(0, 0) == 0.5
+    assert leader_probability(1, 0) == 0.75  # P(Beta(2, 1) > 1/2)
+    assert leader_probability(4, 0) == 1 - 1 / 32
+    for lead, second in [(3, 1), (6, 2), (10, 7)]:
+        assert math.isclose(leader_probability(lead, second) + leader_probability(second, lead), 1)
+        assert leader_probability(lead + 1, second) > leader_probability(lead, second)
+
+
+def test_decided_when_the_leader_cannot_be_caught():
+    assert decided(Counter(a=2), remaining=1)
+    assert not decided(Counter(a=2, b=1), remaining=2, confidence=1.0)
+    assert decided(Counter(), remaining=0)
+
+
+def _sampler(texts, drawn):
+    async def sample(i):
+        drawn.append(i)
+        text = texts[i % len(texts)]
+        if isinstance(text, Exception):
+            raise text
+        await asyncio.sleep(0)
+        return text
+
+    return sample
+
+
+def _vote(texts, max_samples, **options):
+    drawn = []
+    result = asyncio.run(vote(_sampler(texts, drawn), lambda text: score_int(text, 7),
+                              max_samples, **options))
+    return result, drawn
+
+
+def test_unanimous_votes_stop_early():
+    result, drawn = _vote(["<answer>7</answer>"], 10, parallel=1)
+    # 4 votos iguales: 1 - 1/32 >= 0.95; con 3 (0.9375) aun no
+    assert result["samples"] == 4 and drawn == [0, 1, 2, 3]
+    assert result["votes"] == [[7, 4]] and result["correct"]
+
+
+def test_majority_wins_and_unparsable_samples_do_not_vote():
+    texts = ["<answer>7</answer>", "<answer>8</answer>", "no tag", "<answer>7</answer>"]
+    result, _ = _vote(texts, 4, parallel=1, confidence=1.0)
+    assert result["votes"] == [[7, 2], [8, 1]]
+    assert result["received"] == 7 and result["samples"] == 4
+
+
+def test_failed_samples_are_skipped_until_none_succeeds():
+    result, _ = _vote([RuntimeError("boom"), "<answer>7</answer>"], 2, parallel=2, confidence=1.0)
+    assert result["votes"] == [[7, 1]]
+    with pytest.raises(RuntimeError):
+        _vote([RuntimeError("boom")], 3)
@@ -0,0 +1,96 @@
+import asyncio
+import threading
+import time
+
+from context_cache import MockPrefixBackend, cache_prefix
+from providers import MockModel
+
+
+def test_short_prefix_is_not_sent_to_the_provider():
+    model = object()
+    config = {"provider": "gemini", "name": "gemini-2.0-flash-exp"}
+    assert cache_prefix(model, config, "short tutorial " * 300, {"ttl": 60}) is model
+
+
+def _cached_mock(ttl):
+    config = {"provider": "mock", "mock": {"latency": 0, "responses": ["<answer>1</answer>"]},
+              "context_cache": {"ttl": ttl}}
+    return cache_prefix(MockModel(config, "tutorial"), config, "tutorial", config["context_cache"])
+
+
+def test_expired_handle_is_created_again():
+    model = _cached_mock(0.05)
+
+    async def run():
+        await model.generate_content_async("q1")
+        time.sleep(0.1)  # p. ej. una espera larga por 429: el TTL ya paso
+        return await model.generate_content_async("q2")
+
+    assert asyncio.run(run()).usage_metadata.cached_content_token_count > 0
+    assert model.creations == 2
+
+
+def test_handle_missing_on_the_provider_is_created_again():
+    model = _cached_mock(60)
+
+    async def run():
+        await model.generate_content_async("q1")
+        # el proveedor la borro antes de tiempo
+        model.backend.model._cached = (model._handle, time.time() - 1)
+        return await model.generate_content_async("q2")
+
+    assert asyncio.run(run()).text == "<answer>1</answer>"
+    assert model.creations == 2
+
+
+class _SlowBackend(MockPrefixBackend):
+    def create(self, ttl):
+        self.thread = threading.current_thread()
+        time.sleep(0.05)
+        return super().create(ttl)
+
+
+def test_sdk_calls_do_not_block_the_loop():
+    model = _cached_mock(60)
+    model.backend = _SlowBackend(model.backend.model)
+
+    async def run():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        ticker = asyncio.create_task(tick())
+        await model.generate_content_async("q1")
+        await model.aclose()
+        ticker.cancel()
+        return ticks
+
+    assert asyncio.run(run()) > 3
+    assert model.backend.thread is not threading.main_thread()
+    assert model._handle is None
+
+
+def test_handle_is_refreshed_before_it_expires():
+    model = _cached_mock(0.2)
+
+    async def run():
+        first = await model.generate_content_async("q1")
+        time.sleep(0.17)  # dentro del ultimo 20% del TTL
+        second = await model.generate_content_async("q2")
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert (model.creations, model.refreshes) == (1, 1)
+    for response in (first, second):
+        usage = response.usage_metadata
+        assert 0 < usage.cached_content_token_count < usage.prompt_token_count
+
+
+def test_other_providers_keep_the_plain_model():
+    model = object()
+    assert cache_prefix(model, {"provider": "openai"}, "tutorial " * 10000, {}) is model
+    assert cache_prefix(model, {"provider": "mock"}, None, {}) is model
@@ -0,0 +1,35 @@
+import asyncio
+
+from checkpoint import Checkpoint
+from engine import evaluate_async
+
+
+def test_incremental_asks_changed_questions_and_rescores_the_rest(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / "job.jsonl"))
+    asked = []
+
+    async def evaluate_question(idx, question, answer):
+        asked.append(idx)
+        return {"question": question, "expected": answer, "received": 1, "correct": answer == 1,
+                "response": "<answer>1</answer>"}
+
+    def rescore(idx, result):
+        return {**result, "expected": answers[idx], "correct": answers[idx] == 1}
+
+    questions, answers, ids = ["a", "b", "c"], [1, 1, 2], ["q0", "q1", "q2"]
+    asyncio.run(evaluate_async(evaluate_question, questions, answers, checkpoint=checkpoint,
+                               ids=ids, fingerprints=["f0", "f1", "f2"]))
+    assert asked == [0, 1, 2]
+
+    # q1 changed its inputs; the answer key of q0 was fixed
+    asked.clear()
+    answers = [2, 1, 2]
+    correct, results = asyncio.run(evaluate_async(
+        evaluate_question, questions, answers, checkpoint=checkpoint, ids=ids,
+        fingerprints=["f0", "f1*", "f2"], incremental=True, rescore=rescore))
+    assert asked == [1]
+    assert [result["correct"] for result in results] == [False, True, False]
+    assert correct == 1
+    stored = checkpoint.load()
+    assert sorted(stored) == ids
+    assert stored["q0"]["expected"] == 2 and stored["q1"]["fingerprint"] == "f1*"
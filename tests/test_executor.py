@@ -0,0 +1,40 @@
+import json
+import os
+import shutil
+
+import executor
+from executor import execute_all, verify_dataset
+
+CODE_DIR = os.path.join(os.path.dirname(__file__), os.pardir, "dataset", "code_output")
+
+SOURCE = "def f(x):\n    return int(x + {})\n"
+
+
+def _die_on_boom(source, inputs, timeout):
+    if "boom" in source:
+        os._exit(1)  # como un worker matado por el limite de memoria
+    return [(x + 1, None) for x in inputs]
+
+
+def test_killed_worker_only_fails_its_program(monkeypatch):
+    monkeypatch.setattr(executor, "_run_program", _die_on_boom)
+    pairs = [(SOURCE.format(i), i) for i in range(6)] + [("boom", 7)]
+    results = execute_all(pairs, workers=2)
+    assert len(results) == 7
+    failed = {key: value for key, value in results.items() if value[1] is not None}
+    assert list(failed) == [(executor.function_hash("boom"), 7)]
+    assert "BrokenProcessPool" in failed[(executor.function_hash("boom"), 7)][1]
+
+
+def test_fix_only_rewrites_the_wrong_answers(tmp_path):
+    shutil.copy(os.path.join(CODE_DIR, "alg1.json"), tmp_path / "alg1.json")
+    path = tmp_path / "alg1.json"
+    original = path.read_text(encoding="utf8")
+    answers = json.loads(original)["answers"]
+    # mismo formato pero con una respuesta equivocada y otra sangria
+    broken = original.replace(f"        {answers[1]},", "        12345,").replace("\n    ", "\n  ")
+    path.write_text(broken, encoding="utf8")
+
+    report = verify_dataset(str(tmp_path), fix=True, workers=1)
+    assert report["fixed"] == 1
+    assert path.read_text(encoding="utf8") == broken.replace("12345,", f"{answers[1]},")
@@ -0,0 +1,13 @@
+from data import Dataset
+from generator import generate, write_generated
+
+
+def test_default_jsonl_output_loads_as_dataset(tmp_path):
+    paths = write_generated(str(tmp_path), 20, shard_size=25, seed=1)
+    records = [record for path in paths for record in Dataset(path)]
+    rows = list(generate(20, seed=1))
+    assert [record.id for record in records] == [row["id"] for row in rows]
+    assert [record.answer for record in records] == [row["answer"] for row in rows]
+    assert {record.type for record in records} == {"int"}
+    # segunda carga desde el indice guardado junto al shard
+    assert Dataset(paths[-1])[-1].question == rows[-1]["question"]
@@ -0,0 +1,31 @@
+import os
+import random
+
+import pytest
+
+from cli import main
+from knights import generate_puzzle, parse_puzzle, solve_options, verify_dataset
+
+LOGIC_DIR = os.path.join(os.path.dirname(__file__), os.pardir, "dataset", "logic")
+
+
+@pytest.mark.parametrize("n_people", [0, 1, 2, 27])
+def test_generate_rejects_people_out_of_range(n_people):
+    with pytest.raises(ValueError):
+        generate_puzzle(random.Random(0), n_people)
+
+
+def test_generated_puzzle_has_its_answer():
+    item = generate_puzzle(random.Random(0), 3)
+    puzzle = parse_puzzle(item["questions"])
+    assert solve_options(puzzle, item["options"]) == item["answers"][0]
+
+
+def test_cli_rejects_two_people(tmp_path):
+    with pytest.raises(SystemExit):
+        main(["generate-logic", str(tmp_path), "--people", "2", "2"])
+
+
+def test_corpus_answers_match_solver():
+    report = verify_dataset(LOGIC_DIR)
+    assert report["mismatch"] == []
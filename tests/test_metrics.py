@@ -0,0 +1,63 @@
+import contextvars
+import json
+
+from metrics import Metrics, label, quantile
+
+
+def _record_job(metrics, job, latencies):
+    label(job=job, question=f"{job}:0")
+    for latency in latencies:
+        metrics.record("request", latency=latency, prompt_tokens=100, output_tokens=10,
+                       cached_tokens=40, cost=metrics.cost(100, 10, 40), retries=1)
+    metrics.record("question", seconds=sum(latencies), retries=0)
+
+
+def _metrics():
+    metrics = Metrics()
+    metrics.prices["a"] = (1.0, 2.0)
+    # cada job en su propio contexto, como las tareas de un sweep
+    contextvars.copy_context().run(_record_job, metrics, "a", [0.1, 0.2, 0.3, 0.4])
+    contextvars.copy_context().run(_record_job, metrics, "b", [1.0])
+    contextvars.copy_context().run(metrics.record, "request", error="ServerError")
+    return metrics
+
+
+def _samples(path):
+    values = {}
+    for line in path.read_text(encoding="utf8").splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            values[name] = float(value)
+    return values
+
+
+def test_prometheus_summaries_and_counters_per_job(tmp_path):
+    metrics = _metrics()
+    metrics.export(str(tmp_path / "run"))
+    samples = _samples(tmp_path / "run.prom")
+    assert samples['eval_request_latency_seconds{job="a",quantile="0.5"}'] == 0.25
+    assert samples['eval_request_latency_seconds_count{job="a"}'] == 4
+    assert samples['eval_request_latency_seconds_sum{job="b"}'] == 1.0
+    assert samples['eval_tokens_total{job="a",direction="cached"}'] == 160
+    assert samples['eval_rate_limit_retries_total{job="b"}'] == 1
+    # 60 tokens de entrada a precio completo + 40 al 25%, y 10 de salida
+    assert samples['eval_cost_usd_total{job="a"}'] == 4 * (70 * 1.0 + 10 * 2.0) / 1e6
+    assert samples['eval_cost_usd_total{job="b"}'] == 0  # precio desconocido
+    assert samples['eval_request_errors_total{job=""}'] == 1
+    text = (tmp_path / "run.prom").read_text(encoding="utf8")
+    assert "# TYPE eval_request_latency_seconds summary" in text
+    assert "# TYPE eval_tokens_total counter" in text
+
+
+def test_jsonl_keeps_the_labels_of_each_record(tmp_path):
+    _metrics().export(str(tmp_path / "run"))
+    lines = (tmp_path / "run.jsonl").read_text(encoding="utf8").splitlines()
+    records = [json.loads(line) for line in lines]
+    assert [record.get("job") for record in records] == ["a"] * 5 + ["b"] * 2 + [None]
+    assert records[0]["question"] == "a:0" and records[0]["kind"] == "request"
+
+
+def test_quantile_interpolates():
+    assert quantile([4, 1, 3, 2], 0.5) == 2.5
+    assert quantile([1, 2, 3, 4, 5], 0.95) == 4.8
+    assert quantile([], 0.5) is None
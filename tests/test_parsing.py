@@ -0,0 +1,44 @@
+import pytest
+
+from parsing import AnswerExtractor, parse_answer
+from scoring import JUDGES, score_int
+
+
+@pytest.mark.parametrize("value", ["inf", "-inf", "1e400", "nan"])
+def test_non_finite_integer_is_invalid(value):
+    outcome = parse_answer(f"<answer>{value}</answer>", "int")
+    assert outcome.status == "invalid"
+    assert outcome.raw == value
+
+
+@pytest.mark.parametrize("value", ["inf", "1e400", "1" * 400])
+def test_score_int_never_raises(value):
+    result = score_int(f"<answer>{value}</answer>", 12)
+    assert result["correct"] is False
+
+
+def test_score_int_compares_numbers():
+    assert score_int("<answer>12.0</answer>", 12)["correct"]
+    assert score_int("<answer>12</answer>", "12")["correct"]
+
+
+def test_judges_grade_parsed_values():
+    assert JUDGES["int"](12, 12)["correct"]
+    assert JUDGES["list"]([1, 2], [1, 2])["correct"]
+    assert JUDGES["value"]("<answer>x</answer>", "<answer>x</answer>")["correct"]
+    assert JUDGES["typed"]("1/2", "0.5", answer_type="float")["correct"]
+
+
+def test_extractor_matches_loose_tags_split_across_chunks():
+    extractor = AnswerExtractor()
+    chunks = ["razonamiento x < 3 ... < ANS", "WER >[2]", "</ Answer", " >", " y mas texto"]
+    done = [extractor.feed(chunk) for chunk in chunks]
+    assert done == [False, False, False, True, True]
+    assert extractor.answers == ["[2]"]
+
+
+def test_extractor_counts_indexed_answers():
+    extractor = AnswerExtractor(expected=2)
+    assert not extractor.feed('<answer id="1">4</answer>')
+    assert extractor.feed('<ANSWER id="2">5</ANSWER>')
+    assert extractor.answers == ["4", "5"]
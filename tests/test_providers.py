@@ -0,0 +1,91 @@
+import asyncio
+import sys
+import types
+
+import pytest
+
+import providers
+
+
+class _Client:
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+
+    async def aclose(self):
+        self.closed = True
+
+
+@pytest.fixture
+def fake_sdk(monkeypatch):
+    httpx = types.ModuleType("httpx")
+    httpx.AsyncClient = _Client
+    httpx.Limits = httpx.Timeout = lambda *args, **kwargs: (args, kwargs)
+    openai = types.ModuleType("openai")
+    openai.AsyncOpenAI = _Client
+    monkeypatch.setitem(sys.modules, "httpx", httpx)
+    monkeypatch.setitem(sys.modules, "openai", openai)
+    monkeypatch.setenv("OPENAI_API_KEY", "default")
+    monkeypatch.setenv("OTHER_KEY", "other")
+
+
+def test_differently_configured_models_get_their_own_client(fake_sdk):
+    async def clients():
+        base = {"provider": "openai", "name": "m"}
+        models = [providers.OpenAIModel(base, None),
+                  providers.OpenAIModel(base, None),
+                  providers.OpenAIModel({**base, "base_url": "http://local"}, None),
+                  providers.OpenAIModel({**base, "pool_size": 4}, None),
+                  providers.OpenAIModel({**base, "timeout": 5}, None),
+                  providers.OpenAIModel({**base, "api_key_env": "OTHER_KEY"}, None)]
+        try:
+            return [model._client() for model in models]
+        finally:
+            await providers.close_clients()
+
+    shared, same, *others = asyncio.run(clients())
+    assert shared is same
+    assert len({id(client) for client in [shared, *others]}) == 5
+    assert others[0].kwargs["base_url"] == "http://local"
+    assert others[-1].kwargs["api_key"] == "other"
+    assert not providers._clients
+
+
+def _mock(**options):
+    return providers.MockModel({"provider": "mock", "mock": {"latency": 0, **options}})
+
+
+def test_mock_replays_recorded_responses(tmp_path):
+    replay = tmp_path / "replay.jsonl"
+    replay.write_text('{"prompt": "q1", "response": "<answer>1</answer>"}\n'
+                      '{"response": "<answer>2</answer>"}\n', encoding="utf8")
+    model = _mock(replay=str(replay))
+    assert asyncio.run(model.generate_content_async("q1")).text == "<answer>1</answer>"
+    # los prompts desconocidos reciben siempre la misma respuesta grabada
+    unknown = {asyncio.run(model.generate_content_async("other")).text for _ in range(3)}
+    assert len(unknown) == 1 and unknown <= {"<answer>1</answer>", "<answer>2</answer>"}
+
+
+def test_mock_streams_chunks_with_usage_at_the_end():
+    model = _mock(responses=["abcdefgh"], chunk_size=3)
+
+    async def chunks():
+        return [chunk async for chunk in await model.generate_content_async("q", stream=True)]
+
+    received = asyncio.run(chunks())
+    assert [chunk.text for chunk in received] == ["abc", "def", "gh"]
+    assert [chunk.usage_metadata is not None for chunk in received] == [False, False, True]
+
+
+def test_mock_errors_follow_the_configured_rates():
+    model = _mock(error_rate=0.3, rate_limit_rate=0.2, seed=1)
+    outcomes = []
+    for _ in range(400):
+        try:
+            asyncio.run(model.generate_content_async("q"))
+            outcomes.append("ok")
+        except providers.MockRateLimitError:
+            outcomes.append("429")
+        except providers.MockError:
+            outcomes.append("error")
+    assert 0.1 < outcomes.count("429") / 400 < 0.3
+    assert 0.2 < outcomes.count("error") / 400 < 0.4
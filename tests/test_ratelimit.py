@@ -0,0 +1,59 @@
+import asyncio
+
+import ratelimit
+from ratelimit import RateLimiter, _fresh_state, call_with_backoff
+
+
+def test_bucket_drains_and_refills_at_the_quota_rate():
+    limiter = RateLimiter(rpm=60, tpm=None)
+    state = _fresh_state(0.0)
+    for _ in range(60):
+        state, wait = limiter._take(state, 0, 0.0)
+        assert wait == 0.0
+    state, wait = limiter._take(state, 0, 0.0)
+    assert wait == 1.0  # un token por segundo con 60 rpm
+    state, wait = limiter._take(state, 0, 0.5)
+    assert wait == 0.5
+    state, wait = limiter._take(state, 0, 1.0)
+    assert wait == 0.0
+
+
+def test_token_quota_waits_for_large_prompts():
+    limiter = RateLimiter(rpm=None, tpm=600)
+    state, wait = limiter._take(_fresh_state(0.0), 500, 0.0)
+    assert wait == 0.0
+    state, wait = limiter._take(state, 500, 0.0)
+    assert wait == 40.0  # faltan 400 tokens a 10 por segundo
+
+
+def test_rate_limit_halves_the_quota_and_blocks(monkeypatch):
+    monkeypatch.setattr(ratelimit.random, "uniform", lambda low, high: high)
+    limiter = RateLimiter(rpm=60, tpm=None)
+    assert limiter.record_rate_limited() > 0
+    assert limiter.record_rate_limited() > 0
+    state = limiter._state.state
+    assert state["scale"] == 0.25 and state["strikes"] == 2
+    state, wait = limiter._take(dict(state), 0, state["updated"])
+    assert wait > 0
+    # fuera del bloqueo el bucket solo llega a 60 * 0.25 peticiones
+    later = state["blocked_until"] + 120
+    state, _ = limiter._take(state, 0, later)
+    assert state["requests"] == 14
+    limiter.record_success()
+    assert limiter._state.state["scale"] == 0.3
+
+
+def test_call_with_backoff_retries_rate_limits_only(monkeypatch):
+    monkeypatch.setattr(ratelimit.random, "uniform", lambda low, high: 0.0)
+    limiter = RateLimiter(rpm=None, tpm=None)
+    calls = []
+
+    async def make_call():
+        calls.append(1)
+        if len(calls) < 3:
+            raise RuntimeError("429 Resource has been exhausted")
+        return "ok"
+
+    stats = {}
+    assert asyncio.run(call_with_backoff(limiter, make_call, stats=stats)) == "ok"
+    assert stats["retries"] == 2 and len(calls) == 3
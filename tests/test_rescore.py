@@ -0,0 +1,43 @@
+from cli import main
+from runner import DEFAULT_CONFIG, merge_config
+from warehouse import Warehouse
+
+
+def _stored_run(path):
+    config = merge_config(DEFAULT_CONFIG, {
+        "name": "flash", "dataset": {"path": "dataset/code_output"}, "scorer": "int",
+        "model": {"name": "gemini-2.0-flash"}})
+    # "correct" guardado con un parser viejo: la primera y la tercera si son correctas
+    results = [
+        {"expected": 3, "received": None, "correct": False, "response": "pienso... <answer>3</answer>"},
+        {"expected": 4, "received": 4, "correct": True, "response": "<answer>5</answer>"},
+        {"expected": 6, "received": None, "correct": False, "response": "<answer> 6 </answer>"},
+        {"expected": 7, "error": "timeout"},
+    ]
+    warehouse = Warehouse(path)
+    run_id = warehouse.record_run(config, ["alg0", "alg1", "alg2", "alg3"], results)
+    warehouse.close()
+    return run_id
+
+
+def test_rescore_run_stores_a_new_run(tmp_path, capsys):
+    path = str(tmp_path / "wh.sqlite")
+    run_id = _stored_run(path)
+
+    main(["rescore", "--run", str(run_id), "--warehouse", path, "--workers", "1"])
+    assert f"run {run_id}: 1 -> 2 correct of 4" in capsys.readouterr().out
+
+    warehouse = Warehouse(path)
+    columns, rows = warehouse.runs()
+    assert len(rows) == 2
+    new_run = max(dict(zip(columns, row))["run_id"] for row in rows)
+    assert warehouse.run(new_run)["rescored_from"] == run_id
+    rescored = list(warehouse.results_of(new_run))
+    assert [row["correct"] for row in rescored] == [1, 0, 1, None]
+    assert rescored[3]["error"] == "timeout"
+    # la ejecucion nueva comparte las respuestas crudas de la original
+    assert warehouse.response(new_run, "alg0") == "pienso... <answer>3</answer>"
+    assert warehouse.query("SELECT COUNT(*) FROM responses WHERE run_id = ?", (new_run,))[1] == [(3,)]
+    columns, rows = warehouse.diff(run_id, new_run)
+    assert [dict(zip(columns, row))["question_id"] for row in rows] == ["alg0", "alg1", "alg2"]
+    warehouse.close()
@@ -0,0 +1,38 @@
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from rules import solve, verify_dataset
+
+THEORY = """Facts:
+Bob is big.
+Anne is cold.
+Rules:
+If bob is big, then bob is red.
+When bob is red and bob is big, we can conclude bob is kind.
+Given that bob is kind and anne is cold, it follows that anne is nice.
+Assuming anne is green, we can say bob is nice.
+"""
+
+
+def test_proof_depth_is_the_shortest_derivation():
+    assert solve(THEORY, "Bob is big.") == (True, 0)
+    assert solve(THEORY, "Bob is red.") == (True, 1)
+    assert solve(THEORY, "Bob is kind.") == (True, 2)
+    assert solve(THEORY, "Anne is nice.") == (True, 3)
+    # la premisa "anne is green" nunca se cumple
+    assert solve(THEORY, "Bob is nice.") == (False, None)
+
+
+def test_verify_dataset_compares_flags_per_depth(tmp_path):
+    path = str(tmp_path / "theories.parquet")
+    pq.write_table(pa.table({
+        "context": [THEORY] * 3,
+        "statement": ["Anne is nice.", "Bob is nice.", "Bob is red."],
+        "flag": ["True", "False", "False"],
+        "depth": [3, 3, 1],
+    }), path)
+    report = verify_dataset(path)
+    assert (report["checked"], report["ok"]) == (3, 2)
+    assert [row["id"] for row in report["mismatch"]] == ["theories:2"]
+    assert report["by_depth"] == {3: {"rows": 2, "ok": 2}, 1: {"rows": 1, "ok": 0}}
+    assert verify_dataset(path, where=["depth=1"])["checked"] == 1
@@ -0,0 +1,23 @@
+import pytest
+
+pytest.importorskip("pydantic")
+
+from schemas import structured_scorer  # noqa: E402
+
+
+def test_structured_value_with_tag_like_text():
+    score = structured_scorer("value", "value")
+    result = score('{"answer": "<answer>x</answer>"}', "<answer>x</answer>")
+    assert result["correct"] and "parse_error" not in result
+
+
+def test_structured_option_and_int_list():
+    assert structured_scorer("list", "option")('{"option": 2}', [2])["correct"]
+    assert structured_scorer("list", "int_list")('{"answers": [1, -2, 3]}', [1, -2, 3])["correct"]
+    assert structured_scorer("bool", "bool")('{"answer": false}', "False")["correct"]
+
+
+def test_structured_invalid_json_is_a_parse_error():
+    result = structured_scorer("int", "int")('{"answer": "twelve"}', 12)
+    assert not result["correct"] and result["parse_error"].startswith("int schema")
+
@@ -0,0 +1,52 @@
+import asyncio
+
+import sweep
+
+
+def test_failed_job_does_not_stop_the_others(monkeypatch):
+    async def run_job_async(job, **kwargs):
+        if job["config"]["name"] == "bad":
+            raise RuntimeError("boom")
+        await asyncio.sleep(0)
+        return 1, [{"correct": True}]
+
+    monkeypatch.setattr(sweep, "run_job_async", run_job_async)
+    jobs = [{"config": {"name": "bad"}}, {"config": {"name": "good"}}]
+    (_, bad, _, bad_error), (correct, good, _, good_error) = asyncio.run(
+        sweep._run_jobs(jobs, 2, "unused", False))
+    assert bad == [] and "boom" in bad_error
+    assert correct == 1 and good == [{"correct": True}] and good_error is None
+
+
+def test_slots_cap_model_calls_with_batching_and_voting(monkeypatch, tmp_path):
+    import engine
+    from metrics import Metrics, set_metrics
+    from providers import MockModel
+    from ratelimit import RateLimiter
+    from runner import DEFAULT_CONFIG, merge_config, prepare_config
+
+    engine.set_response_cache(None)
+    engine.set_rate_limiter(RateLimiter(rpm=None, tpm=None))
+    set_metrics(Metrics())
+    in_flight = []
+    peak = []
+    original = MockModel.generate_content_async
+
+    async def counted(self, prompt, stream=False):
+        in_flight.append(prompt)
+        peak.append(len(in_flight))
+        try:
+            return await original(self, prompt, stream=stream)
+        finally:
+            in_flight.remove(prompt)
+
+    monkeypatch.setattr(MockModel, "generate_content_async", counted)
+    base = {"dataset": {"path": "dataset/code_output", "flat": True}, "scorer": "int",
+            "model": {"provider": "mock", "mock": {"latency": 0.01, "responses": [
+                '<answer id="1">1</answer><answer id="2">2</answer><answer>3</answer>']}}}
+    configs = [merge_config(DEFAULT_CONFIG, {**base, "name": "voting", "samples": 3}),
+               merge_config(DEFAULT_CONFIG, {**base, "name": "packed", "batch_size": 4})]
+    jobs = [prepare_config(config, limit=12) for config in configs]
+    outcomes = asyncio.run(sweep._run_jobs(jobs, 2, str(tmp_path), False))
+    assert all(failed is None for *_, failed in outcomes)
+    assert peak and max(peak) <= 2
@@ -0,0 +1,70 @@
+import contextvars
+
+from metrics import Metrics, label
+from runner import DEFAULT_CONFIG, merge_config
+from warehouse import Warehouse
+
+
+def _config(name, model, temperature=1):
+    return merge_config(DEFAULT_CONFIG, {
+        "name": name, "dataset": {"path": "dataset/code_output"}, "scorer": "int",
+        "model": {"name": model, "generation_config": {"temperature": temperature}}})
+
+
+def _result(expected, received, response=None):
+    return {"question": "q", "expected": expected, "received": received,
+            "correct": expected == received, "response": response}
+
+
+def test_round_trip_with_costs_and_responses(tmp_path):
+    warehouse = Warehouse(str(tmp_path / "wh.sqlite"))
+    metrics = Metrics()
+
+    def calls():
+        label(job="flash", question="alg0")
+        metrics.record("request", latency=0.5, prompt_tokens=100, output_tokens=7)
+        metrics.record("request", latency=0.25, prompt_tokens=100, output_tokens=3)
+
+    contextvars.copy_context().run(calls)
+    results = [_result(3, 3, "razonamiento <answer>3</answer>"),
+               {"question": "q", "expected": 5, "error": "timeout"}]
+    run_id = warehouse.record_run(_config("flash", "gemini-2.0-flash"), ["alg0", "alg1"],
+                                  results, metrics)
+
+    columns, rows = warehouse.runs()
+    run = dict(zip(columns, rows[0]))
+    assert (run["run_id"], run["model"], run["items"], run["correct"]) == (run_id, "gemini-2.0-flash", 2, 1)
+    assert warehouse.run(run_id)["name"] == "flash"
+    stored = list(warehouse.results_of(run_id))
+    assert [row["question_id"] for row in stored] == ["alg0", "alg1"]
+    assert (stored[0]["latency"], stored[0]["prompt_tokens"], stored[0]["requests"]) == (0.75, 200, 2)
+    assert stored[1]["error"] == "timeout" and stored[1]["data"] is None
+    assert warehouse.response(run_id, "alg0") == "razonamiento <answer>3</answer>"
+    warehouse.close()
+
+
+def test_accuracy_groups_and_diff(tmp_path):
+    warehouse = Warehouse(str(tmp_path / "wh.sqlite"))
+    ids = ["alg0", "alg1", "alg2"]
+    text = "<answer>1</answer>"
+    runs = [
+        warehouse.record_run(_config("a", "flash", 0), ids, [_result(1, 1, text), _result(2, 2, text),
+                                                              _result(3, 0, text)]),
+        warehouse.record_run(_config("b", "flash", 1), ids, [_result(1, 1, text), _result(2, 5, text),
+                                                              _result(3, 0, text)]),
+        warehouse.record_run(_config("c", "pro", 1), ids, [_result(1, 1), _result(2, 2), _result(3, 3)]),
+    ]
+    # las respuestas iguales se guardan comprimidas una sola vez
+    assert warehouse.query("SELECT COUNT(*) FROM blobs")[1] == [(1,)]
+
+    columns, rows = warehouse.accuracy(by=["model"])
+    accuracy = {row[0]: dict(zip(columns, row)) for row in rows}
+    assert (accuracy["flash"]["items"], accuracy["flash"]["correct"]) == (6, 3)
+    assert accuracy["pro"]["accuracy"] == 100.0
+    _, rows = warehouse.accuracy(by=["model"], where=[("temperature", 1)])
+    assert [(row[0], row[2]) for row in rows] == [("flash", 1), ("pro", 3)]
+
+    columns, rows = warehouse.diff(runs[0], runs[1])
+    assert [dict(zip(columns, row))["question_id"] for row in rows] == ["alg1"]
+    assert dict(zip(columns, rows[0]))["received_b"] == "5"
+    warehouse.close()